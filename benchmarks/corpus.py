@@ -0,0 +1,152 @@
+"""
+Synthetic drawing corpus for offline benchmarks.
+
+Generates panel schedules, room finish schedules and dense vector plans with
+the folder layout and file naming of a real job.
+"""
+import random
+from pathlib import Path
+from typing import Dict, List
+
+import pymupdf
+
+SHEET_SIZE = pymupdf.paper_rect("ledger-l")  # 17 x 11 in landscape
+ROOM_NAMES = ["OFFICE", "CONFERENCE", "STORAGE", "CORRIDOR", "RESTROOM", "BREAK ROOM", "LOBBY", "ELECTRICAL"]
+LOAD_NAMES = ["LIGHTING", "RECEPTACLES", "RTU", "EF", "WATER HEATER", "SPARE", "DATA RACK", "HAND DRYER"]
+
+
+def _title_block(page: pymupdf.Page, sheet_number: str, title: str) -> None:
+    rect = pymupdf.Rect(SHEET_SIZE.width - 180, SHEET_SIZE.height - 110, SHEET_SIZE.width - 20, SHEET_SIZE.height - 20)
+    page.draw_rect(rect, width=1)
+    page.insert_text(rect.tl + (8, 20), "PROJECT: BENCHMARK JOB", fontsize=8)
+    page.insert_text(rect.tl + (8, 38), f"SHEET TITLE: {title}", fontsize=8)
+    page.insert_text(rect.tl + (8, 56), "DATE: 01/15/2025", fontsize=8)
+    page.insert_text(rect.tl + (8, 74), "REV: 1", fontsize=8)
+    page.insert_text(rect.tl + (8, 86), sheet_number, fontsize=14)
+
+
+def _grid_table(page: pymupdf.Page, origin: pymupdf.Point, widths: List[float], rows: List[List[str]],
+                row_height: float = 12) -> float:
+    """Draw a ruled table and return its bottom y coordinate."""
+    x, y = origin
+    total_width = sum(widths)
+    for r, row in enumerate(rows):
+        top = y + r * row_height
+        page.draw_line((x, top), (x + total_width, top), width=0.5)
+        cell_x = x
+        for width, text in zip(widths, row):
+            page.insert_text((cell_x + 2, top + row_height - 3), text, fontsize=6)
+            cell_x += width
+    bottom = y + len(rows) * row_height
+    page.draw_line((x, bottom), (x + total_width, bottom), width=0.5)
+    cell_x = x
+    for width in widths + [0]:
+        page.draw_line((cell_x, y), (cell_x, bottom), width=0.5)
+        cell_x += width
+    return bottom
+
+
+def panel_schedule(path: Path, pages: int, rng: random.Random) -> None:
+    doc = pymupdf.open()
+    panel_number = 1
+    for _ in range(pages):
+        page = doc.new_page(width=SHEET_SIZE.width, height=SHEET_SIZE.height)
+        for column in range(3):
+            origin = pymupdf.Point(30 + column * 330, 60)
+            page.insert_text(origin - (0, 10), f"PANEL SCHEDULE - PANEL LP-{panel_number}  FED FROM: MDP", fontsize=8)
+            rows = [["CKT", "DESCRIPTION", "VA", "POLES", "BREAKER", "PHASE"]]
+            for circuit in range(1, 43):
+                rows.append([
+                    str(circuit), rng.choice(LOAD_NAMES), str(rng.randrange(180, 4000, 20)),
+                    str(rng.choice([1, 1, 1, 2, 3])), f"{rng.choice([20, 20, 30, 40])}A", "ABC"[circuit % 3]
+                ])
+            _grid_table(page, origin, [25, 110, 45, 40, 55, 40], rows)
+            panel_number += 1
+        _title_block(page, "E5.00", "PANEL SCHEDULES")
+    doc.save(path)
+    doc.close()
+
+
+def room_schedule(path: Path, pages: int, rng: random.Random) -> None:
+    doc = pymupdf.open()
+    room_number = 101
+    for _ in range(pages):
+        page = doc.new_page(width=SHEET_SIZE.width, height=SHEET_SIZE.height)
+        page.insert_text((30, 40), "ROOM FINISH SCHEDULE", fontsize=10)
+        rows = [["ROOM NO", "ROOM NAME", "FLOOR", "BASE", "WALLS", "CEILING", "HEIGHT"]]
+        for _ in range(50):
+            rows.append([
+                str(room_number), rng.choice(ROOM_NAMES), rng.choice(["VCT", "CPT", "SC"]),
+                rng.choice(["RB", "WD"]), rng.choice(["PT-1", "PT-2"]), rng.choice(["ACT-1", "GYP"]),
+                f"{rng.choice([8, 9, 10])}'-0\""
+            ])
+            room_number += 1
+        _grid_table(page, pymupdf.Point(30, 50), [60, 140, 60, 50, 60, 60, 60], rows)
+        _title_block(page, "A6.0", "ROOM FINISH SCHEDULE")
+    doc.save(path)
+    doc.close()
+
+
+def dense_plan(path: Path, pages: int, rng: random.Random, segments: int = 4000) -> None:
+    doc = pymupdf.open()
+    for _ in range(pages):
+        page = doc.new_page(width=SHEET_SIZE.width, height=SHEET_SIZE.height)
+        shape = page.new_shape()
+        for _ in range(segments):
+            x, y = rng.uniform(20, SHEET_SIZE.width - 200), rng.uniform(20, SHEET_SIZE.height - 20)
+            if rng.random() < 0.5:
+                shape.draw_line((x, y), (x + rng.uniform(5, 120), y))
+            else:
+                shape.draw_line((x, y), (x, y + rng.uniform(5, 120)))
+        shape.finish(width=0.3)
+        shape.commit()
+        for tag in range(60):
+            x, y = rng.uniform(30, SHEET_SIZE.width - 220), rng.uniform(30, SHEET_SIZE.height - 30)
+            page.insert_text((x, y), f"{rng.choice(ROOM_NAMES)} {100 + tag}", fontsize=6)
+        _title_block(page, path.stem.split("-")[0], "FLOOR PLAN")
+    doc.save(path)
+    doc.close()
+
+
+def generate_corpus(folder: Path, panel_schedules: int = 2, room_schedules: int = 2, dense_plans: int = 4,
+                    pages: int = 2, seed: int = 0) -> Dict[str, List[Path]]:
+    """
+    Write a synthetic job into folder.
+
+    Args:
+        folder: Job folder to create
+        panel_schedules: Number of electrical panel schedule sets
+        room_schedules: Number of architectural room finish schedules
+        dense_plans: Number of vector-heavy floor plans, spread across disciplines
+        pages: Pages per file
+        seed: Random seed, so the same arguments always produce the same corpus
+
+    Returns:
+        Dict mapping corpus kind to the generated paths
+    """
+    rng = random.Random(seed)
+    corpus: Dict[str, List[Path]] = {"panel_schedules": [], "room_schedules": [], "dense_plans": []}
+
+    electrical = folder / "Electrical"
+    architectural = folder / "Architectural"
+    for subfolder in (electrical, architectural, folder / "Mechanical"):
+        subfolder.mkdir(parents=True, exist_ok=True)
+
+    for i in range(panel_schedules):
+        path = electrical / f"E5.{i:02d}-PANEL-SCHEDULES-Rev.1.pdf"
+        panel_schedule(path, pages, rng)
+        corpus["panel_schedules"].append(path)
+
+    for i in range(room_schedules):
+        path = architectural / f"A6.{i}-ROOM-FINISH-SCHEDULE-Rev.1.pdf"
+        room_schedule(path, pages, rng)
+        corpus["room_schedules"].append(path)
+
+    plan_folders = [(architectural, "A", "FLOOR-PLAN"), (electrical, "E", "POWER-PLAN"), (folder / "Mechanical", "M", "HVAC-PLAN")]
+    for i in range(dense_plans):
+        subfolder, prefix, title = plan_folders[i % len(plan_folders)]
+        path = subfolder / f"{prefix}2.{i}-{title}-Rev.1.pdf"
+        dense_plan(path, pages, rng)
+        corpus["dense_plans"].append(path)
+
+    return corpus
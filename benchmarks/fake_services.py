@@ -0,0 +1,284 @@
+"""
+Local stand-ins for the OpenAI chat completions API and Azure Document Intelligence.
+
+Both speak enough of the real wire protocol for the unmodified SDKs to talk
+to them, with configurable latency, token rates and 429 injection, so the
+full pipeline can be benchmarked without network access. The chat service
+also reports prompt cache hits the way OpenAI does, for the longest prompt
+prefix it has already seen.
+"""
+import os
+import re
+import json
+import time
+import uuid
+import random
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import pymupdf
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+# Prompt caching applies from this many prompt tokens, in steps of CACHE_INCREMENT
+CACHE_MIN_TOKENS = 1024
+CACHE_INCREMENT = 128
+ROOM_PATTERN = re.compile(r"\b(\d{3})\s+([A-Z][A-Z]+(?: [A-Z]+)*)")
+
+
+@dataclass
+class FakeServiceConfig:
+    """Latency and failure model for the fake services."""
+    chat_latency: float = 0.2  # seconds before the first token
+    tokens_per_second: float = 400.0  # completion token generation rate
+    output_ratio: float = 0.3  # completion tokens per prompt token
+    rate_limit_probability: float = 0.0  # chance that any request is answered with 429
+    retry_after_ms: int = 50
+    di_latency: float = 1.0  # seconds until an analyze operation succeeds
+    di_seconds_per_page: float = 0.2
+    di_poll_interval_ms: int = 100
+    seed: int = 0
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def _polygon(rect: pymupdf.Rect) -> List[float]:
+    # Document Intelligence reports inches on PDF input
+    x0, y0, x1, y1 = (v / 72 for v in rect)
+    return [x0, y0, x1, y0, x1, y1, x0, y1]
+
+
+def build_analyze_result(pdf_bytes: bytes, filetype: str = "pdf") -> Dict[str, Any]:
+    """
+    Build a prebuilt-layout style analyzeResult from the uploaded PDF (or image).
+
+    Lines come from PyMuPDF; rows of three or more words sharing a baseline
+    are reported as table cells, which is close enough for schedule sheets.
+    """
+    content_parts: List[str] = []
+    offset = 0
+    pages = []
+    paragraphs = []
+    tables = []
+
+    with pymupdf.open(stream=pdf_bytes, filetype=filetype) as doc:
+        for page in doc:
+            lines = []
+            rows: Dict[int, List[tuple]] = {}
+            for block in page.get_text("dict")["blocks"]:
+                for line in block.get("lines", []):
+                    text = "".join(span["text"] for span in line["spans"]).strip()
+                    if not text:
+                        continue
+                    lines.append({
+                        "content": text,
+                        "polygon": _polygon(pymupdf.Rect(line["bbox"])),
+                        "spans": [{"offset": offset, "length": len(text)}]
+                    })
+                    paragraphs.append({
+                        "content": text,
+                        "spans": [{"offset": offset, "length": len(text)}],
+                        "boundingRegions": [{"pageNumber": page.number + 1, "polygon": _polygon(pymupdf.Rect(line["bbox"]))}]
+                    })
+                    rows.setdefault(round(line["bbox"][1] / 4), []).append((line["bbox"][0], text))
+                    content_parts.append(text)
+                    offset += len(text) + 1
+
+            table_rows = [sorted(cells) for _, cells in sorted(rows.items()) if len(cells) >= 3]
+            if table_rows:
+                column_count = max(len(row) for row in table_rows)
+                tables.append({
+                    "rowCount": len(table_rows),
+                    "columnCount": column_count,
+                    "cells": [
+                        {"kind": "columnHeader" if r == 0 else "content", "rowIndex": r, "columnIndex": c,
+                         "content": text, "spans": []}
+                        for r, row in enumerate(table_rows)
+                        for c, (_, text) in enumerate(row)
+                    ],
+                    "boundingRegions": [{"pageNumber": page.number + 1, "polygon": _polygon(page.rect)}]
+                })
+
+            pages.append({
+                "pageNumber": page.number + 1,
+                "width": page.rect.width / 72,
+                "height": page.rect.height / 72,
+                "unit": "inch",
+                "lines": lines,
+                "spans": []
+            })
+
+    return {
+        "apiVersion": "2024-02-29-preview",
+        "modelId": "prebuilt-layout",
+        "stringIndexType": "textElements",
+        "content": "\n".join(content_parts),
+        "pages": pages,
+        "paragraphs": paragraphs,
+        "tables": tables
+    }
+
+
+class FakeServices:
+    """
+    Runs both fake services on one local aiohttp server.
+
+    Usage:
+        services = FakeServices(FakeServiceConfig(chat_latency=0.5))
+        await services.start()
+        os.environ.update(services.environment())
+        ...
+        await services.stop()
+    """
+
+    def __init__(self, config: Optional[FakeServiceConfig] = None):
+        self.config = config or FakeServiceConfig()
+        self._random = random.Random(self.config.seed)
+        self._operations: Dict[str, Dict[str, Any]] = {}
+        # Distinct prompt prefixes (every message but the last) seen so far
+        self._prefixes: List[str] = []
+        self._runner: Optional[web.AppRunner] = None
+        self.base_url = ""
+        self.stats = {
+            "chat_requests": 0, "chat_rate_limited": 0, "prompt_tokens": 0, "cached_tokens": 0,
+            "di_requests": 0, "di_rate_limited": 0, "di_polls": 0, "di_bytes": 0
+        }
+
+        self.app = web.Application(client_max_size=1024 ** 3)
+        self.app.router.add_post("/v1/chat/completions", self._chat_completions)
+        self.app.router.add_post(r"/documentintelligence/documentModels/{model_id:[^:/]+}:analyze", self._di_analyze)
+        self.app.router.add_get("/documentintelligence/documentModels/{model_id}/analyzeResults/{operation_id}", self._di_result)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start the server and return its base URL."""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{bound_port}"
+        logger.info(f"Fake OpenAI and Document Intelligence services on {self.base_url}")
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def environment(self) -> Dict[str, str]:
+        """Environment variables pointing the OpenAI and Azure SDKs at this server."""
+        return {
+            "OPENAI_BASE_URL": f"{self.base_url}/v1",
+            "OPENAI_API_KEY": "fake-openai-key",
+            "DOCUMENTINTELLIGENCE_ENDPOINT": self.base_url,
+            "DOCUMENTINTELLIGENCE_API_KEY": "fake-di-key",
+        }
+
+    def _rate_limited(self) -> Optional[web.Response]:
+        if self._random.random() >= self.config.rate_limit_probability:
+            return None
+        return web.json_response(
+            {"error": {"message": "Rate limit reached (fake)", "type": "rate_limit_error", "code": "rate_limit_exceeded"}},
+            status=429,
+            headers={"retry-after-ms": str(self.config.retry_after_ms)}
+        )
+
+    def _cached_tokens(self, messages: List[Dict[str, Any]], prompt_tokens: int) -> int:
+        """Tokens of the longest previously seen prefix, in cache increments."""
+        prompt_text = "".join(str(m.get("content", "")) for m in messages)
+        prefix = "".join(str(m.get("content", "")) for m in messages[:-1])
+        longest = max((len(os.path.commonprefix([seen, prompt_text])) for seen in self._prefixes), default=0)
+        if prefix and prefix not in self._prefixes:
+            self._prefixes.append(prefix)
+        cached = longest // CHARS_PER_TOKEN // CACHE_INCREMENT * CACHE_INCREMENT
+        return min(cached, prompt_tokens) if prompt_tokens >= CACHE_MIN_TOKENS and cached >= CACHE_MIN_TOKENS else 0
+
+    async def _chat_completions(self, request: web.Request) -> web.Response:
+        self.stats["chat_requests"] += 1
+        limited = self._rate_limited()
+        if limited:
+            self.stats["chat_rate_limited"] += 1
+            return limited
+
+        body = await request.json()
+        messages = body.get("messages", [])
+        prompt_text = "".join(str(m.get("content", "")) for m in messages)
+        user_text = "".join(str(m.get("content", "")) for m in messages if m.get("role") == "user")
+        prompt_tokens = _estimate_tokens(prompt_text)
+        completion_tokens = max(16, min(int(prompt_tokens * self.config.output_ratio), body.get("max_tokens") or 16000))
+        cached_tokens = self._cached_tokens(messages, prompt_tokens)
+        self.stats["prompt_tokens"] += prompt_tokens
+        self.stats["cached_tokens"] += cached_tokens
+
+        await asyncio.sleep(self.config.chat_latency + completion_tokens / self.config.tokens_per_second)
+
+        rooms = [{"number": number, "name": name.strip()} for number, name in ROOM_PATTERN.findall(user_text)]
+        payload: Dict[str, Any] = {
+            "metadata": {"source": "fake-openai", "prompt_tokens": prompt_tokens},
+            "rooms": list({room["number"]: room for room in rooms}.values()),
+        }
+        padding = completion_tokens * CHARS_PER_TOKEN - len(json.dumps(payload))
+        payload["notes"] = "x" * max(0, padding)
+
+        return web.json_response({
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4o-mini"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": json.dumps(payload)},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": cached_tokens}
+            }
+        })
+
+    async def _di_analyze(self, request: web.Request) -> web.Response:
+        self.stats["di_requests"] += 1
+        limited = self._rate_limited()
+        if limited:
+            self.stats["di_rate_limited"] += 1
+            return limited
+
+        pdf_bytes = await request.read()
+        filetype = request.content_type.split("/")[-1] if request.content_type.startswith("image/") else "pdf"
+        self.stats["di_bytes"] += len(pdf_bytes)
+        try:
+            result = await asyncio.to_thread(build_analyze_result, pdf_bytes, filetype)
+        except Exception as e:
+            return web.json_response({"error": {"code": "InvalidContent", "message": str(e)}}, status=400)
+
+        operation_id = uuid.uuid4().hex
+        ready_in = self.config.di_latency + self.config.di_seconds_per_page * len(result["pages"])
+        self._operations[operation_id] = {"ready_at": time.monotonic() + ready_in, "result": result}
+        model_id = request.match_info["model_id"]
+        location = (
+            f"{self.base_url}/documentintelligence/documentModels/{model_id}/analyzeResults/{operation_id}"
+            f"?api-version={request.query.get('api-version', '')}"
+        )
+        return web.Response(status=202, headers={
+            "Operation-Location": location,
+            "retry-after-ms": str(self.config.di_poll_interval_ms)
+        })
+
+    async def _di_result(self, request: web.Request) -> web.Response:
+        self.stats["di_polls"] += 1
+        operation = self._operations.get(request.match_info["operation_id"])
+        if operation is None:
+            return web.json_response({"error": {"code": "NotFound", "message": "Unknown operation"}}, status=404)
+
+        headers = {"retry-after-ms": str(self.config.di_poll_interval_ms)}
+        if time.monotonic() < operation["ready_at"]:
+            return web.json_response({"status": "running"}, headers=headers)
+        return web.json_response({"status": "succeeded", "analyzeResult": operation["result"]}, headers=headers)
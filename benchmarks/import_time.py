@@ -0,0 +1,94 @@
+"""
+Import-time benchmark of the CLI entry point.
+
+Imports a module in fresh interpreters with -X importtime and reports the
+median total, the slowest top-level imports and which heavy SDKs were
+loaded. A plain `import main` (what every `python main.py` run pays before
+it reads its arguments) should load neither the OpenAI nor the Azure SDK.
+
+Usage:
+    python -m benchmarks.import_time --runs 5
+    python -m benchmarks.import_time --module utils.pdf_processor
+"""
+import re
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+# SDKs only some stages need; loading them at startup is a regression
+HEAVY_MODULES = ("openai", "azure", "tqdm", "httpx", "aiohttp")
+IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def _import_once(module: str) -> Tuple[List[Tuple[int, int, str]], List[str]]:
+    """(depth, cumulative us, name) rows and the heavy packages loaded for one fresh import."""
+    code = (
+        f"import sys, json; import {module}; "
+        f"print(json.dumps(sorted({{m.split('.')[0] for m in sys.modules}} & set({HEAVY_MODULES!r}))))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            rows.append((len(match.group(3)) // 2, int(match.group(2)), match.group(4)))
+    return rows, json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def measure_import(module: str = "main", runs: int = 5) -> Dict[str, Any]:
+    """Median import time of module over fresh interpreters, with its slowest direct imports."""
+    totals = []
+    children: Dict[str, List[int]] = {}
+    heavy: List[str] = []
+    for _ in range(runs):
+        rows, heavy = _import_once(module)
+        index = max(i for i, row in enumerate(rows) if row[2] == module)
+        depth, total, _ = rows[index]
+        totals.append(total)
+        # -X importtime lists a module after its imports, one level deeper
+        for child_depth, cumulative, name in reversed(rows[:index]):
+            if child_depth <= depth:
+                break
+            if child_depth == depth + 1:
+                children.setdefault(name, []).append(cumulative)
+    slowest = sorted(((statistics.median(values), name) for name, values in children.items()), reverse=True)[:10]
+    return {
+        "module": module,
+        "runs": runs,
+        "median_ms": round(statistics.median(totals) / 1000, 1),
+        "slowest_imports_ms": {name: round(value / 1000, 1) for value, name in slowest},
+        "heavy_modules_loaded": heavy,
+    }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [
+        f"import {report['module']}: {report['median_ms']} ms (median of {report['runs']} runs)",
+        "Heavy SDKs loaded: " + (", ".join(report["heavy_modules_loaded"]) or "none"),
+        "Slowest imports:",
+    ]
+    lines.extend(f"  {name:<32} {ms:>8.1f} ms" for name, ms in report["slowest_imports_ms"].items())
+    return "\n".join(lines)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Import-time benchmark of the CLI entry point")
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", type=Path, help="Also write the report as JSON to this path")
+    args = parser.parse_args(argv)
+    report = measure_import(args.module, args.runs)
+    print(format_report(report))
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
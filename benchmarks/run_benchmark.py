@@ -0,0 +1,161 @@
+"""
+Offline end-to-end benchmark of main.process_job_site_async.
+
+Generates a synthetic corpus, points the OpenAI and Azure SDKs at local fake
+services and reports throughput and latency.
+
+Usage:
+    python -m benchmarks.run_benchmark --dense-plans 6 --chat-latency 0.5 --rate-limit-probability 0.05
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Any, Dict
+
+# Allow running as a script from the repository root
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.fake_services import FakeServices, FakeServiceConfig
+
+
+def _counter_snapshot() -> Dict[str, float]:
+    from utils.metrics import (
+        API_RESPONSES, INPUT_TOKENS, CACHED_INPUT_TOKENS, OUTPUT_TOKENS, DI_FALLBACKS, FILES_PROCESSED, PAGES_PROCESSED
+    )
+    return {
+        "files_succeeded": FILES_PROCESSED.value(status="success"),
+        "files_failed": FILES_PROCESSED.value(status="failure"),
+        "pages": PAGES_PROCESSED.total(),
+        "input_tokens": INPUT_TOKENS.total(),
+        "cached_input_tokens": CACHED_INPUT_TOKENS.total(),
+        "output_tokens": OUTPUT_TOKENS.total(),
+        "api_responses": API_RESPONSES.total(),
+        "api_429_responses": API_RESPONSES.value(status="429"),
+        "di_fallbacks": DI_FALLBACKS.total(),
+    }
+
+
+async def run_benchmark(workdir: Path, config: FakeServiceConfig, panel_schedules: int = 2,
+                        room_schedules: int = 2, dense_plans: int = 4, pages: int = 2) -> Dict[str, Any]:
+    """
+    Run one benchmark job in workdir and return the report.
+    """
+    services = FakeServices(config)
+    await services.start()
+    os.environ.update(services.environment())
+
+    # Imported after the environment points at the fake services
+    import main
+    from utils.tracing import tracer
+
+    job_folder = workdir / "job"
+    output_folder = workdir / "output"
+    corpus = await asyncio.to_thread(
+        generate_corpus, job_folder, panel_schedules, room_schedules, dense_plans, pages, config.seed
+    )
+
+    before = _counter_snapshot()
+    start = time.perf_counter()
+    try:
+        await main.process_job_site_async(job_folder, output_folder)
+    finally:
+        await services.stop()
+    wall_seconds = time.perf_counter() - start
+    after = _counter_snapshot()
+
+    counters = {key: after[key] - before[key] for key in after}
+    stages = tracer.summary()
+    per_file = stages.get("process_file", {})
+    minutes = wall_seconds / 60
+
+    return {
+        "corpus": {kind: len(paths) for kind, paths in corpus.items()},
+        "pages_per_file": pages,
+        "fake_services": vars(config),
+        "wall_seconds": round(wall_seconds, 3),
+        "files_per_minute": round((counters["files_succeeded"] + counters["files_failed"]) / minutes, 2),
+        "pages_per_minute": round(counters["pages"] / minutes, 2),
+        "file_latency_p50_seconds": round(per_file.get("p50", 0.0), 3),
+        "file_latency_p95_seconds": round(per_file.get("p95", 0.0), 3),
+        "counters": counters,
+        "service_stats": services.stats,
+        "stages": {
+            name: {key: round(value, 4) for key, value in stats.items()}
+            for name, stats in stages.items()
+        },
+    }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    counters = report["counters"]
+    lines = [
+        f"Corpus: {report['corpus']} ({report['pages_per_file']} pages per file)",
+        f"Wall time: {report['wall_seconds']:.2f}s",
+        f"Throughput: {report['files_per_minute']:.1f} files/min, {report['pages_per_minute']:.1f} pages/min",
+        f"File latency: p50 {report['file_latency_p50_seconds']:.2f}s, p95 {report['file_latency_p95_seconds']:.2f}s",
+        f"Files: {counters['files_succeeded']:g} succeeded, {counters['files_failed']:g} failed; "
+        f"DI fallbacks: {counters['di_fallbacks']:g}",
+        f"Tokens: {counters['input_tokens']:g} in ({counters['cached_input_tokens']:g} cached), "
+        f"{counters['output_tokens']:g} out; "
+        f"429 responses: {counters['api_429_responses']:g} of {counters['api_responses']:g}",
+        "",
+        f"{'stage':<24}{'count':>8}{'total s':>11}{'p50 ms':>11}{'p95 ms':>11}",
+    ]
+    for name, stats in sorted(report["stages"].items(), key=lambda item: item[1]["total"], reverse=True):
+        lines.append(
+            f"{name:<24}{stats['count']:>8g}{stats['total']:>11.2f}"
+            f"{stats['p50'] * 1000:>11.1f}{stats['p95'] * 1000:>11.1f}"
+        )
+    return "\n".join(lines)
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    defaults = FakeServiceConfig()
+    parser = argparse.ArgumentParser(description="Offline benchmark of the drawing pipeline")
+    parser.add_argument("--panel-schedules", type=int, default=2)
+    parser.add_argument("--room-schedules", type=int, default=2)
+    parser.add_argument("--dense-plans", type=int, default=4)
+    parser.add_argument("--pages", type=int, default=2, help="Pages per generated file")
+    parser.add_argument("--chat-latency", type=float, default=defaults.chat_latency)
+    parser.add_argument("--tokens-per-second", type=float, default=defaults.tokens_per_second)
+    parser.add_argument("--rate-limit-probability", type=float, default=defaults.rate_limit_probability)
+    parser.add_argument("--di-latency", type=float, default=defaults.di_latency)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--workdir", type=Path, help="Keep corpus and output here instead of a temp folder")
+    parser.add_argument("--json", type=Path, help="Also write the report as JSON to this path")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    config = FakeServiceConfig(
+        chat_latency=args.chat_latency,
+        tokens_per_second=args.tokens_per_second,
+        rate_limit_probability=args.rate_limit_probability,
+        di_latency=args.di_latency,
+        seed=args.seed,
+    )
+    counts = (args.panel_schedules, args.room_schedules, args.dense_plans, args.pages)
+
+    if args.workdir:
+        args.workdir.mkdir(parents=True, exist_ok=True)
+        report = asyncio.run(run_benchmark(args.workdir, config, *counts))
+    else:
+        with tempfile.TemporaryDirectory(prefix="ohmni-bench-") as tmp:
+            report = asyncio.run(run_benchmark(Path(tmp), config, *counts))
+
+    print(format_report(report))
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -16,4 +16,61 @@ SUPPORTED_FILE_TYPES = [".pdf"]
 PANEL_SCHEDULE_PATTERNS = [
     "-PANEL-SCHEDULES-",
     "-ELECTRICAL-SCHEDULES-"
-]
\ No newline at end of file
+]
+# Read the first page of files named as panel schedules before sending them to Document Intelligence
+CLASSIFIER_CONFIRM_CONTENT = os.getenv("CLASSIFIER_CONFIRM_CONTENT", "true").lower() == "true"
+
+# Scheduling Settings
+SCHEDULING_POLICY = os.getenv("SCHEDULING_POLICY", "longest_first")  # or "fifo"
+PRIORITIZE_PANEL_SCHEDULES = os.getenv("PRIORITIZE_PANEL_SCHEDULES", "false").lower() == "true"
+
+# Metrics Settings
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # 0 disables the /metrics endpoint
+METRICS_DUMP_INTERVAL = float(os.getenv("METRICS_DUMP_INTERVAL", "15"))  # seconds between logs/metrics.prom writes
+
+# Extraction Settings
+# Upper bound on content extracted from one file for the model (~1M tokens, far above its context).
+# Pages past it are left out of the content, which says so; they are still added to the text index.
+# MAX_EXTRACTED_CHARS_PER_WORKER is its former name, still read when the new one is unset.
+MAX_EXTRACTED_CHARS_PER_FILE = int(
+    os.getenv("MAX_EXTRACTED_CHARS_PER_FILE", os.getenv("MAX_EXTRACTED_CHARS_PER_WORKER", "4000000"))
+)
+# Run find_tables only on regions a ruling/text-grid pre-pass marks as likely tables
+SELECTIVE_TABLE_DETECTION = os.getenv("SELECTIVE_TABLE_DETECTION", "true").lower() == "true"
+
+# OCR Settings (scanned pages, read locally with Tesseract through PyMuPDF)
+OCR_ENABLED = os.getenv("OCR_ENABLED", "true").lower() == "true"
+OCR_DPI = int(os.getenv("OCR_DPI", "300"))
+OCR_LANGUAGE = os.getenv("OCR_LANGUAGE", "eng")
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(max(1, min(4, (os.cpu_count() or 2) - 1)))))  # OCR processes
+OCR_CACHE_DIR = os.getenv("OCR_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".ohmni", "ocr_cache"))
+
+# Large Drawing Settings (files above MAX_FILE_SIZE sent to Document Intelligence)
+LARGE_DRAWING_CONCURRENCY = int(os.getenv("LARGE_DRAWING_CONCURRENCY", "3"))  # parts analyzed at once
+LARGE_PAGE_TILE_DPI = int(os.getenv("LARGE_PAGE_TILE_DPI", "150"))  # resolution for pages split into image tiles
+
+# Files up to this size are read once into a buffer shared by hashing, PyMuPDF and the DI upload
+SHARED_BUFFER_MAX_BYTES = int(os.getenv("SHARED_BUFFER_MAX_BYTES", str(MAX_FILE_SIZE)))
+
+# Batch Mode Settings (python main.py <input> [output] --batch)
+BATCH_COMPLETION_WINDOW = os.getenv("BATCH_COMPLETION_WINDOW", "24h")
+BATCH_POLL_INTERVAL = float(os.getenv("BATCH_POLL_INTERVAL", "60"))  # seconds between batch status checks
+MAX_BATCH_REQUESTS = int(os.getenv("MAX_BATCH_REQUESTS", "50000"))  # Batch API limit per input file
+MAX_BATCH_BYTES = int(os.getenv("MAX_BATCH_BYTES", str(190 * 1024 * 1024)))  # under the 200 MB input file limit
+
+# Estimate Settings (python main.py <input> [output] --estimate)
+# Correction factors learned from jobs that were estimated before they ran
+ESTIMATE_CALIBRATION_FILE = os.getenv(
+    "ESTIMATE_CALIBRATION_FILE", os.path.join(os.path.expanduser("~"), ".ohmni", "estimate_calibration.json")
+)
+
+# Logging Settings (JSON lines in <output>/logs, written by a background thread)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Share of span records kept per stage, e.g. "get_text=0.1,find_tables=0.1"; unlisted stages keep all
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "get_text=0.1,find_tables=0.1,text_index=0.1,ocr=0.25")
+LOG_PAYLOAD_MAX_CHARS = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "2000"))  # raw responses and other payloads
+LOG_MESSAGE_MAX_CHARS = int(os.getenv("LOG_MESSAGE_MAX_CHARS", "16000"))  # any single record
+
+# Progress Settings (one job-level progress line on stderr)
+PROGRESS_REFRESH_INTERVAL = float(os.getenv("PROGRESS_REFRESH_INTERVAL", "0.5"))  # seconds between terminal redraws
+PROGRESS_SUMMARY_INTERVAL = float(os.getenv("PROGRESS_SUMMARY_INTERVAL", "30"))  # seconds between lines when not a terminal
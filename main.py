@@ -8,20 +8,47 @@ import time
 import logging
 import os
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import TYPE_CHECKING, Dict, List, Any, Optional
 
-# Third-party imports
-from openai import AsyncOpenAI
-from tqdm.asyncio import tqdm
+# Third-party imports (the OpenAI and Azure SDKs are imported by the stages that use them)
 import aiofiles
 from dotenv import load_dotenv
 
 # Local application imports
-from templates.room_templates import process_architectural_drawing
-from utils.pdf_processor import extract_text_and_tables_from_pdf
+from templates.room_templates import RoomRegistry, process_architectural_drawing
+from utils.pdf_processor import extract_text_and_tables_from_pdf, index_pdf_text
+from utils.pdf_thread import run_pdf_task
+from utils.ocr import shutdown_ocr_pool
+from utils.title_block import TitleBlockLocator, format_title_block, merge_title_block, sheet_key
+from utils.sheet_index import SheetIndex, load_sheet_index
+from utils.document_handle import PdfDocumentHandle
+from utils.panel_analytics import write_panel_report
+from utils.job_index import JobIndex, JOB_INDEX_FILENAME
+from utils.text_index import TextIndex, TEXT_INDEX_FILENAME, format_results
+from utils.estimator import estimate_job, save_estimate, format_estimate, job_totals, calibrate_from_job
+from utils.batch_mode import (
+    BatchJobState, BatchRequestWriter, BatchResult, OpenAIBatchProcessor, wait_for_batch
+)
 from utils.drawing_processor import DrawingProcessor
+from utils.prompts import PromptBuilder
 from utils.document_processor import DocumentProcessor
-from utils.common_utils import is_panel_schedule_file
+from utils.classifier import classifier, get_drawing_type, is_panel_schedule_file
+from utils.scheduler import JobQueue, estimate_cost
+from utils.file_utils import discover_pdf_files
+from utils.tracing import Span, tracer
+from utils.log_pipeline import start_logging, log_span, cap_payload
+from utils.progress import JobProgress
+from utils.metrics import (
+    metrics, record_span, record_http_response, start_metrics_server, dump_metrics_periodically,
+    prompt_cache_hit_rate, FILES_PROCESSED, PAGES_PROCESSED, INPUT_TOKENS, CACHED_INPUT_TOKENS, OUTPUT_TOKENS,
+    DI_FALLBACKS, FILES_IN_FLIGHT, QUEUE_DEPTH
+)
+from config.settings import (
+    SCHEDULING_POLICY, PRIORITIZE_PANEL_SCHEDULES, METRICS_PORT, METRICS_DUMP_INTERVAL
+)
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
 
 # Suppress pdfminer debug output
 logging.getLogger('pdfminer').setLevel(logging.ERROR)
@@ -31,40 +58,22 @@ MAX_RETRIES = 3
 RETRY_DELAY = 5  # seconds
 API_RATE_LIMIT = 60  # Adjust if needed
 TIME_WINDOW = 60  # Time window to respect the rate limit
-BATCH_SIZE = 10  # Batch size for processing
-
-drawing_types = {
-    'Architectural': ['A', 'AD'],
-    'Electrical': ['E', 'ED'],
-    'Mechanical': ['M', 'MD'],
-    'Plumbing': ['P', 'PD'],
-    'Site': ['S', 'SD'],
-    'Civil': ['C', 'CD'],
-    'Low Voltage': ['LV', 'LD'],
-    'Fire Alarm': ['FA', 'FD'],
-    'Kitchen': ['K', 'KD']
-}
+MAX_CONCURRENT_FILES = 5  # Files processed concurrently
 
 def setup_logging(output_folder: Path) -> None:
-    log_folder = output_folder / 'logs'
-    log_folder.mkdir(parents=True, exist_ok=True)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    log_file = log_folder / f"process_log_{timestamp}.txt"
-    logging.basicConfig(
-        filename=str(log_file),
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s'
-    )
+    # JSON lines written by a background thread, so logging never blocks the event loop
+    log_file = start_logging(output_folder / 'logs')
     print(f"Logging to: {log_file}")
 
-def get_drawing_type(filename: Path) -> str:
-    prefix = filename.stem[:2].upper()
-    for dtype, prefixes in drawing_types.items():
-        if any(prefix.startswith(p.upper()) for p in prefixes):
-            return dtype
-    return 'General'
+def create_openai_client() -> "AsyncOpenAI":
+    """OpenAI client for a job; importing the SDK is left to the runs that call the API."""
+    from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+    # Count every API response, including 429s retried inside the SDK
+    return AsyncOpenAI(
+        http_client=DefaultAsyncHttpxClient(event_hooks={"response": [record_http_response]})
+    )
 
-async def async_safe_api_call(client: AsyncOpenAI, *args: Any, **kwargs: Any) -> Any:
+async def async_safe_api_call(client: "AsyncOpenAI", *args: Any, **kwargs: Any) -> Any:
     """
     Make an API call with retry logic and exponential backoff.
     
@@ -89,7 +98,8 @@ async def async_safe_api_call(client: AsyncOpenAI, *args: Any, **kwargs: Any) ->
                 logging.warning(f"Rate limit hit, retrying in {delay} seconds...")
                 retries += 1
                 delay = min(delay * 2, 60)  # Exponential backoff, with a max delay cap
-                await asyncio.sleep(delay + random.uniform(0, 1))  # Adding jitter
+                with tracer.span("rate_limit_sleep"):
+                    await asyncio.sleep(delay + random.uniform(0, 1))  # Adding jitter
             else:
                 logging.error(f"API call failed: {e}")
                 await asyncio.sleep(RETRY_DELAY)
@@ -97,9 +107,141 @@ async def async_safe_api_call(client: AsyncOpenAI, *args: Any, **kwargs: Any) ->
     logging.error("Max retries reached for API call")
     raise Exception("Failed to make API call after maximum retries")
 
-async def process_pdf_async(pdf_path: Path, client: AsyncOpenAI, output_folder: Path, 
+async def extract_drawing_async(pdf_path: Path, processor: DrawingProcessor,
+                                text_index: Optional[TextIndex] = None, file_span: Optional[Span] = None,
+                                title_blocks: Optional[TitleBlockLocator] = None,
+                                is_panel_schedule: Optional[bool] = None) -> Any:
+    """
+    Extract the text and tables of one PDF: Document Intelligence for panel
+    schedules (falling back to PyMuPDF), PyMuPDF for everything else.
+    
+    The file's hash is recorded on file_span (its process_file span) when given.
+    With title_blocks, the title block fields are read locally and sent
+    ahead of the content, so the model doesn't have to find them.
+    is_panel_schedule is the routing decided at discovery (from the sheet
+    index); without it the file name decides. Either way the classifier
+    confirms a panel schedule from its first page before it goes to
+    Document Intelligence.
+    """
+    if is_panel_schedule is None:
+        is_panel_schedule = is_panel_schedule_file(str(pdf_path))
+    title_block: Dict[str, str] = {}
+    # Map the file once; hashing, PyMuPDF and the DI upload share the buffer
+    async with await PdfDocumentHandle.open_async(pdf_path) as handle:
+        sha256 = await asyncio.to_thread(handle.sha256)
+        if file_span is not None:
+            file_span.set(sha256=sha256)
+        if title_blocks is not None:
+            with tracer.span("title_block") as span:
+                title_block = await run_pdf_task(title_blocks.read, handle)
+                span.set(fields=len(title_block))
+            if file_span is not None and title_block:
+                file_span.set(sheet=sheet_key(title_block))
+        if is_panel_schedule and classifier.confirm_content:
+            with tracer.span("classify") as span:
+                is_panel_schedule = await run_pdf_task(classifier.confirm_panel_schedule, handle, sha256)
+                span.set(panel_schedule=is_panel_schedule)
+        
+        # Try Azure Document Intelligence first
+        if is_panel_schedule:
+            logging.info(f"Panel schedule detected, using Document Intelligence: {pdf_path}")
+            try:
+                with tracer.span("extract", method="document_intelligence"):
+                    raw_content = await processor.process_drawing(pdf_path, handle, is_panel_schedule=True)
+            except Exception as e:
+                logging.error(f"Document Intelligence failed for panel schedule: {str(e)}")
+                DI_FALLBACKS.inc()
+                with tracer.span("extract", method="pymupdf_fallback"):
+                    raw_content = await extract_text_and_tables_from_pdf(pdf_path, handle, text_index)
+            else:
+                if text_index is not None:
+                    await index_pdf_text(pdf_path, text_index, handle)
+        else:
+            logging.info(f"Using PyMuPDF for standard processing: {pdf_path}")
+            with tracer.span("extract", method="pymupdf"):
+                raw_content = await extract_text_and_tables_from_pdf(pdf_path, handle, text_index)
+    if title_block:
+        if isinstance(raw_content, dict):
+            raw_content = {"title_block": title_block, **raw_content}
+        else:
+            raw_content = format_title_block(title_block) + raw_content
+    return raw_content
+
+async def save_structured_output(pdf_path: Path, structured_json: str, output_folder: Path,
+                                 drawing_type: str, templates_created: Dict[str, bool],
+                                 job_index: Optional[JobIndex] = None,
+                                 room_registry: Optional[RoomRegistry] = None,
+                                 title_blocks: Optional[TitleBlockLocator] = None) -> Dict[str, Any]:
+    """
+    Write the model's structured JSON for one drawing and feed it to the job
+    index and room templates. Unparseable responses are saved as raw text.
+    Title block fields read by title_blocks are merged into its metadata.
+    """
+    # Create subdirectory for the drawing type
+    type_folder = output_folder / drawing_type
+    type_folder.mkdir(parents=True, exist_ok=True)
+    
+    try:
+        parsed_json = json.loads(structured_json)
+    except json.JSONDecodeError as e:
+        logging.error(f"JSON parsing error for {pdf_path}: {str(e)}")
+        # The full response is saved below; the log only gets its start
+        logging.info(f"Raw API response ({len(structured_json)} chars): {cap_payload(structured_json)}")
+        raw_output_filename = f"{pdf_path.stem}_raw_response.json"
+        raw_output_path = type_folder / raw_output_filename
+        
+        async with aiofiles.open(raw_output_path, 'w') as f:
+            await f.write(structured_json)
+            
+        logging.warning(f"Saved raw API response to {raw_output_path}")
+        return {"success": False, "error": "Failed to parse JSON", "file": str(pdf_path)}
+    
+    if title_blocks is not None:
+        # A resumed batch job hasn't read this file's title block yet
+        title_block = title_blocks.fields(pdf_path) or await run_pdf_task(title_blocks.read, str(pdf_path))
+        merge_title_block(parsed_json, title_block, title_blocks.labelled(pdf_path))
+    
+    output_filename = f"{pdf_path.stem}_structured.json"
+    output_path = type_folder / output_filename
+    
+    with tracer.span("write_json") as span:
+        output_text = json.dumps(parsed_json, indent=2)
+        async with aiofiles.open(output_path, 'w') as f:
+            await f.write(output_text)
+        span.set(bytes=len(output_text))
+    
+    logging.info(f"Successfully processed and saved: {output_path}")
+    
+    if job_index is not None:
+        try:
+            with tracer.span("index_sheet"):
+                await asyncio.to_thread(
+                    job_index.index_sheet, pdf_path, drawing_type, parsed_json, output_path
+                )
+        except Exception as e:
+            logging.error(f"Failed to index {output_path}: {str(e)}")
+    
+    if room_registry is not None:
+        with tracer.span("room_templates"):
+            rooms = room_registry.add(parsed_json, drawing_type, str(pdf_path))
+        if drawing_type == 'Architectural':
+            templates_created['floor_plan'] = True
+        logging.info(f"Merged {rooms} rooms from {pdf_path.name} into the room registry")
+    elif drawing_type == 'Architectural':
+        with tracer.span("room_templates"):
+            result = process_architectural_drawing(parsed_json, str(pdf_path), str(type_folder))
+        templates_created['floor_plan'] = True
+        logging.info(f"Created room templates: {result}")
+    
+    return {"success": True, "file": str(output_path)}
+
+async def process_pdf_async(pdf_path: Path, client: "AsyncOpenAI", output_folder: Path, 
                           drawing_type: str, templates_created: Dict[str, bool],
-                          processor: DrawingProcessor) -> Dict[str, Any]:
+                          processor: DrawingProcessor, job_index: Optional[JobIndex] = None,
+                          text_index: Optional[TextIndex] = None,
+                          room_registry: Optional[RoomRegistry] = None,
+                          title_blocks: Optional[TitleBlockLocator] = None,
+                          is_panel_schedule: Optional[bool] = None) -> Dict[str, Any]:
     """
     Process a single PDF file asynchronously.
     
@@ -110,153 +252,373 @@ async def process_pdf_async(pdf_path: Path, client: AsyncOpenAI, output_folder:
         drawing_type: Type of drawing being processed
         templates_created: Dictionary tracking created templates
         processor: Shared DrawingProcessor instance for document processing
+        job_index: Job-wide SQLite index the structured output is added to
+        text_index: Full-text index the drawing's text lines are added to
+        room_registry: Job-wide room model the drawing's rooms are merged into;
+            without one, architectural room files are written per drawing
+        title_blocks: Job-wide title block locator supplying the drawing's metadata
+        is_panel_schedule: Document Intelligence routing decided at discovery
     """
-    with tqdm(total=100, desc=f"Processing {pdf_path.name}") as pbar:
+    with tracer.file_context(str(pdf_path)), \
+            tracer.span("process_file", drawing_type=drawing_type) as file_span:
         try:
-            # Create subdirectory for the drawing type
-            type_folder = output_folder / drawing_type
-            type_folder.mkdir(parents=True, exist_ok=True)
-            
-            # Get file content
-            raw_content = None
-            
-            # Try Azure Document Intelligence first
-            if is_panel_schedule_file(str(pdf_path)):
-                logging.info(f"Panel schedule detected, using Document Intelligence: {pdf_path}")
-                try:
-                    raw_content = await processor.process_drawing(pdf_path)
-                except Exception as e:
-                    logging.error(f"Document Intelligence failed for panel schedule: {str(e)}")
-                    raw_content = await extract_text_and_tables_from_pdf(pdf_path)
-            else:
-                logging.info(f"Using PyMuPDF for standard processing: {pdf_path}")
-                raw_content = await extract_text_and_tables_from_pdf(pdf_path)
-            
-            pbar.update(20)  # Text and tables extracted
+            raw_content = await extract_drawing_async(
+                pdf_path, processor, text_index, file_span, title_blocks, is_panel_schedule
+            )
             structured_json = await processor.analyze_document(raw_content, drawing_type, client)
-            pbar.update(40)  # API call completed
             
-            try:
-                parsed_json = json.loads(structured_json)
-                output_filename = f"{pdf_path.stem}_structured.json"
-                output_path = type_folder / output_filename
-                
-                async with aiofiles.open(output_path, 'w') as f:
-                    await f.write(json.dumps(parsed_json, indent=2))
-                
-                pbar.update(20)  # JSON saved
-                logging.info(f"Successfully processed and saved: {output_path}")
-                
-                if drawing_type == 'Architectural':
-                    result = process_architectural_drawing(parsed_json, str(pdf_path), str(type_folder))
-                    templates_created['floor_plan'] = True
-                    logging.info(f"Created room templates: {result}")
-                
-                pbar.update(10)  # Processing completed
-                return {"success": True, "file": str(output_path)}
-                
-            except json.JSONDecodeError as e:
-                pbar.update(100)  # Ensure bar completes on error
-                logging.error(f"JSON parsing error for {pdf_path}: {str(e)}")
-                logging.info(f"Raw API response: {structured_json}")
-                raw_output_filename = f"{pdf_path.stem}_raw_response.json"
-                raw_output_path = type_folder / raw_output_filename
-                
-                async with aiofiles.open(raw_output_path, 'w') as f:
-                    await f.write(structured_json)
-                    
-                logging.warning(f"Saved raw API response to {raw_output_path}")
-                return {"success": False, "error": "Failed to parse JSON", "file": str(pdf_path)}
+            result = await save_structured_output(
+                pdf_path, structured_json, output_folder, drawing_type, templates_created,
+                job_index, room_registry, title_blocks
+            )
+            if not result['success']:
+                file_span.set(error="invalid_json")
+            return result
                 
         except Exception as e:
-            pbar.update(100)  # Ensure bar completes on error
+            file_span.set(error=type(e).__name__)
             logging.error(f"Error processing {pdf_path}: {str(e)}")
             return {"success": False, "error": str(e), "file": str(pdf_path)}
 
-async def process_batch_async(batch: List[Path], client: AsyncOpenAI, 
-                            output_folder: Path, templates_created: Dict[str, bool]) -> List[Dict[str, Any]]:
+async def process_queue_async(queue: JobQueue, client: "AsyncOpenAI", output_folder: Path,
+                              templates_created: Dict[str, bool],
+                              progress: JobProgress,
+                              job_index: Optional[JobIndex] = None,
+                              text_index: Optional[TextIndex] = None,
+                              room_registry: Optional[RoomRegistry] = None,
+                              prompts: Optional[PromptBuilder] = None,
+                              title_blocks: Optional[TitleBlockLocator] = None) -> List[Dict[str, Any]]:
     """
-    Process a batch of PDF files asynchronously.
+    Process files from the job queue with a fixed pool of workers.
+    
+    Workers start as soon as the first file is queued and keep pulling the
+    highest-priority file until discovery is finished and the queue is drained.
     """
-    tasks = []
     start_time = time.time()
-    semaphore = asyncio.Semaphore(5)  # Limit concurrent operations
-    
-    # Initialize processor once for the batch
-    processor = DrawingProcessor()
-    
-    async def bounded_process(pdf_file: Path) -> Dict[str, Any]:
-        async with semaphore:
-            drawing_type = get_drawing_type(pdf_file)
-            return await process_pdf_async(
-                pdf_file, 
-                client, 
-                output_folder, 
-                drawing_type, 
-                templates_created,
-                processor  # Pass the shared processor instance
-            )
-
-    # Create tasks with bounded concurrency
-    tasks = [bounded_process(pdf_file) for pdf_file in batch]
-    
-    # Process with existing rate limiting
     results = []
-    for task in asyncio.as_completed(tasks):
-        result = await task
-        results.append(result)
-        
-        # Your existing rate limiting logic
-        if len(results) % API_RATE_LIMIT == 0:
-            elapsed = time.time() - start_time
-            if elapsed < TIME_WINDOW:
-                await asyncio.sleep(TIME_WINDOW - elapsed)
-            start_time = time.time()
     
+    # Initialize processor once for the job
+    processor = DrawingProcessor(prompts=prompts)
+    
+    async def worker() -> None:
+        nonlocal start_time
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            QUEUE_DEPTH.set(queue.qsize())
+            started = time.perf_counter()
+            with tracer.file_context(str(item.path)):
+                tracer.record("queue_wait", item.queued_at, started - item.queued_at)
+            FILES_IN_FLIGHT.inc()
+            progress.file_started(item.path)
+            try:
+                result = await process_pdf_async(
+                    item.path,
+                    client,
+                    output_folder,
+                    item.drawing_type,
+                    templates_created,
+                    processor,  # Pass the shared processor instance
+                    job_index,
+                    text_index,
+                    room_registry,
+                    title_blocks,
+                    item.is_panel_schedule
+                )
+            finally:
+                FILES_IN_FLIGHT.dec()
+            results.append(result)
+            progress.file_finished(item.path, result['success'])
+            if result['success']:
+                FILES_PROCESSED.inc(status="success")
+                PAGES_PROCESSED.inc(item.page_count)
+            else:
+                FILES_PROCESSED.inc(status="failure")
+                logging.error(f"Failed to process {result['file']}: {result['error']}")
+            
+            # Existing rate limiting logic
+            if len(results) % API_RATE_LIMIT == 0:
+                elapsed = time.time() - start_time
+                if elapsed < TIME_WINDOW:
+                    with tracer.span("rate_limit_sleep"):
+                        await asyncio.sleep(TIME_WINDOW - elapsed)
+                start_time = time.time()
+    
+    try:
+        await asyncio.gather(*(worker() for _ in range(MAX_CONCURRENT_FILES)))
+    finally:
+        await processor.close()
     return results
 
+async def feed_job_queue(job_folder: Path, queue: JobQueue, progress: JobProgress,
+                         sheet_index: Optional[SheetIndex] = None) -> None:
+    """
+    Stream discovered PDF files into the job queue as the folder walk proceeds.
+    
+    Files are routed by the job's sheet index, or by file name for sheets it doesn't list.
+    """
+    router = (sheet_index or SheetIndex()).router(get_drawing_type, is_panel_schedule_file)
+    try:
+        async for pdf_path, drawing_type, is_panel in discover_pdf_files(
+            job_folder, router.drawing_type, router.is_panel_schedule
+        ):
+            item = await run_pdf_task(estimate_cost, pdf_path, drawing_type, is_panel)
+            queue.put(item)
+            QUEUE_DEPTH.set(queue.qsize())
+            progress.set_total(queue.total_queued)
+    finally:
+        queue.close()
+        logging.info(f"Found {queue.total_queued} PDF files in {job_folder}")
+
+def export_job_trace(output_folder: Path) -> None:
+    """
+    Write the job's Chrome/Perfetto trace and log the per-stage timing summary.
+    """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    trace_path = output_folder / 'logs' / f"trace_{timestamp}.json"
+    try:
+        tracer.export_chrome_trace(trace_path)
+    except OSError as e:
+        logging.error(f"Failed to write trace {trace_path}: {str(e)}")
+    logging.info(f"Stage timings:\n{tracer.format_summary()}")
+
 async def process_job_site_async(job_folder: Path, output_folder: Path) -> None:
     output_folder.mkdir(parents=True, exist_ok=True)
-        
-    pdf_files = [
-        path for path in job_folder.rglob('*.pdf')
-    ]
+    tracer.reset()
+    tracer.add_listener(record_span)
+    tracer.add_listener(log_span)
     
-    logging.info(f"Found {len(pdf_files)} PDF files in {job_folder}")
+    # Live metrics: optional /metrics endpoint plus a periodically rewritten dump file
+    metrics_server = await start_metrics_server(port=METRICS_PORT) if METRICS_PORT else None
+    metrics_path = output_folder / 'logs' / 'metrics.prom'
+    metrics_dump = asyncio.create_task(dump_metrics_periodically(metrics_path, METRICS_DUMP_INTERVAL))
+    
+    templates_created = {"floor_plan": False}
+    client = create_openai_client()
+    
+    # Files are ordered by estimated cost so the largest sets don't start last
+    queue = JobQueue(SCHEDULING_POLICY, PRIORITIZE_PANEL_SCHEDULES)
+    # Rooms, panels, circuits and equipment from each file, queryable once it completes
+    job_index = JobIndex(output_folder / JOB_INDEX_FILENAME)
+    # Drawing text by sheet, page and bounding box for `main.py search`
+    text_index = TextIndex(output_folder / TEXT_INDEX_FILENAME)
+    # Rooms from every discipline, joined per floor and written once at the end
+    room_registry = RoomRegistry()
+    # One prompt prefix for the whole job so every request after the first hits the prompt cache
+    prompts = PromptBuilder({"job": job_folder.name})
+    # Title block region learned from the first sheet with readable labels, then read from every sheet without the LLM
+    title_blocks = TitleBlockLocator()
+    # One job-level progress line, redrawn on a timer rather than per file
+    progress = JobProgress()
+    tracer.add_listener(progress.on_span)
+    job_start = time.time()
+    
+    try:
+        # Discipline and sheet class of every sheet, from the cover sheet's index
+        sheet_index = await load_sheet_index(job_folder)
+        async with progress:
+            discovery = asyncio.create_task(feed_job_queue(job_folder, queue, progress, sheet_index))
+            all_results = await process_queue_async(
+                queue, client, output_folder, templates_created, progress, job_index, text_index,
+                room_registry, prompts, title_blocks
+            )
+            await discovery
+    finally:
+        tracer.remove_listener(progress.on_span)
+        job_index.close()
+        text_index.close()
+        shutdown_ocr_pool()
+        metrics_dump.cancel()
+        metrics.write(metrics_path)
+        if metrics_server:
+            metrics_server.close()
+            await metrics_server.wait_closed()
     
-    if not pdf_files:
+    if not queue.total_queued:
         logging.warning("No PDF files found. Please check the input folder.")
         return
-        
-    templates_created = {"floor_plan": False}
-    total_batches = (len(pdf_files) + BATCH_SIZE - 1) // BATCH_SIZE
-    client = AsyncOpenAI()
-    all_results = []
-    
-    with tqdm(total=len(pdf_files), desc="Overall Progress") as overall_pbar:
-        for i in range(0, len(pdf_files), BATCH_SIZE):
-            batch = pdf_files[i:i+BATCH_SIZE]
-            logging.info(f"Processing batch {i//BATCH_SIZE + 1} of {total_batches}")
-            batch_results = await process_batch_async(batch, client, output_folder, templates_created)
-            all_results.extend(batch_results)
-            
-            successes = [r for r in batch_results if r['success']]
-            failures = [r for r in batch_results if not r['success']]
-            overall_pbar.update(len(batch))
-            
-            logging.info(f"Batch completed. Successes: {len(successes)}, Failures: {len(failures)}")
-            for failure in failures:
-                logging.error(f"Failed to process {failure['file']}: {failure['error']}")
     
+    # A job run after --estimate calibrates the estimator with its actual totals
+    calibration = calibrate_from_job(output_folder, job_totals(tracer.spans, time.time() - job_start))
+    if calibration:
+        logging.info(f"Estimator calibrated from {calibration.jobs} jobs")
+    await finish_job(output_folder, all_results, room_registry, job_start)
+
+async def finish_job(output_folder: Path, all_results: List[Dict[str, Any]],
+                     room_registry: RoomRegistry, job_start: float) -> None:
+    """
+    Log the job summary and write the job-level outputs: room templates,
+    panel load report and trace.
+    """
     successes = [r for r in all_results if r['success']]
     failures = [r for r in all_results if not r['success']]
+    elapsed_minutes = max(time.time() - job_start, 1e-6) / 60
     logging.info(f"Processing complete. Total successes: {len(successes)}, Total failures: {len(failures)}")
+    logging.info(
+        f"Throughput: {len(all_results) / elapsed_minutes:.1f} files/min, "
+        f"{PAGES_PROCESSED.total() / elapsed_minutes:.1f} pages/min"
+    )
+    if INPUT_TOKENS.total():
+        logging.info(
+            f"Prompt cache: {CACHED_INPUT_TOKENS.total():.0f} of {INPUT_TOKENS.total():.0f} input tokens cached "
+            f"({prompt_cache_hit_rate():.1%})"
+        )
+    stats = classifier.stats()
+    logging.info(
+        f"Classifier cache: {stats['name_hits']} name hits, {stats['name_misses']} misses; "
+        f"{stats['content_hits']} content hits, {stats['content_misses']} misses"
+    )
+    
+    if room_registry.floors:
+        try:
+            with tracer.span("room_templates_write"):
+                room_files = await asyncio.to_thread(room_registry.write, str(output_folder / 'Architectural'))
+            logging.info(f"Created room templates: {room_files}")
+        except Exception as e:
+            logging.error(f"Failed to write room templates: {str(e)}")
+    
+    # Job-wide panel loads, phase balance and feeder tree from the structured output
+    try:
+        with tracer.span("panel_analytics"):
+            await asyncio.to_thread(write_panel_report, output_folder)
+    except Exception as e:
+        logging.error(f"Panel load analytics failed: {str(e)}")
+    export_job_trace(output_folder)
     
     if failures:
         logging.warning("Failures:")
         for failure in failures:
             logging.warning(f" {failure['file']}: {failure['error']}")
 
+async def process_job_site_batch_async(job_folder: Path, output_folder: Path,
+                                      batch_processor: Optional[Any] = None) -> None:
+    """
+    Process a job through the OpenAI Batch API instead of live chat calls.
+    
+    Every drawing is extracted as usual and its chat request written to
+    JSONL request files under <output>/batch; the files are submitted as
+    batches, tracked until they finish, and each result goes through the
+    same output, indexing and room template steps as a live run. The
+    request files and each batch id, as soon as it is submitted, are saved
+    in batch_state.json, so a run that is interrupted while submitting or
+    waiting picks the batches up again and only submits the files that
+    weren't yet.
+    
+    Args:
+        job_folder: Folder of drawings to process
+        output_folder: Output directory path
+        batch_processor: OpenAIBatchProcessor (default) or LocalBatchProcessor
+    """
+    output_folder.mkdir(parents=True, exist_ok=True)
+    tracer.reset()
+    tracer.add_listener(record_span)
+    tracer.add_listener(log_span)
+    
+    templates_created = {"floor_plan": False}
+    client = create_openai_client()
+    batch_processor = batch_processor or OpenAIBatchProcessor(client)
+    batch_folder = output_folder / 'batch'
+    state_path = batch_folder / 'batch_state.json'
+    state = BatchJobState.load(state_path)
+    processor = DrawingProcessor(prompts=PromptBuilder({"job": job_folder.name}))
+    job_index = JobIndex(output_folder / JOB_INDEX_FILENAME)
+    text_index = TextIndex(output_folder / TEXT_INDEX_FILENAME)
+    room_registry = RoomRegistry()
+    title_blocks = TitleBlockLocator()
+    job_start = time.time()
+    all_results: List[Dict[str, Any]] = []
+    
+    try:
+        if state and state.request_files and all(Path(path).exists() for path in state.request_files):
+            logging.info(
+                f"Resuming {len(state.batch_ids)} of {len(state.request_files)} submitted batches from {state_path}"
+            )
+        else:
+            state = BatchJobState()
+            semaphore = asyncio.Semaphore(MAX_CONCURRENT_FILES)
+            
+            async def prepare(custom_id: str, pdf_path: Path, drawing_type: str, is_panel: bool) -> None:
+                async with semaphore:
+                    with tracer.file_context(str(pdf_path)), \
+                            tracer.span("process_file", drawing_type=drawing_type, mode="batch") as file_span:
+                        try:
+                            raw_content = await extract_drawing_async(
+                                pdf_path, processor, text_index, file_span, title_blocks, is_panel
+                            )
+                            writer.add(custom_id, processor.chat_request(raw_content, drawing_type))
+                            state.files[custom_id] = (str(pdf_path), drawing_type)
+                        except Exception as e:
+                            logging.error(f"Error preparing {pdf_path} for batch: {str(e)}")
+                            all_results.append({"success": False, "error": str(e), "file": str(pdf_path)})
+            
+            router = (await load_sheet_index(job_folder)).router(get_drawing_type, is_panel_schedule_file)
+            with BatchRequestWriter(batch_folder) as writer:
+                tasks = []
+                async for pdf_path, drawing_type, is_panel in discover_pdf_files(
+                    job_folder, router.drawing_type, router.is_panel_schedule
+                ):
+                    tasks.append(asyncio.create_task(prepare(str(len(tasks)), pdf_path, drawing_type, is_panel)))
+                await asyncio.gather(*tasks)
+            
+            if not tasks:
+                logging.warning("No PDF files found. Please check the input folder.")
+                return
+            
+            state.request_files = [str(path) for path in writer.paths]
+            state.save(state_path)
+        
+        pending = state.request_files[len(state.batch_ids):]
+        if pending:
+            with tracer.span("batch_submit", files=len(pending)):
+                for path in pending:
+                    state.batch_ids.append(await batch_processor.submit(Path(path), {"job": job_folder.name}))
+                    # Recorded before the next submit, so a run that dies here never pays for this batch twice
+                    state.save(state_path)
+            logging.info(f"Submitted {len(pending)} request files; {len(state.batch_ids)} batches in total")
+        
+        with tracer.span("batch_wait", batches=len(state.batch_ids)):
+            statuses = await asyncio.gather(*(wait_for_batch(batch_processor, batch_id) for batch_id in state.batch_ids))
+        
+        results: Dict[str, BatchResult] = {}
+        for status in statuses:
+            if status.status != "completed":
+                logging.error(f"Batch {status.batch_id} ended as {status.status}")
+            results.update(await batch_processor.results(status))
+        
+        # Fan the results back out to the per-file output steps
+        for custom_id, (pdf_path, drawing_type) in state.files.items():
+            pdf_path = Path(pdf_path)
+            result = results.get(custom_id)
+            with tracer.file_context(str(pdf_path)):
+                if result is None or not result.success:
+                    error = result.error if result else "No result in batch output"
+                    logging.error(f"Batch request failed for {pdf_path}: {error}")
+                    file_result = {"success": False, "error": error, "file": str(pdf_path)}
+                else:
+                    INPUT_TOKENS.inc(result.prompt_tokens)
+                    CACHED_INPUT_TOKENS.inc(result.cached_tokens)
+                    OUTPUT_TOKENS.inc(result.completion_tokens)
+                    try:
+                        file_result = await save_structured_output(
+                            pdf_path, result.content, output_folder, drawing_type, templates_created,
+                            job_index, room_registry, title_blocks
+                        )
+                    except Exception as e:
+                        logging.error(f"Error saving batch result for {pdf_path}: {str(e)}")
+                        file_result = {"success": False, "error": str(e), "file": str(pdf_path)}
+            FILES_PROCESSED.inc(status="success" if file_result['success'] else "failure")
+            all_results.append(file_result)
+        state_path.unlink(missing_ok=True)
+    finally:
+        job_index.close()
+        text_index.close()
+        shutdown_ocr_pool()
+        await processor.close()
+        metrics.write(output_folder / 'logs' / 'metrics.prom')
+    
+    await finish_job(output_folder, all_results, room_registry, job_start)
+
 def verify_azure_credentials() -> bool:
     """
     Verify that Azure credentials are properly configured.
@@ -280,13 +642,74 @@ def verify_azure_credentials() -> bool:
         return False
     return True
 
+async def estimate_job_site_async(job_folder: Path, output_folder: Path) -> None:
+    """
+    Print the predicted tokens, Document Intelligence pages, API calls and
+    wall time of a job without calling any API, and keep the estimate for
+    calibration by the real run.
+    """
+    router = (await load_sheet_index(job_folder)).router(get_drawing_type, is_panel_schedule_file)
+    estimate = await estimate_job(
+        job_folder, router.drawing_type, router.is_panel_schedule, MAX_CONCURRENT_FILES, API_RATE_LIMIT, TIME_WINDOW,
+        output_folder, policy=SCHEDULING_POLICY, prioritize_panel_schedules=PRIORITIZE_PANEL_SCHEDULES
+    )
+    print(format_estimate(estimate))
+    estimate_path = save_estimate(estimate, output_folder)
+    logging.info(f"Saved estimate to {estimate_path}")
+
+def search_command(args: List[str]) -> int:
+    """
+    Search the drawing text of a processed job.
+    
+    Usage: python main.py search <output_folder> <query> [--sheet PREFIX] [--limit N] [--fts]
+    """
+    import argparse
+    import sqlite3
+    
+    parser = argparse.ArgumentParser(prog="main.py search", description="Search extracted drawing text")
+    parser.add_argument("output_folder", type=Path, help="Output folder of a processed job")
+    parser.add_argument("query", nargs="+", help='Words to find, e.g. GFCI or "26 05 19"')
+    parser.add_argument("--sheet", help="Only sheets whose number starts with this, e.g. E or E5")
+    parser.add_argument("--limit", type=int, default=50, help="Maximum number of hits (default 50)")
+    parser.add_argument("--fts", action="store_true", help="Pass the query to SQLite FTS5 as-is (AND/OR/NOT, prefix*)")
+    options = parser.parse_args(args)
+    
+    index_path = options.output_folder / TEXT_INDEX_FILENAME
+    if not index_path.exists():
+        print(f"Error: No text index at '{index_path}'. Process the job first.")
+        return 1
+    with TextIndex(index_path) as text_index:
+        start = time.perf_counter()
+        try:
+            results = text_index.search(
+                " ".join(options.query), limit=options.limit, sheet=options.sheet, raw=options.fts
+            )
+        except sqlite3.OperationalError as e:
+            print(f"Error: Invalid search query: {str(e)}")
+            return 1
+        elapsed = time.perf_counter() - start
+    if results:
+        print(format_results(results))
+    print(f"{len(results)} hits in {elapsed * 1000:.0f} ms")
+    return 0
+
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python main.py <input_folder> [output_folder]")
+    if len(sys.argv) > 1 and sys.argv[1] == "search":
+        sys.exit(search_command(sys.argv[2:]))
+    
+    # --batch: submit the job through the Batch API (cheaper, results within 24h)
+    use_batch = "--batch" in sys.argv[1:]
+    # --estimate: predict tokens, API calls and wall time from local stages only
+    estimate_only = "--estimate" in sys.argv[1:]
+    args = [arg for arg in sys.argv[1:] if arg not in ("--batch", "--estimate")]
+    
+    if len(args) < 1:
+        print("Usage: python main.py <input_folder> [output_folder] [--batch | --estimate]")
+        print("       python main.py search <output_folder> <query> [--sheet PREFIX] [--limit N] [--fts]")
         sys.exit(1)
         
-    job_folder = Path(sys.argv[1])
-    output_folder = Path(sys.argv[2]) if len(sys.argv) > 2 else job_folder / "output"
+    job_folder = Path(args[0])
+    output_folder = Path(args[1]) if len(args) > 1 else job_folder / "output"
     
     if not job_folder.exists():
         print(f"Error: Input folder '{job_folder}' does not exist.")
@@ -294,6 +717,10 @@ if __name__ == "__main__":
         
     setup_logging(output_folder)
     
+    if estimate_only:
+        asyncio.run(estimate_job_site_async(job_folder, output_folder))
+        sys.exit(0)
+    
     if not verify_azure_credentials():
         sys.exit(1)
         
@@ -302,4 +729,7 @@ if __name__ == "__main__":
     
     load_dotenv()
     
-    asyncio.run(process_job_site_async(job_folder, output_folder))
+    if use_batch:
+        asyncio.run(process_job_site_batch_async(job_folder, output_folder))
+    else:
+        asyncio.run(process_job_site_async(job_folder, output_folder))
@@ -1,7 +1,21 @@
+import copy
 import json
 import os
+from functools import lru_cache
 
-def load_template(template_name):
+from utils.job_index import (
+    ROOM_LIST, EQUIPMENT_LIST, ROOM_NUMBER_KEYS, ROOM_NAME_KEYS, EQUIPMENT_ROOM_KEYS, EQUIPMENT_TAG_KEYS,
+    iter_lists, normalize_room_number
+)
+from utils.panel_analytics import first_field, DESCRIPTION_KEYS
+
+FLOOR_KEYS = ("floor_number", "floor", "level")
+# Disciplines whose scheduled equipment is listed under a room's mechanical_equipment
+MECHANICAL_TYPES = ("Mechanical", "Plumbing", "Kitchen")
+
+
+@lru_cache(maxsize=None)
+def _read_template(template_name):
     current_dir = os.path.dirname(os.path.abspath(__file__))
     template_path = os.path.join(current_dir, f"{template_name}_template.json")
     try:
@@ -14,67 +28,222 @@ def load_template(template_name):
         print(f"Error decoding JSON from file: {template_path}")
         return {}
 
-def generate_rooms_data(parsed_data, room_type):
-    template = load_template(room_type)
-    
-    metadata = parsed_data.get('metadata', {})
-    
-    rooms_data = {
-        "metadata": metadata,
-        "project_name": metadata.get('project', ''),
-        "floor_number": '',
-        "rooms": []
-    }
-    
-    parsed_rooms = parsed_data.get('rooms', [])
-    
-    if not parsed_rooms:
-        print(f"No rooms found in parsed data for {room_type}.")
-        return rooms_data
+def load_template(template_name):
+    """Return a fresh copy of a room template; each file is read from disk once per process."""
+    return copy.deepcopy(_read_template(template_name))
+
+def _merge_fields(target, fields):
+    """Fill target from fields: nested dicts merge, lists extend, empty values are replaced."""
+    for key, value in fields.items():
+        current = target.get(key)
+        if isinstance(current, dict) and isinstance(value, dict):
+            _merge_fields(current, value)
+        elif isinstance(current, list) and isinstance(value, list):
+            current.extend(item for item in value if item not in current)
+        elif current in (None, '', 0, [], {}):
+            target[key] = copy.deepcopy(value)
+
+class RoomRegistry:
+    """
+    Job-wide room model merged across disciplines.
+
+    Rooms are held per floor in a dict keyed by normalized room number, so
+    each structured drawing is merged in one pass over its room lists no
+    matter which discipline or order the sheets arrive in. Architectural
+    sheets own room names and their fields; other disciplines fill in the
+    electrical record (and mechanical equipment located in the room).
+    Nothing is written until write(), once per floor.
+
+    Usage:
+        registry = RoomRegistry()
+        registry.add(parsed_json, 'Architectural', 'A1.01.pdf')
+        registry.add(parsed_json, 'Mechanical', 'M1.01.pdf')
+        registry.write(output_folder)
+    """
+
+    def __init__(self):
+        # floor -> room key -> {"a": a_rooms record, "e": e_rooms record, "sources": [...]}
+        self.floors = {}
+        self.floor_metadata = {}
+        self._architectural_floors = set()
+        # Equipment located in rooms, attached in resolve() once every sheet is in
+        self._equipment = []
+
+    def __len__(self):
+        return sum(len(rooms) for rooms in self.floors.values())
+
+    def _room(self, floor, number):
+        key = normalize_room_number(number)
+        if not key:
+            return None
+        rooms = self.floors.setdefault(floor, {})
+        if key not in rooms:
+            a_room = load_template('a_rooms')
+            e_room = load_template('e_rooms')
+            for room in (a_room, e_room):
+                room['room_id'] = f"Room_{number}"
+            rooms[key] = {"number": str(number), "name": '', "a": a_room, "e": e_room, "sources": []}
+        return rooms[key]
+
+    @staticmethod
+    def _set_name(room, name):
+        room['name'] = name
+        for record in (room['a'], room['e']):
+            record['room_name'] = f"{name}_{room['number']}"
 
-    for parsed_room in parsed_rooms:
-        room_number = str(parsed_room.get('number', ''))
-        room_name = parsed_room.get('name', '')
-        
-        if not room_number or not room_name:
+    def add(self, parsed_data, drawing_type, source=''):
+        """Merge the rooms of one structured drawing. Returns the number of rooms touched."""
+        if not isinstance(parsed_data, dict):
+            return 0
+        metadata = parsed_data.get('metadata', {}) if isinstance(parsed_data.get('metadata'), dict) else {}
+        floor = str(first_field(metadata, FLOOR_KEYS) or '')
+        # The first architectural sheet of a floor supplies its metadata
+        if drawing_type == 'Architectural' and floor not in self._architectural_floors:
+            self._architectural_floors.add(floor)
+            self.floor_metadata[floor] = metadata
+            self.floors.setdefault(floor, {})
+        else:
+            self.floor_metadata.setdefault(floor, metadata)
+
+        touched = 0
+        for list_key, items in iter_lists(parsed_data):
+            is_rooms = bool(ROOM_LIST.search(list_key))
+            is_equipment = (not is_rooms and drawing_type in MECHANICAL_TYPES
+                            and bool(EQUIPMENT_LIST.search(list_key)))
+            if not (is_rooms or is_equipment):
+                continue
+            for item in items:
+                if not isinstance(item, dict):
+                    continue
+                if is_rooms:
+                    touched += self._add_room(item, floor, drawing_type, source)
+                else:
+                    touched += self._add_equipment(item, floor, source)
+        return touched
+
+    def _add_room(self, parsed_room, floor, drawing_type, source):
+        number = first_field(parsed_room, ROOM_NUMBER_KEYS)
+        name = first_field(parsed_room, ROOM_NAME_KEYS)
+        if number is None or isinstance(number, (dict, list)) or (drawing_type == 'Architectural' and not name):
             print(f"Skipping room with incomplete data: {parsed_room}")
-            continue
-        
-        room_data = template.copy()
-        room_data['room_id'] = f"Room_{room_number}"
-        room_data['room_name'] = f"{room_name}_{room_number}"
-        
-        # Copy all fields from parsed_room to room_data
-        for key, value in parsed_room.items():
-            if key not in ['number', 'name']:  # Avoid duplicating number and name
-                room_data[key] = value
-        
-        rooms_data['rooms'].append(room_data)
-    
+            return 0
+        room = self._room(floor, number)
+        if room is None:
+            return 0
+        if drawing_type == 'Architectural':
+            # Room numbers as written on the architectural plans win
+            room['number'] = str(number)
+            for record in (room['a'], room['e']):
+                record['room_id'] = f"Room_{number}"
+        if name and (drawing_type == 'Architectural' or not room['name']):
+            self._set_name(room, name)
+        if drawing_type == 'Architectural':
+            # Architectural values are authoritative for both records
+            fields = {key: value for key, value in parsed_room.items() if key not in ('number', 'name')}
+            for record in (room['a'], room['e']):
+                record.update(copy.deepcopy(fields))
+        else:
+            _merge_fields(room['e'], {key: value for key, value in parsed_room.items()
+                                      if key not in ROOM_NUMBER_KEYS + ROOM_NAME_KEYS})
+        if source and source not in room['sources']:
+            room['sources'].append(source)
+        return 1
+
+    def _add_equipment(self, item, floor, source):
+        location = first_field(item, EQUIPMENT_ROOM_KEYS)
+        tag = first_field(item, EQUIPMENT_TAG_KEYS)
+        key = normalize_room_number(location) if isinstance(location, (str, int)) else ''
+        if not key or tag is None:
+            return 0
+        entry = {"tag": tag, "description": first_field(item, DESCRIPTION_KEYS) or ''}
+        self._equipment.append((floor, key, entry, source))
+        return 1
+
+    def _find(self, floor, key):
+        """The room for key on floor; sheets with no floor match a room on exactly one floor."""
+        room = self.floors.get(floor, {}).get(key)
+        if room is not None or floor:
+            return room
+        matches = [rooms[key] for other, rooms in self.floors.items() if other and key in rooms]
+        return matches[0] if len(matches) == 1 else None
+
+    def resolve(self):
+        """
+        Fold rooms from sheets without a floor into the floor that has them,
+        and attach located equipment to existing rooms.
+        """
+        unassigned = self.floors.get('', {})
+        for key in list(unassigned):
+            matches = [rooms[key] for floor, rooms in self.floors.items() if floor and key in rooms]
+            if len(matches) != 1:
+                continue
+            target, room = matches[0], unassigned.pop(key)
+            _merge_fields(target['a'], room['a'])
+            _merge_fields(target['e'], room['e'])
+            if not target['name'] and room['name']:
+                self._set_name(target, room['name'])
+            target['sources'].extend(s for s in room['sources'] if s not in target['sources'])
+        if '' in self.floors and not unassigned and '' not in self._architectural_floors:
+            del self.floors['']
+
+        for floor, key, entry, source in self._equipment:
+            room = self._find(floor, key)
+            if room is None:
+                continue
+            equipment = room['e'].setdefault('mechanical_equipment', [])
+            if entry not in equipment:
+                equipment.append(entry)
+            if source and source not in room['sources']:
+                room['sources'].append(source)
+        self._equipment = []
+
+    def rooms_data(self, floor, room_type):
+        """The a_rooms/e_rooms document for one floor."""
+        metadata = self.floor_metadata.get(floor, {})
+        record = 'a' if room_type == 'a_rooms' else 'e'
+        return {
+            "metadata": metadata,
+            "project_name": metadata.get('project', ''),
+            "floor_number": floor,
+            "rooms": [
+                dict(room[record], source_sheets=list(room['sources']))
+                for room in self.floors.get(floor, {}).values()
+            ]
+        }
+
+    def write(self, output_folder):
+        """Write e_rooms/a_rooms details once per floor. Returns the files written."""
+        self.resolve()
+        os.makedirs(output_folder, exist_ok=True)
+        written = []
+        for floor in self.floors:
+            for room_type in ('e_rooms', 'a_rooms'):
+                path = os.path.join(output_folder, f'{room_type}_details_floor_{floor}.json')
+                with open(path, 'w') as f:
+                    json.dump(self.rooms_data(floor, room_type), f, indent=2)
+                written.append(path)
+        return written
+
+def generate_rooms_data(parsed_data, room_type):
+    registry = RoomRegistry()
+    registry.add(parsed_data, 'Architectural')
+    floor = next(iter(registry.floors), '')
+    rooms_data = registry.rooms_data(floor, room_type)
+    if not rooms_data['rooms']:
+        print(f"No rooms found in parsed data for {room_type}.")
     return rooms_data
 
 def process_architectural_drawing(parsed_data, file_path, output_folder):
     is_reflected_ceiling = "REFLECTED CEILING PLAN" in file_path.upper()
-    
-    project_name = parsed_data.get('metadata', {}).get('project', '')
-    job_number = parsed_data.get('metadata', {}).get('job_number', '')
-    floor_number = ''  # If floor number is available in the future, extract it here
-    
-    e_rooms_data = generate_rooms_data(parsed_data, 'e_rooms')
-    a_rooms_data = generate_rooms_data(parsed_data, 'a_rooms')
-    
-    e_rooms_file = os.path.join(output_folder, f'e_rooms_details_floor_{floor_number}.json')
-    a_rooms_file = os.path.join(output_folder, f'a_rooms_details_floor_{floor_number}.json')
-    
-    with open(e_rooms_file, 'w') as f:
-        json.dump(e_rooms_data, f, indent=2)
-    
-    with open(a_rooms_file, 'w') as f:
-        json.dump(a_rooms_data, f, indent=2)
-    
+
+    registry = RoomRegistry()
+    registry.add(parsed_data, 'Architectural', file_path)
+    floor_number = next(iter(registry.floors), '')
+    registry.write(output_folder)
+
     return {
-        "e_rooms_file": e_rooms_file,
-        "a_rooms_file": a_rooms_file,
+        "e_rooms_file": os.path.join(output_folder, f'e_rooms_details_floor_{floor_number}.json'),
+        "a_rooms_file": os.path.join(output_folder, f'a_rooms_details_floor_{floor_number}.json'),
         "is_reflected_ceiling": is_reflected_ceiling
     }
 
@@ -82,9 +251,9 @@ if __name__ == "__main__":
     # This block is for testing purposes. You can remove it if not needed.
     test_file_path = "path/to/your/test/file.json"
     test_output_folder = "path/to/your/test/output/folder"
-    
+
     with open(test_file_path, 'r') as f:
         test_parsed_data = json.load(f)
-    
+
     result = process_architectural_drawing(test_parsed_data, test_file_path, test_output_folder)
-    print(result)
\ No newline at end of file
+    print(result)
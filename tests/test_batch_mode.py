@@ -0,0 +1,113 @@
+# /tests/test_batch_mode.py
+
+import os
+import json
+import asyncio
+import functools
+
+from openai import AsyncOpenAI
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.fake_services import FakeServices, FakeServiceConfig
+from utils.batch_mode import BatchRequestWriter, LocalBatchProcessor, iter_request_lines, parse_batch_output
+
+
+def test_request_files_split_at_batch_limits(tmp_path):
+    with BatchRequestWriter(tmp_path, max_requests=2) as writer:
+        for n in range(5):
+            writer.add(str(n), {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "x"}]})
+    assert [len(list(iter_request_lines(path))) for path in writer.paths] == [2, 2, 1]
+    first = next(iter_request_lines(writer.paths[0]))
+    assert first["custom_id"] == "0"
+    assert first["method"] == "POST" and first["url"] == "/v1/chat/completions"
+
+
+def test_batch_output_parsing():
+    output = "\n".join(json.dumps(line) for line in [
+        {"custom_id": "0", "response": {"status_code": 200, "body": {
+            "choices": [{"message": {"content": "{}"}}], "usage": {"prompt_tokens": 10, "completion_tokens": 2}}}},
+        {"custom_id": "1", "response": {"status_code": 400, "body": {"error": {"message": "too long"}}}},
+        {"custom_id": "2", "response": None, "error": {"code": "expired", "message": "not run"}},
+    ])
+    results = parse_batch_output(output)
+    assert results["0"].success and results["0"].prompt_tokens == 10
+    assert results["1"].error == "too long"
+    assert results["2"].error == "not run"
+
+
+def test_batch_job_fans_results_back_to_outputs(tmp_path, monkeypatch):
+    for name in ("OPENAI_BASE_URL", "OPENAI_API_KEY", "DOCUMENTINTELLIGENCE_ENDPOINT", "DOCUMENTINTELLIGENCE_API_KEY"):
+        monkeypatch.setenv(name, os.environ.get(name, ""))
+
+    async def run():
+        services = FakeServices(FakeServiceConfig(chat_latency=0.0, tokens_per_second=1_000_000,
+                                                  rate_limit_probability=0.0, di_latency=0.0,
+                                                  di_seconds_per_page=0.0, di_poll_interval_ms=10))
+        await services.start()
+        os.environ.update(services.environment())
+        import main
+        try:
+            generate_corpus(tmp_path / "job", 1, 1, 1, 1, 7)
+            await main.process_job_site_batch_async(
+                tmp_path / "job", tmp_path / "output", LocalBatchProcessor(AsyncOpenAI(max_retries=0))
+            )
+        finally:
+            await services.stop()
+        return services.stats
+
+    stats = asyncio.run(run())
+    output = tmp_path / "output"
+    assert stats["chat_requests"] == 3
+    assert len(list(output.rglob("*_structured.json"))) == 3
+    assert len(list((output / "batch").glob("requests_*.jsonl"))) == 1
+    assert not (output / "batch" / "batch_state.json").exists()
+    assert (output / "Architectural" / "e_rooms_details_floor_.json").exists()
+
+
+class InterruptedSubmits(LocalBatchProcessor):
+    """Dies on the second submit of its first run, like a run killed mid-submission."""
+
+    def __init__(self, client):
+        super().__init__(client)
+        self.submitted = []
+        self.interrupt = True
+
+    async def submit(self, path, metadata=None):
+        if self.interrupt and self.submitted:
+            self.interrupt = False
+            raise KeyboardInterrupt
+        batch_id = await super().submit(path, metadata)
+        self.submitted.append(path.name)
+        return batch_id
+
+
+def test_interrupted_submission_resumes_without_resubmitting(tmp_path, monkeypatch):
+    for name in ("OPENAI_BASE_URL", "OPENAI_API_KEY", "DOCUMENTINTELLIGENCE_ENDPOINT", "DOCUMENTINTELLIGENCE_API_KEY"):
+        monkeypatch.setenv(name, os.environ.get(name, ""))
+
+    async def run():
+        services = FakeServices(FakeServiceConfig(chat_latency=0.0, tokens_per_second=1_000_000,
+                                                  rate_limit_probability=0.0, di_latency=0.0,
+                                                  di_seconds_per_page=0.0, di_poll_interval_ms=10))
+        await services.start()
+        os.environ.update(services.environment())
+        import main
+        # One request per file, so the job is submitted as three batches
+        monkeypatch.setattr(main, "BatchRequestWriter", functools.partial(BatchRequestWriter, max_requests=1))
+        processor = InterruptedSubmits(AsyncOpenAI(max_retries=0))
+        try:
+            generate_corpus(tmp_path / "job", 1, 1, 1, 1, 7)
+            try:
+                await main.process_job_site_batch_async(tmp_path / "job", tmp_path / "output", processor)
+            except KeyboardInterrupt:
+                pass
+            state = json.loads((tmp_path / "output" / "batch" / "batch_state.json").read_text())
+            assert len(state["batch_ids"]) == 1 and len(state["request_files"]) == 3
+            await main.process_job_site_batch_async(tmp_path / "job", tmp_path / "output", processor)
+        finally:
+            await services.stop()
+        return processor.submitted
+
+    submitted = asyncio.run(run())
+    assert sorted(submitted) == sorted(set(submitted)) and len(submitted) == 3
+    assert len(list((tmp_path / "output").rglob("*_structured.json"))) == 3
@@ -0,0 +1,45 @@
+# /tests/test_benchmark.py
+
+import os
+import json
+import asyncio
+
+from benchmarks.fake_services import FakeServiceConfig
+from benchmarks.run_benchmark import run_benchmark, format_report
+from utils.job_index import JobIndex
+from utils.text_index import TextIndex
+
+
+def test_offline_benchmark_runs_full_pipeline(tmp_path, monkeypatch):
+    # run_benchmark points the SDKs at the fake services through the environment
+    for name in ("OPENAI_BASE_URL", "OPENAI_API_KEY", "DOCUMENTINTELLIGENCE_ENDPOINT", "DOCUMENTINTELLIGENCE_API_KEY"):
+        monkeypatch.setenv(name, os.environ.get(name, ""))
+
+    config = FakeServiceConfig(
+        chat_latency=0.01,
+        tokens_per_second=1_000_000,
+        rate_limit_probability=0.2,
+        retry_after_ms=1,
+        di_latency=0.01,
+        di_seconds_per_page=0.0,
+        di_poll_interval_ms=10,
+        seed=7,
+    )
+    report = asyncio.run(run_benchmark(tmp_path, config, panel_schedules=1, room_schedules=1, dense_plans=2, pages=1))
+
+    assert report["counters"]["files_succeeded"] == 4
+    assert report["counters"]["files_failed"] == 0
+    assert report["service_stats"]["chat_requests"] >= 4
+    assert report["counters"]["input_tokens"] > 0
+    assert 0 <= report["counters"]["cached_input_tokens"] <= report["counters"]["input_tokens"]
+    assert "process_file" in report["stages"]
+    panel_schedule = tmp_path / "output" / "Electrical" / "E5.00-PANEL-SCHEDULES-Rev.1_structured.json"
+    # Metadata read from the title block, not the model
+    metadata = json.loads(panel_schedule.read_text())["metadata"]
+    assert (metadata["project"], metadata["drawing_number"], metadata["revision"]) == ("BENCHMARK JOB", "E5.00", "1")
+    assert "files/min" in format_report(report)
+    assert (tmp_path / "output" / "Architectural" / "e_rooms_details_floor_.json").exists()
+    with JobIndex(tmp_path / "output" / "job_index.sqlite") as index:
+        assert index.sheet_count() == 4
+    with TextIndex(tmp_path / "output" / "text_index.sqlite") as index:
+        assert index.sheet_count() == 4
@@ -0,0 +1,54 @@
+# /tests/test_classifier.py
+
+import random
+
+import pymupdf
+
+import main
+from benchmarks.corpus import panel_schedule, room_schedule
+from utils import common_utils, file_utils
+from utils.classifier import Classification, DrawingClassifier, classify_name
+
+
+def test_one_name_classifier_everywhere():
+    assert main.is_panel_schedule_file is common_utils.is_panel_schedule_file is file_utils.is_panel_schedule_file
+    assert classify_name("E5.00-PANEL-SCHEDULES-Rev.3.pdf") == Classification("Electrical", True)
+    assert classify_name("E1.0-ELECTRICAL-SCHEDULES-Rev.0.pdf").is_panel_schedule
+    # The old substring checks sent these to Document Intelligence
+    assert classify_name("A6.0-ROOM-FINISH-SCHEDULE-Rev.1.pdf") == Classification("Architectural", False)
+    assert not classify_name("ED1.1-LIGHTING-FIXTURE-SCHEDULE.pdf").is_panel_schedule
+    assert [classify_name(name).drawing_type for name in ("AD1.0", "LV2.1", "FA1.0", "KD3.0", "T1.0", "G0.0")] == [
+        "Architectural", "Low Voltage", "Fire Alarm", "Kitchen", "General", "General"
+    ]
+
+
+def test_name_decisions_are_cached():
+    classifier = DrawingClassifier()
+    for _ in range(3):
+        assert classifier.drawing_type("job/E2.1-POWER-PLAN.pdf") == "Electrical"
+    assert not classifier.is_panel_schedule("job/E2.1-POWER-PLAN.pdf")
+    stats = classifier.stats()
+    assert (stats["name_hits"], stats["name_misses"]) == (3, 1)
+
+
+def test_first_page_confirms_panel_schedules(tmp_path):
+    rng = random.Random(7)
+    real = tmp_path / "E5.00-PANEL-SCHEDULES-Rev.1.pdf"
+    panel_schedule(real, 1, rng)
+    misnamed = tmp_path / "E5.01-PANEL-SCHEDULES-Rev.1.pdf"
+    room_schedule(misnamed, 1, rng)
+    scanned = tmp_path / "E5.02-PANEL-SCHEDULES-Rev.1.pdf"
+    doc = pymupdf.open()
+    doc.new_page()
+    doc.save(scanned)
+
+    classifier = DrawingClassifier(confirm_content=True)
+    assert classifier.confirm_panel_schedule(real, "a")
+    assert not classifier.confirm_panel_schedule(misnamed, "b")
+    # No text to go on: the file name decides
+    assert classifier.confirm_panel_schedule(scanned, "c")
+    # Same hash, no second read
+    misnamed.unlink()
+    assert not classifier.confirm_panel_schedule(misnamed, "b")
+    assert (classifier.stats()["content_hits"], classifier.stats()["content_misses"]) == (1, 3)
+    assert DrawingClassifier(confirm_content=False).confirm_panel_schedule(misnamed, "b")
@@ -0,0 +1,75 @@
+# /tests/test_drawing_processor.py
+
+import json
+import asyncio
+from pathlib import Path
+
+import pymupdf
+
+import utils.drawing_processor as drawing_processor
+from benchmarks.fake_services import FakeServices, FakeServiceConfig
+from utils.drawing_processor import DrawingProcessor
+from utils.tables import json_default
+
+FAST_DI = FakeServiceConfig(di_latency=0.0, di_seconds_per_page=0.0, di_poll_interval_ms=1)
+
+
+def _write_pdf(path: Path, pages: int, width: float = 612, height: float = 792) -> Path:
+    doc = pymupdf.open()
+    for number in range(pages):
+        page = doc.new_page(width=width, height=height)
+        page.insert_text((72, 72), f"PANEL LP-{number + 1} CIRCUIT BREAKER", fontsize=12)
+    doc.save(path)
+    doc.close()
+    return path
+
+
+async def _process_large(path: Path, monkeypatch):
+    services = FakeServices(FAST_DI)
+    await services.start()
+    for name, value in services.environment().items():
+        monkeypatch.setenv(name, value)
+    processor = DrawingProcessor()
+    try:
+        return await processor.process_large_drawing(str(path)), services.stats
+    finally:
+        await processor.close()
+        await services.stop()
+
+
+def test_large_drawing_is_split_and_stitched_in_page_order(tmp_path, monkeypatch):
+    pdf = _write_pdf(tmp_path / "E5.00-PANEL-SCHEDULES.pdf", 6)
+    # Force roughly two pages per part
+    monkeypatch.setattr(drawing_processor, "MAX_FILE_SIZE", pdf.stat().st_size // 2)
+
+    result, stats = asyncio.run(_process_large(pdf, monkeypatch))
+
+    assert stats["di_requests"] >= 2
+    assert [page.number for page in result["content"]["pages"]] == [1, 2, 3, 4, 5, 6]
+    assert result["content"]["pages"][3].lines[0].text == "PANEL LP-4 CIRCUIT BREAKER"
+    assert len(result["metadata"]["parts"]) == stats["di_requests"]
+
+
+def test_oversized_single_page_is_analyzed_as_tiles(tmp_path, monkeypatch):
+    pdf = _write_pdf(tmp_path / "E5.00-PANEL-SCHEDULES.pdf", 1, width=3000, height=2000)
+    monkeypatch.setattr(drawing_processor, "MAX_FILE_SIZE", 100)
+
+    result, stats = asyncio.run(_process_large(pdf, monkeypatch))
+
+    pages = result["content"]["pages"]
+    assert stats["di_requests"] == len(pages) >= 4
+    assert all(page.number == 1 and page.region is not None for page in pages)
+
+
+def test_results_serialize_lazily_to_the_original_layout(tmp_path, monkeypatch):
+    pdf = _write_pdf(tmp_path / "E5.00-PANEL-SCHEDULES.pdf", 6)
+    monkeypatch.setattr(drawing_processor, "MAX_FILE_SIZE", pdf.stat().st_size // 2)
+
+    result, _ = asyncio.run(_process_large(pdf, monkeypatch))
+
+    data = json.loads(json.dumps(result, default=json_default))
+    page = data["content"]["pages"][3]
+    assert page["number"] == 4
+    assert page["lines"][0]["text"] == "PANEL LP-4 CIRCUIT BREAKER"
+    assert page["lines"][0]["spans"][0].keys() == {"offset", "length"}
+    assert data["text_blocks"][0]["text"] == "PANEL LP-1 CIRCUIT BREAKER"
@@ -0,0 +1,80 @@
+# /tests/test_estimator.py
+
+import os
+import json
+import asyncio
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.fake_services import FakeServices, FakeServiceConfig
+from utils import estimator
+from utils.estimator import Calibration, estimate_job, save_estimate, simulate_wall_time
+
+
+def _estimate(job_folder, output_folder=None, calibration=None):
+    import main
+    return asyncio.run(estimate_job(
+        job_folder, main.get_drawing_type, main.is_panel_schedule_file, concurrency=2, rate_limit=60,
+        time_window=60, output_folder=output_folder, calibration=calibration or Calibration()
+    ))
+
+
+def test_wall_time_follows_workers_and_rate_limit():
+    assert simulate_wall_time([4, 3, 2, 1], concurrency=2, rate_limit=60, time_window=60) == 5
+    assert simulate_wall_time([4, 3, 2, 1], concurrency=4, rate_limit=60, time_window=60) == 4
+    # 121 one-second files pause twice for the 60-per-minute worker rate limit
+    assert simulate_wall_time([1] * 121, concurrency=5, rate_limit=60, time_window=60) == 120
+
+
+def test_estimate_counts_local_stages(tmp_path):
+    generate_corpus(tmp_path / "job", 1, 1, 2, 2, 7)
+    estimate = _estimate(tmp_path / "job")
+    assert len(estimate.files) == 4
+    # Only panel schedules go to Document Intelligence
+    panel_schedules = [item for item in estimate.files if item.scheduled.is_panel_schedule]
+    assert panel_schedules and estimate.di_pages == 2 * len(panel_schedules)
+    assert estimate.api_calls == 4 + len(panel_schedules)
+    assert estimate.input_tokens > 0 and 0 < estimate.output_tokens < estimate.input_tokens
+    assert estimate.wall_seconds > 0
+
+    doubled = _estimate(tmp_path / "job", calibration=Calibration(input_tokens=2.0, wall_seconds=0.5))
+    assert doubled.input_tokens == int(estimate.raw["input_tokens"] * 2)
+    assert doubled.wall_seconds == estimate.wall_seconds * 0.5
+
+
+def test_calibration_moves_towards_actuals():
+    calibration = Calibration()
+    calibration.update({"input_tokens": 1000, "output_tokens": 300, "wall_seconds": 60},
+                       {"input_tokens": 1500, "output_tokens": 300, "wall_seconds": 30})
+    assert (calibration.input_tokens, calibration.output_tokens, calibration.wall_seconds) == (1.5, 1.0, 0.5)
+    calibration.update({"input_tokens": 1000}, {"input_tokens": 1000})
+    assert 1.0 < calibration.input_tokens < 1.5
+    assert calibration.jobs == 2 and len(calibration.history) == 2
+
+
+def test_job_after_estimate_calibrates(tmp_path, monkeypatch):
+    for name in ("OPENAI_BASE_URL", "OPENAI_API_KEY", "DOCUMENTINTELLIGENCE_ENDPOINT", "DOCUMENTINTELLIGENCE_API_KEY"):
+        monkeypatch.setenv(name, os.environ.get(name, ""))
+    calibration_path = tmp_path / "calibration.json"
+    monkeypatch.setattr(estimator, "ESTIMATE_CALIBRATION_FILE", str(calibration_path))
+    generate_corpus(tmp_path / "job", 1, 1, 1, 1, 7)
+    output = tmp_path / "output"
+    save_estimate(_estimate(tmp_path / "job", output), output)
+
+    async def run():
+        services = FakeServices(FakeServiceConfig(chat_latency=0.0, tokens_per_second=1_000_000,
+                                                  di_latency=0.0, di_seconds_per_page=0.0, di_poll_interval_ms=10))
+        await services.start()
+        os.environ.update(services.environment())
+        import main
+        try:
+            await main.process_job_site_async(tmp_path / "job", output)
+        finally:
+            await services.stop()
+
+    asyncio.run(run())
+    calibration = json.loads(calibration_path.read_text())
+    assert calibration["jobs"] == 1
+    assert calibration["input_tokens"] > 0 and calibration["wall_seconds"] > 0
+    assert not (output / "logs" / "estimate.json").exists()
+    # The finished job's output now counts as current
+    assert _estimate(tmp_path / "job", output).to_dict()["files_with_current_output"] == 3
@@ -0,0 +1,118 @@
+# /tests/test_job_index.py
+
+import json
+import time
+import sqlite3
+
+import pytest
+
+from utils.file_utils import sheet_number_from_filename
+from utils.job_index import JobIndex, normalize_room_number
+
+PANEL_SHEET = {
+    "metadata": {"drawing_number": "E5.00", "title": "PANEL SCHEDULES", "revision": "3"},
+    "panels": [
+        {"panel_name": "Panel LP-1", "fed_from": "MDP", "voltage": "208Y/120V", "circuits": [
+            {"circuit": 1, "description": "LIGHTING RM 214", "load_va": 1200, "poles": 1},
+            {"circuit": 3, "description": "RTU-3", "load_va": "6 kVA", "poles": 3, "breaker": "40A"},
+        ]},
+        {"panel_name": "LP-1A", "fed_from": "LP1", "circuits": [
+            {"circuit": 1, "description": "EF-2", "load_va": 300},
+        ]},
+    ],
+}
+MECHANICAL_SHEET = {
+    "metadata": {"drawing_number": "M6.01", "title": "MECHANICAL SCHEDULES"},
+    "equipment": [
+        {"tag": "RTU 3", "type": "Rooftop Unit", "panel": "LP-1", "circuit": "3", "location": "Room 214"},
+        {"mark": "EF-2", "description": "Exhaust fan"},
+    ],
+}
+ARCHITECTURAL_SHEET = {
+    "metadata": {"title": "FLOOR PLAN"},
+    "rooms": [{"number": "214", "name": "CONFERENCE"}, {"number": "215", "name": "OFFICE"}],
+}
+
+
+@pytest.fixture
+def index(tmp_path):
+    with JobIndex(tmp_path / "job_index.sqlite") as job_index:
+        job_index.index_sheet("job/E5.00-PANEL-SCHEDULES.pdf", "Electrical", PANEL_SHEET)
+        job_index.index_sheet("job/M6.01-SCHEDULES.pdf", "Mechanical", MECHANICAL_SHEET)
+        job_index.index_sheet("job/A2.01-FLOOR-PLAN.pdf", "Architectural", ARCHITECTURAL_SHEET)
+        yield job_index
+
+
+def test_keys():
+    assert normalize_room_number("Room 214") == normalize_room_number("214") == "214"
+    assert sheet_number_from_filename("job/E5.00-PANEL-SCHEDULES-Rev.3.pdf") == "E5.00"
+
+
+def test_sheets_referencing_a_room(index):
+    sheets = index.sheets_for_room("Rm 214")
+    assert [sheet["sheet_number"] for sheet in sheets] == ["A2.01", "M6.01"]
+    assert index.rooms("214")[0]["name"] == "CONFERENCE"
+
+
+def test_panel_feeding_equipment(index):
+    feeds = index.panels_feeding("rtu-3")
+    assert {(row["panel"], row["circuit"], row["sheet_number"]) for row in feeds} == {
+        ("LP1", "3", "E5.00"), ("LP1", "3", "M6.01")
+    }
+    assert [row["panel"] for row in index.panels_feeding("EF2")] == ["LP1A"]
+    assert index.panels_fed_from("Panel LP-1") == ["LP1A"]
+    assert index.find_equipment("EF-2")[0]["description"] == "Exhaust fan"
+    circuits = index.circuits("LP1")
+    assert [(row["circuit"], row["load_va"]) for row in circuits] == [("1", 1200), ("3", 6000)]
+
+
+def test_reindexing_replaces_a_sheet(index):
+    revised = json.loads(json.dumps(PANEL_SHEET))
+    revised["panels"][0]["circuits"].pop()
+    index.index_sheet("job/E5.00-PANEL-SCHEDULES.pdf", "Electrical", revised)
+    assert index.sheet_count() == 3
+    assert len(index.circuits("LP1")) == 1
+    assert [row["sheet_number"] for row in index.panels_feeding("RTU-3")] == ["M6.01"]
+
+
+def test_each_revision_of_a_sheet_keeps_its_row(index):
+    revised = json.loads(json.dumps(PANEL_SHEET))
+    revised["metadata"]["revision"] = "4"
+    index.index_sheet("job/E5.00-PANEL-SCHEDULES-Rev.4.pdf", "Electrical", revised)
+    # Another copy of an issue already indexed replaces it
+    index.index_sheet("job/copies/E5.00-PANEL-SCHEDULES.pdf", "Electrical", PANEL_SHEET)
+    revisions = index.sheet_revisions("E5.00")
+    assert [(row["sheet_key"], row["file"]) for row in revisions] == [
+        ("E5.00@4", "job/E5.00-PANEL-SCHEDULES-Rev.4.pdf"), ("E5.00@3", "job/copies/E5.00-PANEL-SCHEDULES.pdf")
+    ]
+    assert index.sheet_count() == 4
+    assert [row["sheet_key"] for row in index.sheet_revisions("A2.01")] == ["A2.01"]
+
+
+def test_older_indexes_gain_sheet_keys(tmp_path):
+    db_path = tmp_path / "job_index.sqlite"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE sheets (id INTEGER PRIMARY KEY, file TEXT NOT NULL UNIQUE, output_path TEXT, "
+                     "drawing_type TEXT, sheet_number TEXT, title TEXT, project TEXT, revision TEXT, date TEXT, "
+                     "indexed_at REAL)")
+    conn.close()
+    with JobIndex(db_path) as job_index:
+        job_index.index_sheet("job/E5.00-PANEL-SCHEDULES.pdf", "Electrical", PANEL_SHEET)
+        assert job_index.sheet_revisions("E5.00")[0]["sheet_key"] == "E5.00@3"
+
+
+def test_lookups_stay_fast_on_a_large_job(tmp_path):
+    with JobIndex(tmp_path / "job_index.sqlite") as index:
+        for sheet in range(1000):
+            index.index_sheet(f"job/E{sheet}.pdf", "Electrical", {
+                "panels": [{"panel_name": f"P{sheet}", "circuits": [
+                    {"circuit": c, "description": f"RTU-{sheet * 42 + c}", "load_va": 100} for c in range(42)
+                ]}],
+                "rooms": [{"number": str(100 + sheet), "name": "OFFICE"}],
+            })
+        start = time.perf_counter()
+        feeds = index.panels_feeding("RTU-4200")
+        rooms = index.sheets_for_room("599")
+        assert time.perf_counter() - start < 0.05
+    assert [row["panel"] for row in feeds] == ["P100"]
+    assert [sheet["file"] for sheet in rooms] == ["job/E499.pdf"]
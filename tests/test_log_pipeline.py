@@ -0,0 +1,59 @@
+# /tests/test_log_pipeline.py
+
+import json
+import logging
+
+from utils.log_pipeline import StageSampler, cap_payload, log_span, start_logging, stop_logging
+from utils.tracing import Tracer
+
+
+def test_records_are_json_lines_with_file_and_stage(tmp_path):
+    tracer = Tracer()
+    tracer.add_listener(log_span)
+    log_path = start_logging(tmp_path / "logs", sample_rates={})
+    try:
+        with tracer.file_context("E5.00.pdf"), tracer.span("extract", method="pymupdf"):
+            logging.getLogger("test").warning("Table detection skipped")
+        logging.info("outside any file")
+    finally:
+        stop_logging()
+
+    records = [json.loads(line) for line in log_path.read_text().splitlines()]
+    warning, span, outside = [r for r in records if r["logger"] in ("test", "ohmni.spans", "root")]
+    assert (warning["file"], warning["stage"], warning["level"]) == ("E5.00.pdf", "extract", "WARNING")
+    assert (span["message"], span["file"], span["attrs"]) == ("extract", "E5.00.pdf", {"method": "pymupdf"})
+    assert span["duration"] >= 0
+    assert "file" not in outside and "stage" not in outside
+
+
+def test_hot_stages_are_sampled():
+    sampler = StageSampler({"get_text": 0.1, "ocr": 0.0})
+
+    def record(stage, level=logging.INFO):
+        record = logging.LogRecord("test", level, __file__, 1, "page", None, None)
+        record.stage = stage
+        return sampler.filter(record)
+
+    assert sum(record("get_text") for _ in range(100)) == 10
+    assert all(record("get_text", logging.WARNING) for _ in range(5))
+    assert not record("ocr") and record("gpt_request") and record(None)
+
+
+def test_payloads_are_capped():
+    assert cap_payload("x" * 10, limit=10) == "x" * 10
+    assert cap_payload("x" * 2500, limit=2000) == "x" * 2000 + "... [500 more chars]"
+
+
+def test_exceptions_keep_their_traceback(tmp_path):
+    log_path = start_logging(tmp_path / "logs", sample_rates={})
+    try:
+        try:
+            {}["panel"]
+        except KeyError:
+            logging.getLogger("test").exception("Lookup of %s failed", "panel")
+    finally:
+        stop_logging()
+
+    record = next(json.loads(line) for line in log_path.read_text().splitlines() if '"test"' in line)
+    assert record["message"] == "Lookup of panel failed"
+    assert record["exception"].startswith("Traceback") and "KeyError: 'panel'" in record["exception"]
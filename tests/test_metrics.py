@@ -0,0 +1,46 @@
+# /tests/test_metrics.py
+
+import asyncio
+
+from utils.metrics import MetricsRegistry, metrics, start_metrics_server
+
+
+def test_prometheus_text_format():
+    registry = MetricsRegistry()
+    files = registry.counter("files_total", "Files", ["status"])
+    depth = registry.gauge("queue_depth", "Queue depth")
+    stage = registry.histogram("stage_seconds", "Stage duration", ["stage"], buckets=(0.1, 1.0))
+
+    files.inc(status="success")
+    files.inc(2, status="failure")
+    depth.set(4)
+    depth.dec()
+    stage.observe(0.05, stage="extract")
+    stage.observe(5.0, stage="extract")
+
+    text = registry.render()
+    assert '# TYPE files_total counter' in text
+    assert 'files_total{status="failure"} 2' in text
+    assert 'queue_depth 3' in text
+    assert 'stage_seconds_bucket{stage="extract",le="0.1"} 1' in text
+    assert 'stage_seconds_bucket{stage="extract",le="1"} 1' in text
+    assert 'stage_seconds_bucket{stage="extract",le="+Inf"} 2' in text
+    assert 'stage_seconds_count{stage="extract"} 2' in text
+
+
+def test_metrics_endpoint_serves_registry():
+    async def run():
+        server = await start_metrics_server(port=0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return response.decode()
+
+    response = asyncio.run(run())
+    assert response.startswith("HTTP/1.1 200 OK")
+    assert response.endswith(metrics.render())
@@ -0,0 +1,63 @@
+# /tests/test_ocr.py
+
+import shutil
+import asyncio
+
+import pymupdf
+
+from utils import ocr
+from utils.ocr import OcrCache, is_scanned_page
+from utils.pdf_processor import extract_text_and_tables_from_pdf, iter_pdf_pages
+from utils.text_index import TextIndex, TextLine
+
+
+def _write_scan(path, with_stamp=False):
+    doc = pymupdf.open()
+    page = doc.new_page(width=612, height=792)
+    pixmap = pymupdf.Pixmap(pymupdf.csGRAY, pymupdf.IRect(0, 0, 300, 400), False)
+    pixmap.set_rect(pixmap.irect, (230,))
+    page.insert_image(page.rect, pixmap=pixmap)
+    if with_stamp:
+        page.insert_text((500, 780), "A1.01")
+    text_page = doc.new_page(width=612, height=792)
+    for row in range(40):
+        text_page.insert_text((36, 40 + row * 18), f"ROOM {100 + row} OFFICE GFCI RECEPTACLE 20A 120V")
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def test_detects_image_only_pages(tmp_path):
+    with pymupdf.open(_write_scan(tmp_path / "A1.01-SCAN.pdf", with_stamp=True)) as doc:
+        assert is_scanned_page(doc[0])
+        assert not is_scanned_page(doc[1])
+
+
+def test_scanned_pages_are_keyed_by_content(tmp_path):
+    original = _write_scan(tmp_path / "A1.01-SCAN.pdf")
+    renamed = shutil.copy(original, tmp_path / "A1.01-SCAN-Rev.2.pdf")
+    first = list(iter_pdf_pages(str(original)))
+    second = list(iter_pdf_pages(str(renamed)))
+    assert [page.scanned for page in first] == [True, False]
+    assert first[0].tables == [] and first[0].ocr_key
+    assert first[0].ocr_key == second[0].ocr_key
+
+
+def test_cached_ocr_text_replaces_empty_scan(tmp_path, monkeypatch):
+    monkeypatch.setattr(ocr, "OCR_CACHE_DIR", str(tmp_path / "ocr_cache"))
+    pdf_path = str(_write_scan(tmp_path / "A1.01-SCAN.pdf"))
+    [scan, _] = list(iter_pdf_pages(pdf_path))
+    OcrCache().put(scan.ocr_key, [TextLine(1, "214 CONFERENCE", (100.0, 100.0, 220.0, 112.0))])
+
+    with TextIndex(tmp_path / "text_index.sqlite") as index:
+        raw_content = asyncio.run(extract_text_and_tables_from_pdf(pdf_path, text_index=index))
+        [hit] = index.search("CONFERENCE")
+    assert raw_content.startswith("TEXT:\n214 CONFERENCE\n")
+    assert hit["page"] == 1 and tuple(hit["bbox"]) == (100.0, 100.0, 220.0, 112.0)
+
+
+def test_cached_lines_take_the_requested_page_number(tmp_path):
+    cache = OcrCache(tmp_path / "cache")
+    cache.put("ab12", [TextLine(3, "PANEL LP-1", (10.0, 10.0, 80.0, 20.0))])
+    lines = asyncio.run(ocr.ocr_scanned_page(str(tmp_path / "B.pdf"), 1, "ab12", cache))
+    assert lines == [TextLine(1, "PANEL LP-1", (10.0, 10.0, 80.0, 20.0))]
@@ -0,0 +1,101 @@
+# /tests/test_panel_analytics.py
+
+import json
+import time
+
+import pytest
+
+from utils.panel_analytics import (
+    PanelAnalytics, normalize_panel_name, parse_circuit_number, parse_quantity, write_panel_report
+)
+
+
+def _panel(name, circuits, fed_from=None, voltage="208Y/120V 3PH 4W"):
+    panel = {"panel_name": name, "voltage": voltage, "circuits": circuits}
+    if fed_from:
+        panel["fed_from"] = fed_from
+    return panel
+
+
+def _write(folder, stem, data):
+    path = folder / "Electrical" / f"{stem}_structured.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data))
+    return path
+
+
+def test_parse_quantity():
+    assert parse_quantity("1,200 VA") == 1200
+    assert parse_quantity("3.5 kVA") == 3500
+    assert parse_quantity("20A") == 20
+    assert parse_quantity(180) == 180
+    assert parse_quantity("SPARE") != parse_quantity("SPARE")  # NaN
+
+
+def test_panel_names_match_fed_from_references():
+    assert normalize_panel_name("Panel LP-1") == normalize_panel_name("LP1") == "LP1"
+
+
+def test_phase_loads_follow_circuit_numbering():
+    analytics = PanelAnalytics.from_panels([(_panel("LP-1", [
+        {"circuit": 1, "description": "LIGHTING", "load_va": 1200, "poles": 1},
+        {"circuit": 3, "description": "RECEPTACLES", "load_va": 900, "poles": 1},
+        {"circuit": 5, "description": "RTU-1", "load_va": "6 kVA", "poles": 3},
+        {"circuit": 7, "description": "SPARE", "load_va": "", "poles": 1},
+    ]), "E5.00")])
+    [summary] = analytics.summaries()
+    assert summary.connected_va == 8100
+    # RTU-1 on 5/7/9 lands on C, A and B
+    assert summary.phase_va == [3200, 2900, 2000]
+    assert summary.imbalance_pct == pytest.approx(25.9, abs=0.1)
+    # Largest motor taken at 125 percent
+    assert summary.demand_va == 8100 + 1500
+
+
+def test_explicit_phase_column_wins():
+    analytics = PanelAnalytics.from_panels([(_panel("LP-2", [
+        {"circuit": 1, "description": "HEATER", "va": 2000, "poles": 2, "phase": "B,C"},
+    ]), "E5.01")])
+    assert analytics.summaries()[0].phase_va == [0, 1000, 1000]
+
+
+def test_multi_pole_numbers_and_phase_words():
+    assert [parse_circuit_number(value) for value in ("1,3,5", "2-4-6", "15/13", 7, "SPACE")] == [1, 2, 13, 7, -1]
+    analytics = PanelAnalytics.from_panels([(_panel("LP-3", [
+        # 1,3,5 is circuit 1 (A, B, C), not 135
+        {"circuit": "1,3,5", "description": "RTU-2", "va": 3000, "poles": 3},
+        {"circuit": "2", "description": "HEATER", "va": 600, "poles": 1, "phase": "PHASE B"},
+        {"circuit": "4", "description": "HEATER", "va": 400, "poles": 1, "phase": "PH C"},
+    ]), "E5.02")])
+    assert analytics.summaries()[0].phase_va == [1000, 1600, 1400]
+
+
+def test_receptacle_demand_and_feeder_rollup(tmp_path):
+    _write(tmp_path, "E5.00", {"panels": [
+        _panel("MDP", [{"circuit": 1, "description": "PANEL LP-1", "load_va": 0, "poles": 3}]),
+        _panel("LP-1", [{"circuit": n, "description": "RECEPTACLES", "load_va": 2000, "poles": 1}
+                        for n in range(1, 13)], fed_from="Panel MDP"),
+    ]})
+    _write(tmp_path, "E5.01", _panel("LP-1A", [{"ckt": "1", "load": "LIGHTING", "va": "500"}], fed_from="LP1"))
+
+    report = json.loads(write_panel_report(tmp_path).read_text())
+    panels = {panel["panel"]: panel for panel in report["panels"]}
+    assert panels["LP1"]["connected_va"] == 24000
+    assert panels["LP1"]["demand_va"] == 10000 + 0.5 * 14000
+    assert panels["LP1"]["downstream_connected_va"] == 24500
+    assert panels["MDP"]["downstream_demand_va"] == 17500
+    assert report["feeder_tree"] == {"MDP": {"LP1": {"LP1A": {}}}}
+
+
+def test_thousands_of_circuits_in_milliseconds():
+    panels = [
+        (_panel(f"P{p}", [{"circuit": c, "description": "RECEPTACLES", "load_va": 180 * c, "poles": 1}
+                          for c in range(1, 85)], fed_from=f"P{p // 10}" if p else None), "E5.00")
+        for p in range(100)
+    ]
+    analytics = PanelAnalytics.from_panels(panels)
+    start = time.perf_counter()
+    summaries = analytics.summaries()
+    assert time.perf_counter() - start < 0.5
+    assert analytics.circuit_count == 8400
+    assert summaries[0].downstream_connected_va == pytest.approx(sum(180 * c for c in range(1, 85)) * 100)
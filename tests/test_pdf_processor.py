@@ -0,0 +1,105 @@
+# /tests/test_pdf_processor.py
+
+import asyncio
+import hashlib
+import threading
+from pathlib import Path
+
+import pymupdf
+
+from utils import pdf_processor
+from utils.document_handle import PdfDocumentHandle
+from utils.text_index import TextIndex
+from utils.pdf_processor import aiter_pdf_pages, extract_text_and_tables_from_pdf, iter_pdf_pages
+
+
+def _write_pdf(path: Path, pages: int) -> Path:
+    doc = pymupdf.open()
+    for number in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"SHEET PAGE {number + 1}")
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def test_pages_are_streamed_in_order(tmp_path):
+    pdf = _write_pdf(tmp_path / "E1.0.pdf", 3)
+    pages = list(iter_pdf_pages(str(pdf)))
+    assert [page.page_number for page in pages] == [1, 2, 3]
+    assert "SHEET PAGE 2" in pages[1].text
+    assert not any(page.truncated for page in pages)
+
+
+def test_extraction_stops_at_the_content_limit(tmp_path, monkeypatch):
+    pdf = _write_pdf(tmp_path / "E1.0.pdf", 5)
+    pages = list(iter_pdf_pages(str(pdf), max_chars=20))
+    assert len(pages) == 2
+    assert pages[-1].truncated
+
+    # The cut is stated in the content, and the text index still gets every page
+    monkeypatch.setattr(pdf_processor, "MAX_EXTRACTED_CHARS_PER_FILE", 20)
+    with TextIndex(tmp_path / "text_index.sqlite") as index:
+        content = asyncio.run(extract_text_and_tables_from_pdf(str(pdf), text_index=index))
+        assert "SHEET PAGE 2" in content and "SHEET PAGE 3" not in content
+        assert "Content truncated after page 2" in content
+        assert [hit["page"] for hit in index.search("SHEET PAGE 5")] == [5]
+
+
+def test_async_stream_closes_document_when_abandoned(tmp_path):
+    pdf = _write_pdf(tmp_path / "E1.0.pdf", 3)
+
+    async def first_page():
+        stream = aiter_pdf_pages(pdf)
+        async for page in stream:
+            await stream.aclose()
+            return page
+
+    assert asyncio.run(first_page()).page_number == 1
+    # The file is no longer held open, so it can be replaced
+    _write_pdf(tmp_path / "E1.0.pdf", 1)
+
+
+def test_legacy_extraction_format(tmp_path):
+    pdf = _write_pdf(tmp_path / "E1.0.pdf", 2)
+    content = asyncio.run(extract_text_and_tables_from_pdf(str(pdf)))
+    assert content.count("TEXT:\n") == 2
+    assert content.index("SHEET PAGE 1") < content.index("SHEET PAGE 2")
+
+
+def test_document_handle_shares_one_buffer(tmp_path):
+    pdf = _write_pdf(tmp_path / "E1.0.pdf", 2)
+    with PdfDocumentHandle(pdf) as handle:
+        assert handle.sha256() == hashlib.sha256(pdf.read_bytes()).hexdigest()
+        assert handle.data() is handle.data()
+        pages = list(iter_pdf_pages(handle))
+    assert [page.page_number for page in pages] == [1, 2]
+
+
+def test_document_handle_opens_large_files_from_disk(tmp_path):
+    pdf = _write_pdf(tmp_path / "E1.0.pdf", 1)
+    with PdfDocumentHandle(pdf, max_shared_bytes=1) as handle:
+        assert not handle.shares_buffer
+        with handle.open_pymupdf() as doc:
+            assert doc.page_count == 1
+
+
+def test_document_handle_opens_off_the_event_loop(tmp_path, monkeypatch):
+    pdf = _write_pdf(tmp_path / "E1.0.pdf", 1)
+    opened_on = []
+    original_init = PdfDocumentHandle.__init__
+
+    def recording_init(self, *args, **kwargs):
+        opened_on.append(threading.get_ident())
+        original_init(self, *args, **kwargs)
+
+    monkeypatch.setattr(PdfDocumentHandle, "__init__", recording_init)
+
+    async def open_handle():
+        async with await PdfDocumentHandle.open_async(pdf) as handle:
+            assert handle.size == pdf.stat().st_size
+        return handle
+
+    handle = asyncio.run(open_handle())
+    assert opened_on and opened_on[0] != threading.get_ident()
+    assert handle._map is None
@@ -0,0 +1,60 @@
+# /tests/test_progress.py
+
+import io
+import asyncio
+
+from utils import progress as progress_module
+from utils.progress import JobProgress
+from utils.tracing import Span
+
+
+def test_line_aggregates_pipeline_events():
+    progress = JobProgress(io.StringIO(), interactive=False)
+    progress.set_total(4)
+    for name in ("A2.0.pdf", "E5.00.pdf", "E2.1.pdf"):
+        progress.file_started(name)
+    progress.file_finished("A2.0.pdf", True)
+    progress.file_finished("E5.00.pdf", False)
+    progress.on_span(Span("extract", 0.0, 1.0))
+    progress.on_span(Span("gpt_request", 0.0, 1.0, attrs={"input_tokens": 900, "output_tokens": 100}))
+    progress.on_span(Span("gpt_request", 0.0, 1.0, attrs={"error": "RateLimitError"}))
+
+    line = progress.render()
+    assert line.startswith("Files 2/4 (1 failed) | 1 in flight | extract 1 gpt 1 | ")
+    assert "tok/s" in line and "ETA " in line and "ETA --" not in line
+    assert line.endswith("errors: gpt_request 1")
+    assert progress.tokens == 1000
+
+
+def _run(progress, events):
+    async def job():
+        async with progress:
+            for i in range(events):
+                progress.file_started(f"{i}.pdf")
+                progress.file_finished(f"{i}.pdf", True)
+                await asyncio.sleep(0.001)
+    asyncio.run(job())
+
+
+def test_terminal_redraws_in_place_on_a_timer(monkeypatch):
+    monkeypatch.setattr(progress_module, "PROGRESS_REFRESH_INTERVAL", 0.05)
+    stream = io.StringIO()
+    progress = JobProgress(stream, interactive=True)
+    progress.set_total(200)
+    _run(progress, 200)
+    output = stream.getvalue()
+    # Far fewer redraws than events, all on one line
+    assert 1 <= output.count("\r\x1b[2K") < 50
+    assert output.count("\n") == 1 and "Files 200/200" in output
+
+
+def test_plain_summaries_without_a_terminal(monkeypatch):
+    monkeypatch.setattr(progress_module, "PROGRESS_SUMMARY_INTERVAL", 0.05)
+    stream = io.StringIO()
+    progress = JobProgress(stream, interactive=False)
+    progress.set_total(100)
+    _run(progress, 100)
+    output = stream.getvalue()
+    assert "\r" not in output and "\x1b" not in output
+    lines = output.splitlines()
+    assert lines[-1].startswith("[0m00s] Files 100/100 | 0 in flight")
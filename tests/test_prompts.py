@@ -0,0 +1,45 @@
+# /tests/test_prompts.py
+
+from types import SimpleNamespace
+
+from utils.drawing_processor import DrawingProcessor
+from utils.prompts import PromptBuilder, cached_tokens
+from utils.metrics import record_span, prompt_cache_hit_rate, INPUT_TOKENS, CACHED_INPUT_TOKENS
+from utils.tracing import Span
+
+
+def test_system_prompt_is_byte_identical_across_sheets():
+    prompts = PromptBuilder({"job": "Electric Shuffle", "client": "ACME"})
+    first = prompts.messages("TEXT:\nE1.01 LIGHTING PLAN", "Electrical")
+    second = prompts.messages("TEXT:\nE2.01 POWER PLAN", "Electrical")
+    assert first[0]["content"].encode() == second[0]["content"].encode()
+    assert first[1]["content"] != second[1]["content"]
+    # Context given in any order serializes the same
+    reordered = PromptBuilder({"client": "ACME", "job": "Electric Shuffle"})
+    assert reordered.system_prompt("Electrical") == prompts.system_prompt("Electrical")
+    # Every type starts with the shared prefix; only the type instructions differ
+    for drawing_type in ("Architectural", "Mechanical", "Unknown"):
+        assert prompts.system_prompt(drawing_type).startswith(prompts.shared_prefix)
+
+
+def test_processor_requests_share_the_prefix():
+    processor = DrawingProcessor.__new__(DrawingProcessor)
+    processor.prompts = PromptBuilder({"job": "Electric Shuffle"})
+    request = processor.chat_request({"text_blocks": [{"content": "RTU-3"}]}, "Mechanical")
+    system, user = request["messages"]
+    assert system["content"] == processor.prompts.system_prompt("Mechanical")
+    assert "RTU-3" in user["content"]
+
+
+def test_cached_tokens_reported_from_usage():
+    assert cached_tokens({"prompt_tokens": 2000, "prompt_tokens_details": {"cached_tokens": 1536}}) == 1536
+    assert cached_tokens(SimpleNamespace(prompt_tokens_details=SimpleNamespace(cached_tokens=1024))) == 1024
+    assert cached_tokens(SimpleNamespace(prompt_tokens_details=None)) == 0
+
+    input_before, cached_before = INPUT_TOKENS.total(), CACHED_INPUT_TOKENS.total()
+    span = Span("gpt_request", 0.0, 1.0)
+    span.set(input_tokens=2000, cached_tokens=1536, output_tokens=100)
+    record_span(span)
+    assert INPUT_TOKENS.total() - input_before == 2000
+    assert CACHED_INPUT_TOKENS.total() - cached_before == 1536
+    assert 0 < prompt_cache_hit_rate() <= 1
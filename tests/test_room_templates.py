@@ -0,0 +1,50 @@
+# /tests/test_room_templates.py
+
+import json
+
+from templates.room_templates import RoomRegistry, load_template, process_architectural_drawing
+
+FLOOR_PLAN = {
+    "metadata": {"project": "ELECTRIC SHUFFLE", "floor_number": "1"},
+    "rooms": [
+        {"number": "101", "name": "LOBBY", "ceiling_height": "10'-0\""},
+        {"number": "102", "name": "BAR"},
+    ],
+}
+
+
+def test_templates_are_independent_copies():
+    first = load_template('e_rooms')
+    first['circuits']['lighting'].append("LP-1/1")
+    assert load_template('e_rooms')['circuits']['lighting'] == []
+
+
+def test_rooms_join_across_disciplines_in_any_order(tmp_path):
+    registry = RoomRegistry()
+    registry.add({"rooms": [{"room_number": "Rm 101", "circuits": {"lighting": ["LP-1/1"]}}]},
+                 'Electrical', 'E1.01.pdf')
+    registry.add({"equipment": [{"tag": "EF-1", "description": "Exhaust fan", "location": "102"}]},
+                 'Mechanical', 'M1.01.pdf')
+    registry.add(FLOOR_PLAN, 'Architectural', 'A1.01.pdf')
+    registry.add({"rooms": [{"number": "101", "circuits": {"lighting": ["LP-1/3"]}}]},
+                 'Electrical', 'E1.02.pdf')
+
+    [e_file, a_file] = registry.write(tmp_path)
+    e_rooms = {room['room_id']: room for room in json.loads(open(e_file).read())['rooms']}
+    assert e_file.endswith('e_rooms_details_floor_1.json')
+    assert set(e_rooms) == {"Room_101", "Room_102"}
+    lobby = e_rooms["Room_101"]
+    assert lobby['room_name'] == "LOBBY_101"
+    assert lobby['circuits']['lighting'] == ["LP-1/1", "LP-1/3"]
+    assert lobby['source_sheets'] == ['A1.01.pdf', 'E1.01.pdf', 'E1.02.pdf']
+    assert e_rooms["Room_102"]['mechanical_equipment'] == [{"tag": "EF-1", "description": "Exhaust fan"}]
+    a_rooms = json.loads(open(a_file).read())
+    assert a_rooms['project_name'] == "ELECTRIC SHUFFLE"
+    assert [room['ceiling_height'] for room in a_rooms['rooms']] == ["10'-0\"", ""]
+
+
+def test_single_drawing_keeps_its_output_files(tmp_path):
+    result = process_architectural_drawing(FLOOR_PLAN, "A1.01-REFLECTED CEILING PLAN.pdf", str(tmp_path))
+    assert result['is_reflected_ceiling']
+    rooms = json.loads(open(result['a_rooms_file']).read())['rooms']
+    assert [room['room_name'] for room in rooms] == ["LOBBY_101", "BAR_102"]
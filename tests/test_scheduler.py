@@ -0,0 +1,101 @@
+# /tests/test_scheduler.py
+
+import asyncio
+from pathlib import Path
+
+import pymupdf
+
+from utils.file_utils import discover_pdf_files, traverse_job_folder
+from utils.scheduler import (
+    JobQueue,
+    ScheduledFile,
+    estimate_cost,
+    order_files,
+    POLICY_FIFO,
+)
+
+
+def _write_pdf(path: Path, pages: int) -> Path:
+    doc = pymupdf.open()
+    for _ in range(pages):
+        doc.new_page()
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def _item(name: str, cost: float, panel: bool = False) -> ScheduledFile:
+    return ScheduledFile(Path(name), "General", panel, 0, 1, cost)
+
+
+def test_estimate_cost_uses_page_count_and_type(tmp_path):
+    small = _write_pdf(tmp_path / "M1.0-PLAN.pdf", 1)
+    large = _write_pdf(tmp_path / "A1.0-PLAN.pdf", 20)
+
+    small_estimate = estimate_cost(small, "Mechanical", False)
+    large_estimate = estimate_cost(large, "Architectural", False)
+
+    assert small_estimate.page_count == 1
+    assert large_estimate.page_count == 20
+    assert large_estimate.estimated_cost > small_estimate.estimated_cost
+
+
+def test_longest_first_ordering():
+    files = [_item("a.pdf", 1.0), _item("b.pdf", 10.0), _item("c.pdf", 5.0)]
+    ordered = order_files(files)
+    assert [f.path.name for f in ordered] == ["b.pdf", "c.pdf", "a.pdf"]
+
+
+def test_panel_schedule_priority_keeps_policy_order():
+    files = [
+        _item("big.pdf", 50.0),
+        _item("panel-small.pdf", 2.0, panel=True),
+        _item("panel-big.pdf", 8.0, panel=True),
+    ]
+    ordered = order_files(files, prioritize_panel_schedules=True)
+    assert [f.path.name for f in ordered] == ["panel-big.pdf", "panel-small.pdf", "big.pdf"]
+
+
+def test_fifo_keeps_discovery_order():
+    files = [_item("a.pdf", 1.0), _item("b.pdf", 10.0), _item("c.pdf", 5.0)]
+    ordered = order_files(files, policy=POLICY_FIFO)
+    assert [f.path.name for f in ordered] == ["a.pdf", "b.pdf", "c.pdf"]
+
+
+def test_job_queue_orders_items_added_while_running():
+    async def run():
+        queue = JobQueue(prioritize_panel_schedules=True)
+        queue.put(_item("small.pdf", 1.0))
+        queue.put(_item("large.pdf", 9.0))
+        queue.put(_item("panel.pdf", 0.5, panel=True))
+        queue.close()
+        names = []
+        while (item := await queue.get()) is not None:
+            names.append(item.path.name)
+        # A closed, drained queue keeps returning None to every worker
+        assert await queue.get() is None
+        return names
+
+    assert asyncio.run(run()) == ["panel.pdf", "large.pdf", "small.pdf"]
+
+
+def test_discovery_streams_classified_files(tmp_path):
+    (tmp_path / "Electrical").mkdir()
+    (tmp_path / "Architectural" / "Plans").mkdir(parents=True)
+    _write_pdf(tmp_path / "Electrical" / "E5.00-PANEL-SCHEDULES.pdf", 1)
+    _write_pdf(tmp_path / "Architectural" / "Plans" / "A1.0-PLAN.pdf", 1)
+    (tmp_path / "Electrical" / "notes.txt").write_text("not a drawing")
+
+    async def run():
+        return [
+            item async for item in discover_pdf_files(
+                tmp_path, lambda p: p.name[0], lambda p: "PANEL" in p
+            )
+        ]
+
+    found = asyncio.run(run())
+    assert [(path.name, dtype, panel) for path, dtype, panel in found] == [
+        ("A1.0-PLAN.pdf", "A", False),
+        ("E5.00-PANEL-SCHEDULES.pdf", "E", True),
+    ]
+    assert sorted(traverse_job_folder(str(tmp_path))) == sorted(str(path) for path, _, _ in found)
@@ -0,0 +1,82 @@
+# /tests/test_sheet_index.py
+
+import asyncio
+
+import pymupdf
+
+from main import get_drawing_type, is_panel_schedule_file
+from utils.classifier import PREFIX_DRAWING_TYPES
+from utils.sheet_index import (
+    DISCIPLINE_HEADINGS, classify_sheet_title, find_cover_sheet, load_sheet_index, read_sheet_index
+)
+
+
+def _write_cover_sheet(path):
+    doc = pymupdf.open()
+    page = doc.new_page(width=1224, height=792)
+    page.insert_text((40, 40), "PROJECT COVER SHEET", fontsize=16)
+    page.insert_text((40, 80), "SHEET INDEX", fontsize=10)
+    rows = [
+        # Two index columns, each with discipline headings and a revision column
+        (40, 100, "GENERAL", None, None), (40, 112, "G0.0", "COVER SHEET", "1"),
+        (40, 136, "ARCHITECTURAL", None, None), (40, 148, "A2.0", "FLOOR PLAN", "1"),
+        (40, 160, "A6.0", "ROOM FINISH SCHEDULE", "2"),
+        (400, 100, "ELECTRICAL", None, None), (400, 112, "E-2.1", "POWER PLAN", "1"),
+        (400, 124, "E6.01", "PANELBOARD SCHEDULES", "3"),
+        (400, 136, "E1.0", "ELECTRICAL SCHEDULES", "0"),
+        (400, 148, "TECHNOLOGY", None, None), (400, 160, "T1.0", "DATA PLAN", "1"),
+    ]
+    for x, y, first, title, revision in rows:
+        page.insert_text((x, y), first, fontsize=8)
+        if title:
+            page.insert_text((x + 50, y), title, fontsize=8)
+            page.insert_text((x + 250, y), revision, fontsize=8)
+    page.insert_text((1100, 760), "G0.0", fontsize=20)
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def test_parses_index_columns_and_headings(tmp_path):
+    entries = read_sheet_index(_write_cover_sheet(tmp_path / "G0.0-COVER-SHEET.pdf"))
+    assert set(entries) == {"G0.0", "A2.0", "A6.0", "E2.1", "E6.01", "E1.0", "T1.0"}
+    assert (entries["E2.1"].sheet_number, entries["E2.1"].title) == ("E-2.1", "POWER PLAN")
+    assert [(entries[n].discipline, entries[n].sheet_class) for n in ("A6.0", "E6.01", "T1.0")] == [
+        ("Architectural", "schedule"), ("Electrical", "panel_schedule"), ("Low Voltage", "plan")
+    ]
+    assert classify_sheet_title("ELECTRICAL ONE-LINE DIAGRAM") == "riser"
+
+
+def test_router_prefers_the_index(tmp_path):
+    _write_cover_sheet(tmp_path / "G0.0-COVER-SHEET.pdf")
+    sheet_index = asyncio.run(load_sheet_index(tmp_path))
+    router = sheet_index.router(get_drawing_type, is_panel_schedule_file)
+    assert sheet_index.source.name == "G0.0-COVER-SHEET.pdf"
+
+    # Listed panel schedules go to Document Intelligence whatever the file is called
+    assert router.is_panel_schedule("E6.01-SCHEDULES.pdf")
+    assert not router.is_panel_schedule("A6.0-ROOM-FINISH-SCHEDULE.pdf")
+    # Listed as a plain schedule, but the name rule still sends it to Document Intelligence
+    assert router.sheet_index.lookup("E1.0-ELECTRICAL-SCHEDULES-Rev.0.pdf").sheet_class == "schedule"
+    assert router.is_panel_schedule("E1.0-ELECTRICAL-SCHEDULES-Rev.0.pdf")
+    assert router.drawing_type("T1.0-DATA-PLAN.pdf") == "Low Voltage"
+    assert get_drawing_type(tmp_path / "T1.0-DATA-PLAN.pdf") == "General"
+    # Sheets the index doesn't list are routed by file name
+    assert router.is_panel_schedule("E5.00-PANEL-SCHEDULES-Rev.3.pdf")
+    assert router.drawing_type("M1.0-HVAC-PLAN.pdf") == "Mechanical"
+
+
+def test_job_without_cover_sheet(tmp_path):
+    sheet_index = asyncio.run(load_sheet_index(tmp_path))
+    assert len(sheet_index) == 0 and sheet_index.source is None
+
+
+def test_cover_sheet_search_stays_near_the_root(tmp_path):
+    deep = tmp_path / "Archive" / "2023"
+    deep.mkdir(parents=True)
+    _write_cover_sheet(deep / "G0.0-COVER-SHEET.pdf")
+    assert find_cover_sheet(tmp_path) is None
+    _write_cover_sheet(tmp_path / "Archive" / "G0.0-COVER-SHEET.pdf")
+    assert find_cover_sheet(tmp_path) == tmp_path / "Archive" / "G0.0-COVER-SHEET.pdf"
+    # Every discipline heading maps to a drawing type the classifier and prompts know
+    assert {discipline for _, discipline in DISCIPLINE_HEADINGS} <= set(PREFIX_DRAWING_TYPES.values()) | {"General"}
@@ -0,0 +1,41 @@
+# /tests/test_startup.py
+
+import sys
+import subprocess
+from pathlib import Path
+
+from benchmarks.import_time import measure_import
+
+ROOT = Path(__file__).parent.parent
+
+
+def _loaded_after(code):
+    result = subprocess.run(
+        [sys.executable, "-c", code + "; import sys; print(' '.join(sorted(sys.modules)))"],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return set(result.stdout.split())
+
+
+def test_cli_import_loads_no_sdk():
+    report = measure_import("main", runs=1)
+    assert report["heavy_modules_loaded"] == []
+    assert report["median_ms"] > 0 and "utils.pdf_processor" in report["slowest_imports_ms"]
+
+
+def test_pdf_processor_does_not_import_drawing_processor():
+    modules = _loaded_after("import utils.pdf_processor")
+    assert "utils.drawing_processor" not in modules
+
+
+def test_azure_sdk_loads_with_the_first_analysis():
+    modules = _loaded_after(
+        "from utils.drawing_processor import DrawingProcessor; "
+        "DrawingProcessor('https://example.invalid', 'key')"
+    )
+    assert not any(name.startswith(("azure", "openai")) for name in modules)
+    modules = _loaded_after(
+        "from utils.drawing_processor import DrawingProcessor; "
+        "DrawingProcessor('https://example.invalid', 'key').client"
+    )
+    assert "azure.ai.documentintelligence.aio" in modules
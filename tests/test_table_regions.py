@@ -0,0 +1,72 @@
+# /tests/test_table_regions.py
+
+import random
+
+import pymupdf
+
+from utils.table_regions import find_table_regions, find_tables_selectively
+
+SHEET = pymupdf.Rect(0, 0, 2592, 1728)  # 36 x 24 in
+
+
+def _plan_page(doc: pymupdf.Document, seed: int = 0) -> pymupdf.Page:
+    """A sheet of short wall segments and room tags with no tables."""
+    rng = random.Random(seed)
+    page = doc.new_page(width=SHEET.width, height=SHEET.height)
+    shape = page.new_shape()
+    for _ in range(2000):
+        x, y = rng.uniform(20, 2400), rng.uniform(20, 1700)
+        if rng.random() < 0.5:
+            shape.draw_line((x, y), (x + rng.uniform(5, 120), y))
+        else:
+            shape.draw_line((x, y), (x, y + rng.uniform(5, 120)))
+    shape.finish(width=0.3)
+    shape.commit()
+    for tag in range(40):
+        page.insert_text((rng.uniform(30, 2400), rng.uniform(30, 1700)), f"OFFICE {100 + tag}", fontsize=6)
+    return page
+
+
+def _ruled_table(page: pymupdf.Page, x: float, y: float, rows: int = 10) -> pymupdf.Rect:
+    widths = [30, 120, 50]
+    right, bottom = x + sum(widths), y + rows * 12
+    page.insert_text((x, y - 8), "LIGHTING FIXTURE SCHEDULE", fontsize=8)
+    for row in range(rows + 1):
+        page.draw_line((x, y + row * 12), (right, y + row * 12), width=0.5)
+    column_x = x
+    for width in widths + [0]:
+        page.draw_line((column_x, y), (column_x, bottom), width=0.5)
+        column_x += width
+    for row in range(rows):
+        column_x = x
+        for width, text in zip(widths, [f"A{row}", "LED TROFFER", "40"]):
+            page.insert_text((column_x + 2, y + row * 12 + 9), text, fontsize=6)
+            column_x += width
+    return pymupdf.Rect(x, y, right, bottom)
+
+
+def test_plan_sheet_without_tables_is_skipped():
+    with pymupdf.open() as doc:
+        page = _plan_page(doc)
+        assert find_tables_selectively(page) == ([], 0)
+
+
+def test_table_region_is_clipped_to_the_table():
+    with pymupdf.open() as doc:
+        page = doc.new_page(width=SHEET.width, height=SHEET.height)
+        table_rect = _ruled_table(page, 2200, 100)
+        regions = find_table_regions(page)
+        assert len(regions) == 1
+        assert regions[0].contains(table_rect)
+        assert regions[0].get_area() < SHEET.get_area() / 10
+
+        tables, searches = find_tables_selectively(page)
+        assert searches == 1
+        assert [t.to_markdown() for t in tables] == [t.to_markdown() for t in page.find_tables()]
+
+
+def test_schedule_title_without_rulings_searches_whole_page():
+    with pymupdf.open() as doc:
+        page = doc.new_page()
+        page.insert_text((72, 72), "PANEL SCHEDULE LP-1", fontsize=10)
+        assert find_table_regions(page) == [page.rect]
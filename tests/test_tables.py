@@ -0,0 +1,95 @@
+# /tests/test_tables.py
+
+import json
+
+import pymupdf
+
+from utils.tables import ColumnarTable, json_default
+
+PANEL_ROWS = [
+    ["CKT", "DESCRIPTION", "VA", "BREAKER"],
+    ["1", "LIGHTING", "1200", "20A"],
+    ["3", "RECEPTACLES", "720", "20A"],
+    ["5", "RTU-1", "4800", None],
+]
+
+
+def test_row_and_column_access():
+    table = ColumnarTable.from_rows(PANEL_ROWS)
+    assert table.header_rows == 1
+    assert table.header == ["CKT", "DESCRIPTION", "VA", "BREAKER"]
+    assert table.column(2) == ["VA", "1200", "720", "4800"]
+    assert table.row(3) == ["5", "RTU-1", "4800", ""]
+    # The missing breaker is covered by the merged cell to its left
+    assert table.is_spanned(3, 3)
+    assert table.row(3, fill_spans=True) == ["5", "RTU-1", "4800", "4800"]
+    assert table.spans() == [(3, 2, 1, 2)]
+
+
+def test_repeated_values_are_stored_once():
+    table = ColumnarTable.from_rows([["CKT", "BREAKER"]] + [[str(n), "20" + "A"] for n in range(1, 50)])
+    assert len({id(value) for value in table.column(1)[1:]}) == 1
+
+
+def test_azure_header_cells_and_spans():
+    table = ColumnarTable.from_azure({
+        "rowCount": 3,
+        "columnCount": 2,
+        "cells": [
+            {"kind": "columnHeader", "rowIndex": 0, "columnIndex": 0, "content": "PANEL LP-1", "columnSpan": 2},
+            {"kind": "columnHeader", "rowIndex": 1, "columnIndex": 0, "content": "CKT"},
+            {"kind": "columnHeader", "rowIndex": 1, "columnIndex": 1, "content": "VA"},
+            {"rowIndex": 2, "columnIndex": 0, "content": "1"},
+            {"rowIndex": 2, "columnIndex": 1, "content": "180"},
+        ],
+    })
+    assert table.header_rows == 2
+    assert table.header == ["PANEL LP-1 CKT", "PANEL LP-1 VA"]
+    assert table.records() == [{"PANEL LP-1 CKT": "1", "PANEL LP-1 VA": "180"}]
+
+
+def test_conversions():
+    table = ColumnarTable.from_rows([["TAG", "NOTES"], ["A1", "2x4 | recessed"], ["A2", "12"]])
+    assert table.to_markdown() == "|TAG|NOTES|\n|---|---|\n|A1|2x4 \\| recessed|\n|A2|12|\n"
+    assert table.to_csv() == "TAG,NOTES\nA1,2x4 | recessed\nA2,12\n"
+    assert json.loads(json.dumps({"tables": [table]}, default=json_default)) == {"tables": [{
+        "row_count": 3, "column_count": 2, "header": ["TAG", "NOTES"],
+        "rows": [["A1", "2x4 | recessed"], ["A2", "12"]],
+    }]}
+
+
+def test_pymupdf_table_round_trip():
+    with pymupdf.open() as doc:
+        page = doc.new_page()
+        for row in range(4):
+            page.draw_line((72, 72 + row * 20), (272, 72 + row * 20))
+        for x in (72, 172, 272):
+            page.draw_line((x, 72), (x, 132))
+        for row, (tag, watts) in enumerate([("TAG", "WATTS"), ("A1", "40"), ("A2", "32")]):
+            page.insert_text((76, 86 + row * 20), tag)
+            page.insert_text((176, 86 + row * 20), watts)
+        table = ColumnarTable.from_rows(page.find_tables().tables[0].extract())
+    assert table.header == ["TAG", "WATTS"]
+    assert table.column(1) == ["WATTS", "40", "32"]
+
+
+def test_vertically_merged_cell_fills_from_above():
+    with pymupdf.open() as doc:
+        page = doc.new_page()
+        for row in range(4):
+            # No rule under the first circuit's breaker: it spans both circuits
+            page.draw_line((72, 72 + row * 20), (222 if row == 2 else 272, 72 + row * 20))
+        for x in (72, 122, 222, 272):
+            page.draw_line((x, 72), (x, 132))
+        for row, values in enumerate([("CKT", "DESC", "BKR"), ("1", "LIGHTS", "20/2"), ("3", "LIGHTS 2", "")]):
+            for x, value in zip((72, 122, 222), values):
+                page.insert_text((x + 4, 86 + row * 20), value)
+        found = page.find_tables().tables[0]
+        rows = found.extract()
+        table = ColumnarTable.from_pymupdf(found)
+    assert rows[2] == ["3", "LIGHTS 2", None]
+    assert table.row(2, fill_spans=True) == ["3", "LIGHTS 2", "20/2"]
+    assert table.spans() == [(1, 2, 2, 1)]
+    assert table.to_csv().splitlines()[-1] == "3,LIGHTS 2,20/2"
+    # Without the boxes, the left neighbour is the best guess
+    assert ColumnarTable.from_rows(rows).row(2, fill_spans=True)[2] == "LIGHTS 2"
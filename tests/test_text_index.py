@@ -0,0 +1,72 @@
+# /tests/test_text_index.py
+
+import asyncio
+import time
+from pathlib import Path
+
+import main
+from utils.pdf_processor import extract_text_and_tables_from_pdf
+from utils.text_index import TextIndex, TextLine, read_text_lines, to_fts_query
+
+PANEL_SCHEDULES = Path(__file__).parent.parent / "data" / "E5.00-PANEL-SCHEDULES-Rev.3.pdf"
+
+
+def test_plain_queries_become_phrases():
+    assert to_fts_query("RTU-3 GFCI") == '"RTU-3" "GFCI"'
+    assert to_fts_query('PANEL (E) 3/4"') == '"PANEL" "(E)" "3/4"""'
+    assert to_fts_query("GFCI OR AFCI", raw=True) == "GFCI OR AFCI"
+
+
+def test_drawing_text_that_looks_like_syntax_is_searchable(tmp_path, capsys):
+    with TextIndex(tmp_path / "text_index.sqlite") as index:
+        for query in ('3/4"', "DO NOT", "PANEL (E)", "NOTE: A"):
+            assert index.search(query) == []
+    # Malformed FTS5 syntax is a one-line error, not a traceback
+    assert main.search_command([str(tmp_path), "GFCI AND", "--fts"]) == 1
+    assert "Invalid search query" in capsys.readouterr().out
+
+
+def test_extraction_indexes_lines_with_positions(tmp_path):
+    with TextIndex(tmp_path / "text_index.sqlite") as index:
+        asyncio.run(extract_text_and_tables_from_pdf(str(PANEL_SCHEDULES), text_index=index))
+        [hit] = index.search("Total Est. Demand", limit=1)
+    assert hit["sheet_number"] == "E5.00"
+    assert hit["page"] == 1
+    x0, y0, x1, y1 = hit["bbox"]
+    assert x0 < x1 and y0 < y1
+    assert "[Demand]" in hit["snippet"]
+
+
+def test_reindexing_replaces_a_file(tmp_path):
+    with TextIndex(tmp_path / "text_index.sqlite") as index:
+        index.index_file("job/E1.0-SCHEDULES.pdf", [TextLine(1, "GFCI RECEPTACLE", (0, 0, 10, 10))])
+        index.index_file("job/E1.0-SCHEDULES.pdf", [TextLine(1, "WEATHERPROOF RECEPTACLE", (0, 0, 10, 10))])
+        assert index.sheet_count() == 1
+        assert index.search("GFCI") == []
+        assert [hit["sheet_number"] for hit in index.search("receptacle", sheet="e1")] == ["E1.0"]
+
+
+def test_blank_queries_and_wildcard_sheet_prefixes_match_nothing(tmp_path):
+    with TextIndex(tmp_path / "text_index.sqlite") as index:
+        index.index_file("job/E1.0-SCHEDULES.pdf", [TextLine(1, "GFCI RECEPTACLE", (0, 0, 10, 10))])
+        for query in ("", "   ", "\t"):
+            assert index.search(query) == [] and index.search(query, raw=True) == []
+        # % and _ in a sheet prefix are literal characters, not LIKE wildcards
+        assert index.search("GFCI", sheet="%") == [] and index.search("GFCI", sheet="E_") == []
+        assert len(index.search("GFCI", sheet="E1.")) == 1
+
+
+def test_search_is_fast_on_a_large_job(tmp_path):
+    lines = read_text_lines(str(PANEL_SCHEDULES))
+    with TextIndex(tmp_path / "text_index.sqlite") as index:
+        for sheet in range(1000):
+            page_lines = lines[(sheet * 7) % 1000:][:100]
+            index.index_file(f"job/E{sheet}.00-POWER-PLAN.pdf", page_lines + [
+                TextLine(1, f"RTU-{sheet} ON ROOF", (10, 10, 90, 20))
+            ])
+        start = time.perf_counter()
+        hits = index.search("RTU-421")
+        common = index.search("VA", limit=100)
+        assert time.perf_counter() - start < 1.0
+    assert [hit["sheet_number"] for hit in hits] == ["E421.00"]
+    assert len(common) == 100
@@ -0,0 +1,83 @@
+# /tests/test_title_block.py
+
+from pathlib import Path
+
+import pymupdf
+
+from utils.title_block import TitleBlockLocator, merge_title_block, sheet_key
+
+DATA = Path(__file__).parent.parent / "data"
+
+
+def test_reads_rotated_title_strip():
+    fields = TitleBlockLocator().read(str(DATA / "E5.00-PANEL-SCHEDULES-Rev.3.pdf"))
+    assert fields["drawing_number"] == "E5.00"
+    assert fields["title"] == "PANEL SCHEDULES"
+    assert fields["project"] == "ELECTRIC SHUFFLE"
+    assert fields["job_number"] == "30J7925"
+    # Latest row of the revision table
+    assert (fields["revision"], fields["date"]) == ("3", "08/15/2024")
+
+
+def test_reads_labelled_fields():
+    fields = TitleBlockLocator().read(str(DATA / "E1.0-ELECTRICAL-SCHEDULES-Rev.0.pdf"))
+    assert fields["drawing_number"] == "E1.0"
+    assert fields["title"] == "ELECTRICAL SCHEDULES"
+    assert fields["job_number"] == "22080.005"
+    assert fields["scale"] == '1/8" = 1\' 0"'
+    assert fields["revision"] == "01"
+
+
+def test_region_is_learned_once(tmp_path):
+    locator = TitleBlockLocator()
+    locator.read(str(DATA / "E5.00-PANEL-SCHEDULES-Rev.3.pdf"))
+    region = locator.region
+
+    # A smaller sheet of the same set without labels: fields come from the learned region
+    path = tmp_path / "E2.01-POWER-PLAN.pdf"
+    doc = pymupdf.open()
+    page = doc.new_page(width=1296, height=864)
+    page.insert_text((1200, 800), "E2.01", fontsize=20)
+    page.insert_text((1200, 830), "POWER PLAN", fontsize=10)
+    page.insert_text((100, 800), "E9.99", fontsize=30)  # a tag in the drawing area
+    doc.save(path)
+    doc.close()
+
+    fields = locator.read(str(path))
+    assert locator.region == region
+    assert fields["drawing_number"] == "E2.01"
+    assert fields["title"] == "POWER PLAN"
+    assert locator.fields(path) == fields
+
+
+def test_labelled_fields_win_in_metadata():
+    data = {"metadata": {"drawing_number": "E5.0", "scale": "NTS", "project": "ELECTRIC SHUFFLE"}, "panels": []}
+    fields = {"drawing_number": "E5.00", "revision": "3", "project": "FSG ELECTRICAL"}
+    # The project is a layout guess: the model's value stands, and guesses only fill gaps
+    merge_title_block(data, fields, labelled={"drawing_number"})
+    assert data["metadata"] == {
+        "drawing_number": "E5.00", "scale": "NTS", "project": "ELECTRIC SHUFFLE", "revision": "3"
+    }
+    assert sheet_key(fields) == "E5.00@3"
+
+
+def _labelled_sheet(path, origin, step):
+    doc = pymupdf.open()
+    page = doc.new_page(width=1296, height=864)
+    for i, text in enumerate(("PROJECT: TOWER", "JOB NO: 1234", "DATE: 01/15/2025")):
+        page.insert_text((origin[0] + step[0] * i, origin[1] + step[1] * i), text, fontsize=8)
+    doc.save(path)
+    doc.close()
+    return str(path)
+
+
+def test_region_is_relearned_when_it_reads_no_labels(tmp_path):
+    locator = TitleBlockLocator()
+    # A spec sheet with its labels down the right edge sets the first region
+    locator.read(_labelled_sheet(tmp_path / "G0.1-SPECIFICATIONS.pdf", (1150, 100), (0, 20)))
+    first = locator.region
+    # The drawing sets put them in a strip along the bottom, outside that region
+    fields = locator.read(_labelled_sheet(tmp_path / "E2.01-POWER-PLAN.pdf", (300, 820), (250, 0)))
+    assert locator.region != first
+    assert (fields["project"], fields["job_number"]) == ("TOWER", "1234")
+    assert {"project", "job_number"} <= locator.labelled(tmp_path / "E2.01-POWER-PLAN.pdf")
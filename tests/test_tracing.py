@@ -0,0 +1,48 @@
+# /tests/test_tracing.py
+
+import json
+
+import pytest
+
+from utils.tracing import Tracer
+
+
+def test_spans_are_grouped_per_file_in_chrome_trace(tmp_path):
+    tracer = Tracer()
+    with tracer.file_context("/job/E1.0.pdf"):
+        with tracer.span("extract") as span:
+            span.set(bytes=1024)
+    with tracer.file_context("/job/A1.0.pdf"):
+        with tracer.span("extract"):
+            pass
+    with tracer.span("rate_limit_sleep"):
+        pass
+
+    trace = json.loads(tracer.export_chrome_trace(tmp_path / "trace.json").read_text())
+    complete = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+    names = {e["args"]["name"] for e in trace["traceEvents"] if e["ph"] == "M"}
+
+    assert len(complete) == 3
+    assert len({e["tid"] for e in complete}) == 3
+    assert names == {"E1.0.pdf", "A1.0.pdf", "job"}
+    assert complete[0]["args"] == {"bytes": 1024}
+
+
+def test_failed_span_is_recorded_with_error():
+    tracer = Tracer()
+    with pytest.raises(ValueError):
+        with tracer.span("gpt_request"):
+            raise ValueError("boom")
+    assert tracer.spans[0].attrs["error"] == "ValueError"
+
+
+def test_summary_percentiles():
+    tracer = Tracer()
+    for duration in range(1, 101):
+        tracer.record("find_tables", 0.0, duration / 1000)
+
+    stats = tracer.summary()["find_tables"]
+    assert stats["count"] == 100
+    assert stats["p50"] == pytest.approx(0.0505)
+    assert stats["p95"] == pytest.approx(0.09505)
+    assert "find_tables" in tracer.format_summary()
@@ -0,0 +1,280 @@
+import json
+import time
+import uuid
+import asyncio
+import logging
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
+
+from config.settings import BATCH_COMPLETION_WINDOW, BATCH_POLL_INTERVAL, MAX_BATCH_REQUESTS, MAX_BATCH_BYTES
+from utils.prompts import cached_tokens
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+@dataclass
+class BatchResult:
+    """The outcome of one request line of a batch."""
+    custom_id: str
+    content: Optional[str] = None
+    error: Optional[str] = None
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    completion_tokens: int = 0
+
+    @property
+    def success(self) -> bool:
+        return self.content is not None
+
+
+@dataclass
+class BatchStatus:
+    batch_id: str
+    status: str
+    completed: int = 0
+    failed: int = 0
+    total: int = 0
+    output_file_id: Optional[str] = None
+    error_file_id: Optional[str] = None
+
+
+class BatchRequestWriter:
+    """
+    Write chat requests as OpenAI Batch API JSONL, one line per drawing.
+
+    A new file is started whenever a file would exceed the request or byte
+    limit of one batch, so each file can be submitted as its own batch.
+
+    Usage:
+        with BatchRequestWriter(output_folder / "batch") as writer:
+            writer.add("0", processor.chat_request(raw_content, drawing_type))
+        writer.paths
+    """
+
+    def __init__(self, folder: Path, max_requests: int = MAX_BATCH_REQUESTS, max_bytes: int = MAX_BATCH_BYTES):
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.max_requests = max_requests
+        self.max_bytes = max_bytes
+        self.paths: List[Path] = []
+        self.request_count = 0
+        self._file = None
+        self._lines = 0
+        self._bytes = 0
+        self._stamp = time.strftime("%Y%m%d_%H%M%S")
+
+    def __enter__(self) -> "BatchRequestWriter":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def add(self, custom_id: str, body: Dict[str, Any]) -> None:
+        line = json.dumps({"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT, "body": body}) + "\n"
+        size = len(line.encode("utf-8"))
+        if self._file is None or self._lines >= self.max_requests or self._bytes + size > self.max_bytes:
+            self._start_file()
+        self._file.write(line)
+        self._lines += 1
+        self._bytes += size
+        self.request_count += 1
+
+    def _start_file(self) -> None:
+        self.close()
+        path = self.folder / f"requests_{self._stamp}_{len(self.paths) + 1:03d}.jsonl"
+        self._file = open(path, "w", encoding="utf-8")
+        self.paths.append(path)
+        self._lines = self._bytes = 0
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def iter_request_lines(path: Path) -> Iterator[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def parse_batch_output(text: str) -> Dict[str, BatchResult]:
+    """Read a batch output (or error) file into results keyed by custom_id."""
+    results: Dict[str, BatchResult] = {}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        custom_id = record.get("custom_id", "")
+        response = record.get("response") or {}
+        body = response.get("body") or {}
+        if record.get("error") or response.get("status_code", 200) >= 400:
+            error = record.get("error") or body.get("error") or {"message": f"HTTP {response.get('status_code')}"}
+            results[custom_id] = BatchResult(custom_id, error=error.get("message", str(error)))
+            continue
+        usage = body.get("usage") or {}
+        try:
+            content = body["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError):
+            results[custom_id] = BatchResult(custom_id, error="Response has no message content")
+            continue
+        results[custom_id] = BatchResult(
+            custom_id, content=content,
+            prompt_tokens=usage.get("prompt_tokens", 0), cached_tokens=cached_tokens(usage),
+            completion_tokens=usage.get("completion_tokens", 0)
+        )
+    return results
+
+
+class OpenAIBatchProcessor:
+    """
+    Submit request files to the OpenAI Batch API and collect their output.
+
+    Batches run against the separate batch quota at the discounted batch
+    price and complete within the completion window (24h).
+    """
+
+    def __init__(self, client: "AsyncOpenAI", poll_interval: float = BATCH_POLL_INTERVAL,
+                 completion_window: str = BATCH_COMPLETION_WINDOW):
+        self.client = client
+        self.poll_interval = poll_interval
+        self.completion_window = completion_window
+
+    async def submit(self, path: Path, metadata: Optional[Dict[str, str]] = None) -> str:
+        with open(path, "rb") as f:
+            uploaded = await self.client.files.create(file=f, purpose="batch")
+        batch = await self.client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=self.completion_window,
+            metadata=metadata
+        )
+        logger.info(f"Submitted batch {batch.id} for {path.name}")
+        return batch.id
+
+    async def status(self, batch_id: str) -> BatchStatus:
+        batch = await self.client.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        return BatchStatus(
+            batch_id=batch.id,
+            status=batch.status,
+            completed=counts.completed if counts else 0,
+            failed=counts.failed if counts else 0,
+            total=counts.total if counts else 0,
+            output_file_id=batch.output_file_id,
+            error_file_id=batch.error_file_id
+        )
+
+    async def results(self, status: BatchStatus) -> Dict[str, BatchResult]:
+        results: Dict[str, BatchResult] = {}
+        for file_id in (status.error_file_id, status.output_file_id):
+            if file_id:
+                content = await self.client.files.content(file_id)
+                results.update(parse_batch_output(content.text))
+        return results
+
+
+class LocalBatchProcessor:
+    """
+    Stand-in for the Batch API that runs a request file through ordinary
+    chat completion calls, a few at a time, and produces the same output
+    format. Used by tests and for endpoints without batch support.
+    """
+
+    def __init__(self, client: "AsyncOpenAI", concurrency: int = 4, poll_interval: float = 0.2):
+        self.client = client
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self._outputs: Dict[str, str] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._totals: Dict[str, int] = {}
+
+    async def submit(self, path: Path, metadata: Optional[Dict[str, str]] = None) -> str:
+        batch_id = f"local_batch_{uuid.uuid4().hex[:12]}"
+        requests = list(iter_request_lines(path))
+        self._totals[batch_id] = len(requests)
+        self._tasks[batch_id] = asyncio.create_task(self._run(batch_id, requests))
+        return batch_id
+
+    async def _run(self, batch_id: str, requests: List[Dict[str, Any]]) -> None:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run_one(request: Dict[str, Any]) -> str:
+            record: Dict[str, Any] = {"id": f"batch_req_{uuid.uuid4().hex[:12]}", "custom_id": request["custom_id"]}
+            async with semaphore:
+                try:
+                    completion = await self.client.chat.completions.create(**request["body"])
+                    record.update(response={"status_code": 200, "body": completion.model_dump()}, error=None)
+                except Exception as e:
+                    record.update(response=None, error={"code": "local_error", "message": str(e)})
+            return json.dumps(record)
+
+        lines = await asyncio.gather(*(run_one(request) for request in requests))
+        self._outputs[batch_id] = "\n".join(lines) + "\n"
+
+    async def status(self, batch_id: str) -> BatchStatus:
+        if batch_id not in self._tasks:
+            # Local batches do not outlive the process that ran them
+            return BatchStatus(batch_id, "expired")
+        task = self._tasks[batch_id]
+        total = self._totals[batch_id]
+        if not task.done():
+            return BatchStatus(batch_id, "in_progress", total=total)
+        if task.exception():
+            return BatchStatus(batch_id, "failed", failed=total, total=total)
+        return BatchStatus(batch_id, "completed", completed=total, total=total, output_file_id=batch_id)
+
+    async def results(self, status: BatchStatus) -> Dict[str, BatchResult]:
+        return parse_batch_output(self._outputs.get(status.batch_id, ""))
+
+
+async def wait_for_batch(processor: Any, batch_id: str, poll_interval: Optional[float] = None) -> BatchStatus:
+    """Poll a batch until it reaches a terminal status, logging progress."""
+    interval = poll_interval if poll_interval is not None else getattr(processor, "poll_interval", 1.0)
+    last = None
+    while True:
+        status = await processor.status(batch_id)
+        progress = (status.status, status.completed, status.failed)
+        if progress != last:
+            logger.info(f"Batch {batch_id}: {status.status}, {status.completed}/{status.total} done, "
+                        f"{status.failed} failed")
+            last = progress
+        if status.status in TERMINAL_STATUSES:
+            return status
+        await asyncio.sleep(interval)
+
+
+@dataclass
+class BatchJobState:
+    """
+    What was submitted for a job, saved next to the output so an interrupted
+    run can pick up the batches instead of submitting them again.
+    """
+    request_files: List[str] = field(default_factory=list)
+    batch_ids: List[str] = field(default_factory=list)
+    # custom_id -> [pdf path, drawing type]
+    files: Dict[str, Tuple[str, str]] = field(default_factory=dict)
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(asdict(self), indent=2))
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["BatchJobState"]:
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, json.JSONDecodeError):
+            return None
+        return cls(
+            request_files=data.get("request_files", []),
+            batch_ids=data.get("batch_ids", []),
+            files={key: tuple(value) for key, value in data.get("files", {}).items()}
+        )
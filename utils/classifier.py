@@ -0,0 +1,161 @@
+import re
+import logging
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Set
+
+import pymupdf
+
+from utils.metrics import CLASSIFIER_LOOKUPS
+from config.settings import PANEL_SCHEDULE_PATTERNS, CLASSIFIER_CONFIRM_CONTENT
+
+logger = logging.getLogger(__name__)
+
+# Sheet number prefixes of each discipline; anything else is General
+DRAWING_TYPE_PREFIXES = (
+    ("Architectural", ("A", "AD")),
+    ("Electrical", ("E", "ED")),
+    ("Mechanical", ("M", "MD")),
+    ("Plumbing", ("P", "PD")),
+    ("Site", ("S", "SD")),
+    ("Civil", ("C", "CD")),
+    ("Low Voltage", ("LV", "LD")),
+    ("Fire Alarm", ("FA", "FD")),
+    ("Kitchen", ("K", "KD")),
+)
+PREFIX_DRAWING_TYPES = {prefix: dtype for dtype, prefixes in DRAWING_TYPE_PREFIXES for prefix in prefixes}
+# Longest prefixes first, so each name matches its most specific prefix
+DRAWING_TYPE_PREFIX = re.compile("|".join(sorted(PREFIX_DRAWING_TYPES, key=len, reverse=True)))
+PANEL_SCHEDULE_NAME = re.compile("|".join(re.escape(pattern.upper()) for pattern in PANEL_SCHEDULE_PATTERNS))
+
+# Column headings of a panel schedule, matched on the first page's text
+PANEL_SCHEDULE_TERMS = re.compile(
+    r"\b(?:(?P<circuit>CKT|CIRCUIT)|(?P<breaker>BREAKER|BKR|TRIP)|(?P<poles>POLES?)|(?P<phase>PHASE|PH)"
+    r"|(?P<load>VA|KVA|LOAD)|(?P<panel>PANEL(?:BOARD)?)|(?P<bus>MLO|MCB|BUS|MAIN))\b"
+)
+MIN_PANEL_TERMS = 3
+# Less text than this (a scanned sheet) can't contradict the file name
+MIN_CONFIRM_CHARS = 200
+
+
+@dataclass(frozen=True)
+class Classification:
+    drawing_type: str
+    is_panel_schedule: bool
+
+
+def classify_name(file_path) -> Classification:
+    """Drawing type and panel schedule routing of a file from its name alone."""
+    stem = Path(file_path).stem.upper()
+    match = DRAWING_TYPE_PREFIX.match(stem)
+    drawing_type = PREFIX_DRAWING_TYPES[match.group()] if match else "General"
+    return Classification(drawing_type, drawing_type == "Electrical" and bool(PANEL_SCHEDULE_NAME.search(stem)))
+
+
+def panel_schedule_terms(text: str) -> Set[str]:
+    """Which kinds of panel schedule column headings appear in text."""
+    return {match.lastgroup for match in PANEL_SCHEDULE_TERMS.finditer(text.upper())}
+
+
+def confirms_panel_schedule(text: str) -> Optional[bool]:
+    """Whether a first page reads as a panel schedule; None when it has too little text to tell."""
+    if len(text.strip()) < MIN_CONFIRM_CHARS:
+        return None
+    return len(panel_schedule_terms(text)) >= MIN_PANEL_TERMS
+
+
+class DrawingClassifier:
+    """
+    The pipeline's single drawing classifier, with cached decisions.
+
+    File names are matched once against the precompiled prefix and panel
+    schedule patterns and the result is kept per path, so discovery, the
+    scheduler and extraction all get the same answer in O(1). Files the
+    name sends to Document Intelligence can be confirmed from the text of
+    their first page, cached per file hash: sheets that don't read as
+    panel schedules go to PyMuPDF instead of the slower, billed service.
+
+    Usage:
+        classifier.drawing_type(pdf_path)       # "Electrical"
+        classifier.is_panel_schedule(pdf_path)  # by name
+        await run_pdf_task(classifier.confirm_panel_schedule, handle, sha256)
+    """
+
+    def __init__(self, confirm_content: bool = CLASSIFIER_CONFIRM_CONTENT):
+        self.confirm_content = confirm_content
+        self._names: Dict[str, Classification] = {}
+        self._content: Dict[str, Optional[bool]] = {}
+        self._stats: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def _count(self, cache: str, hit: bool) -> None:
+        self._stats[f"{cache}_hits" if hit else f"{cache}_misses"] += 1
+        CLASSIFIER_LOOKUPS.inc(cache=cache, result="hit" if hit else "miss")
+
+    def classify(self, file_path) -> Classification:
+        key = str(file_path)
+        with self._lock:
+            decision = self._names.get(key)
+            self._count("name", decision is not None)
+            if decision is None:
+                decision = self._names[key] = classify_name(file_path)
+        return decision
+
+    def drawing_type(self, file_path) -> str:
+        return self.classify(file_path).drawing_type
+
+    def is_panel_schedule(self, file_path) -> bool:
+        return self.classify(file_path).is_panel_schedule
+
+    def confirm_panel_schedule(self, pdf: Any, file_hash: str) -> bool:
+        """
+        Whether a file routed as a panel schedule should stay on Document
+        Intelligence, from its first page (pdf is a path or PdfDocumentHandle).
+
+        Must run on the PyMuPDF thread.
+        """
+        if not self.confirm_content:
+            return True
+        with self._lock:
+            hit = file_hash in self._content
+            self._count("content", hit)
+            verdict = self._content.get(file_hash)
+        if not hit:
+            path = str(getattr(pdf, "path", pdf))
+            doc = pdf.open_pymupdf() if hasattr(pdf, "open_pymupdf") else pymupdf.open(path)
+            try:
+                verdict = confirms_panel_schedule(doc.load_page(0).get_text()) if doc.page_count else None
+            finally:
+                doc.close()
+            with self._lock:
+                self._content[file_hash] = verdict
+            if verdict is False:
+                logger.info(f"First page of {path} doesn't read as a panel schedule; using PyMuPDF")
+        return verdict is not False
+
+    def stats(self) -> Dict[str, int]:
+        """Cache hits and misses so far, by cache."""
+        with self._lock:
+            return {
+                key: self._stats[key] for key in ("name_hits", "name_misses", "content_hits", "content_misses")
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._names.clear()
+            self._content.clear()
+            self._stats.clear()
+
+
+# Process-wide classifier, shared by every module that routes files
+classifier = DrawingClassifier()
+
+
+def get_drawing_type(filename: Path) -> str:
+    return classifier.drawing_type(filename)
+
+
+def is_panel_schedule_file(file_path: str) -> bool:
+    return classifier.is_panel_schedule(file_path)
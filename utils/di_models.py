@@ -0,0 +1,91 @@
+import sys
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from .tables import ColumnarTable
+
+Spans = Tuple[Tuple[int, int], ...]  # (offset, length) pairs
+
+
+def _spans(item: Mapping) -> Spans:
+    return tuple((span["offset"], span["length"]) for span in item.get("spans") or ())
+
+
+def _spans_json(spans: Spans) -> List[Dict[str, int]]:
+    return [{"offset": offset, "length": length} for offset, length in spans]
+
+
+@dataclass(slots=True)
+class DiLine:
+    """One text line of a Document Intelligence page."""
+    text: str
+    spans: Spans = ()
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"text": self.text, "spans": _spans_json(self.spans)}
+
+
+@dataclass(slots=True)
+class DiParagraph:
+    """One paragraph (text block) of a Document Intelligence result."""
+    text: str
+    role: Optional[str] = None
+    spans: Spans = ()
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"text": self.text, "role": self.role, "spans": _spans_json(self.spans)}
+
+
+@dataclass(slots=True)
+class DiPage:
+    """
+    One page of a Document Intelligence result.
+
+    region is set when the page was analyzed as an image tile and holds the
+    tile's clip rectangle in PDF points.
+    """
+    number: int
+    lines: List[DiLine] = field(default_factory=list)
+    region: Optional[List[float]] = None
+
+    def to_json(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {"number": self.number, "lines": [line.to_json() for line in self.lines], "tables": []}
+        if self.region is not None:
+            data["region"] = self.region
+        return data
+
+
+def parse_analyze_result(result: Mapping) -> Dict[str, Any]:
+    """
+    Convert a prebuilt-layout AnalyzeResult into compact models.
+
+    The SDK models are read through their mapping interface, which returns
+    the stored JSON values; attribute access would build a new model object
+    for every page, line and span. Nothing is converted to JSON here: the
+    models serialize themselves through to_json when output is written.
+    """
+    pages = [
+        DiPage(
+            number=page.get("pageNumber") or 0,
+            lines=[DiLine(line.get("content") or "", _spans(line)) for line in page.get("lines") or ()]
+        )
+        for page in result.get("pages") or ()
+    ]
+    paragraphs = [
+        DiParagraph(
+            paragraph.get("content") or "",
+            sys.intern(paragraph["role"]) if paragraph.get("role") else None,
+            _spans(paragraph)
+        )
+        for paragraph in result.get("paragraphs") or ()
+    ]
+    return {
+        "content": {"pages": pages},
+        "tables": [ColumnarTable.from_azure(table) for table in result.get("tables") or ()],
+        "text_blocks": paragraphs,
+        "metadata": {
+            "languages": result.get("languages") or [],
+            "styles": result.get("styles") or []
+        }
+    }
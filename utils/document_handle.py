@@ -0,0 +1,98 @@
+import os
+import mmap
+import asyncio
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Optional, Union
+
+import pymupdf
+
+from config.settings import SHARED_BUFFER_MAX_BYTES
+
+logger = logging.getLogger(__name__)
+
+
+class PdfDocumentHandle:
+    """
+    One open PDF shared by every stage that needs its bytes.
+
+    The file is memory-mapped once. Hashing reads straight from the mapping;
+    PyMuPDF only accepts a bytes stream, so the mapping is copied once into a
+    bytes object that both PyMuPDF and the Document Intelligence upload reuse.
+    Files above SHARED_BUFFER_MAX_BYTES are opened by PyMuPDF from disk instead
+    so large sets don't sit in memory.
+
+    Usage:
+        with PdfDocumentHandle(pdf_path) as handle:
+            digest = handle.sha256()
+            doc = handle.open_pymupdf()
+
+    From the event loop, open and close it in a worker thread:
+        async with await PdfDocumentHandle.open_async(pdf_path) as handle:
+            digest = await asyncio.to_thread(handle.sha256)
+    """
+
+    def __init__(self, path: Union[str, Path], max_shared_bytes: int = SHARED_BUFFER_MAX_BYTES):
+        self.path = Path(path)
+        self.max_shared_bytes = max_shared_bytes
+        self._lock = threading.Lock()
+        self._data: Optional[bytes] = None
+        self._sha256: Optional[str] = None
+        self._file = open(self.path, "rb")
+        self.size = os.fstat(self._file.fileno()).st_size
+        # Empty files can't be mapped
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+
+    @classmethod
+    async def open_async(cls, path: Union[str, Path],
+                         max_shared_bytes: int = SHARED_BUFFER_MAX_BYTES) -> "PdfDocumentHandle":
+        """Open a handle in a worker thread; open, fstat and mmap can stall on network shares."""
+        return await asyncio.to_thread(cls, path, max_shared_bytes)
+
+    def __enter__(self) -> "PdfDocumentHandle":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    async def __aenter__(self) -> "PdfDocumentHandle":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await asyncio.to_thread(self.close)
+
+    def close(self) -> None:
+        """Release the mapping and the shared buffer."""
+        with self._lock:
+            self._data = None
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._file.close()
+
+    def sha256(self) -> str:
+        """Hex SHA-256 of the file contents, computed once from the mapping."""
+        with self._lock:
+            if self._sha256 is None:
+                self._sha256 = hashlib.sha256(self._map if self._map is not None else b"").hexdigest()
+            return self._sha256
+
+    def data(self) -> bytes:
+        """The whole file as one bytes object, copied from the mapping on first use."""
+        with self._lock:
+            if self._data is None:
+                self._data = self._map[:] if self._map is not None else b""
+            return self._data
+
+    @property
+    def shares_buffer(self) -> bool:
+        """Whether PyMuPDF reads from the shared buffer rather than from disk."""
+        return self.size <= self.max_shared_bytes
+
+    def open_pymupdf(self) -> pymupdf.Document:
+        """Open the PDF with PyMuPDF; the caller is responsible for closing it."""
+        if self.shares_buffer:
+            return pymupdf.open(stream=self.data(), filetype="pdf")
+        return pymupdf.open(self.path)
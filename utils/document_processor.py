@@ -1,15 +1,20 @@
 # Standard library imports
 import os
+import asyncio
 import logging
-from typing import Optional, Any, Dict
+from typing import TYPE_CHECKING, Optional, Any, Dict
 from pathlib import Path
 import aiofiles
 from dotenv import load_dotenv
 
-# Azure imports
-from azure.core.credentials import AzureKeyCredential
-from azure.ai.documentintelligence import DocumentIntelligenceClient
-from azure.ai.documentintelligence.models import AnalyzeResult, AnalyzeDocumentRequest
+from .document_handle import PdfDocumentHandle
+from .tables import ColumnarTable
+
+# The Azure SDK is imported when the first document is analyzed, so runs
+# without panel schedules never load it
+if TYPE_CHECKING:
+    from azure.ai.documentintelligence.aio import DocumentIntelligenceClient
+    from azure.ai.documentintelligence.models import AnalyzeResult
 
 # Update these variable names
 DOCUMENTINTELLIGENCE_ENDPOINT = os.getenv("DOCUMENTINTELLIGENCE_ENDPOINT")
@@ -37,23 +42,36 @@ class DocumentProcessor:
         if not self.endpoint:
             raise ValueError("Document Intelligence endpoint not provided")
             
-        key = key or os.getenv("DOCUMENTINTELLIGENCE_API_KEY")
-        if not key:
+        self._key = key or os.getenv("DOCUMENTINTELLIGENCE_API_KEY")
+        if not self._key:
             raise ValueError("Document Intelligence API key not provided")
-        
-        self.credential = AzureKeyCredential(key)
-        self.client = DocumentIntelligenceClient(
-            endpoint=self.endpoint, 
-            credential=self.credential,
-            api_version="2024-02-29-preview"  # Added API version specification
-        )
+        self._client: Optional["DocumentIntelligenceClient"] = None
+
+    @property
+    def client(self) -> "DocumentIntelligenceClient":
+        """Document Intelligence client, created (and the Azure SDK imported) on first use."""
+        if self._client is None:
+            from azure.core.credentials import AzureKeyCredential
+            from azure.ai.documentintelligence.aio import DocumentIntelligenceClient
+            self._client = DocumentIntelligenceClient(
+                endpoint=self.endpoint, 
+                credential=AzureKeyCredential(self._key),
+                api_version="2024-02-29-preview"  # Added API version specification
+            )
+        return self._client
+
+    async def close(self) -> None:
+        """Close the underlying Document Intelligence HTTP session, if one was opened."""
+        if self._client is not None:
+            await self._client.close()
 
-    async def analyze_document(self, file_path: Path) -> AnalyzeResult:
+    async def analyze_document(self, file_path: Path, handle: Optional[PdfDocumentHandle] = None) -> "AnalyzeResult":
         """
         Analyzes a document using Azure Document Intelligence.
         
         Args:
             file_path: Path to the document file
+            handle: Optional open handle whose shared buffer is uploaded instead of re-reading the file
             
         Returns:
             AnalyzeResult: The analysis results from Azure Document Intelligence
@@ -66,28 +84,31 @@ class DocumentProcessor:
             raise ValueError(f"File not found: {file_path}")
             
         try:
-            async with aiofiles.open(file_path, "rb") as file:
-                document_content = await file.read()
-                if not document_content:
-                    raise ValueError(f"Empty file: {file_path}")
-                
-                # Correct parameters for SDK v4.0
-                poller = await self.client.begin_analyze_document(
-                    "prebuilt-layout",
-                    analyze_request=document_content,  # This is the correct parameter name
-                    content_type="application/octet-stream"
-                )
-                
-                # Get the result
-                result = await poller.result()
-                logging.info(f"Successfully analyzed document: {file_path}")
-                return result
-                
+            if handle is not None:
+                document_content = await asyncio.to_thread(handle.data)
+            else:
+                async with aiofiles.open(file_path, "rb") as file:
+                    document_content = await file.read()
+            if not document_content:
+                raise ValueError(f"Empty file: {file_path}")
+            
+            # Raw bytes are uploaded as the request body (SDK 1.0.0)
+            poller = await self.client.begin_analyze_document(
+                "prebuilt-layout",
+                document_content,
+                content_type="application/octet-stream"
+            )
+            
+            # Get the result
+            result = await poller.result()
+            logging.info(f"Successfully analyzed document: {file_path}")
+            return result
+            
         except Exception as e:
             logging.error(f"Error analyzing document {file_path}: {str(e)}")
             raise
 
-    async def extract_text_from_result(self, result: AnalyzeResult) -> str:
+    async def extract_text_from_result(self, result: "AnalyzeResult") -> str:
         """
         Extracts text content from analysis result.
         
@@ -108,19 +129,20 @@ class DocumentProcessor:
             logging.error(f"Error extracting text from result: {str(e)}")
             raise
 
-    async def process_document(self, file_path: Path) -> Dict[str, Any]:
+    async def process_document(self, file_path: Path, handle: Optional[PdfDocumentHandle] = None) -> Dict[str, Any]:
         """
         Complete document processing pipeline.
         
         Args:
             file_path: Path to the document file
+            handle: Optional open handle shared with other extractors
             
         Returns:
             Dict containing processed results
         """
         try:
             # Analyze document
-            result = await self.analyze_document(file_path)
+            result = await self.analyze_document(file_path, handle)
             
             # Extract text
             text_content = await self.extract_text_from_result(result)
@@ -128,17 +150,7 @@ class DocumentProcessor:
             # Extract tables if present
             tables = []
             if hasattr(result, 'tables'):
-                for table in result.tables:
-                    table_data = []
-                    for cell in table.cells:
-                        table_data.append({
-                            'row_index': cell.row_index,
-                            'column_index': cell.column_index,
-                            'content': cell.content,
-                            'row_span': cell.row_span,
-                            'column_span': cell.column_span
-                        })
-                    tables.append(table_data)
+                tables = [ColumnarTable.from_azure(table) for table in result.tables]
             
             return {
                 'file_name': file_path.name,
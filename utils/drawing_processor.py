@@ -1,47 +1,52 @@
-from typing import List, Dict, Any, Optional
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Tuple
 import asyncio
 import aiofiles
 import os
 import logging
-from tqdm.asyncio import tqdm_asyncio
 from .document_processor import DocumentProcessor
-from openai import AsyncOpenAI
-from azure.core.credentials import AzureKeyCredential
-from azure.ai.documentintelligence import DocumentIntelligenceClient
-from azure.ai.documentintelligence.models import AnalyzeResult, AnalyzeDocumentRequest
 from pathlib import Path
 import json
-from .common_utils import is_panel_schedule_file
+from .classifier import is_panel_schedule_file
+from .tracing import tracer
+from .pdf_thread import run_pdf_task
+from .document_handle import PdfDocumentHandle
+from .tables import ColumnarTable, json_default
+from .di_models import parse_analyze_result
+from .prompts import DRAWING_INSTRUCTIONS, PromptBuilder, cached_tokens
+from .pdf_splitter import plan_page_ranges, extract_page_range, plan_page_tiles, render_page_tile
+from .pdf_processor import extract_text_and_tables_from_pdf
+from config.settings import MAX_FILE_SIZE, LARGE_DRAWING_CONCURRENCY, LARGE_PAGE_TILE_DPI
 
-logger = logging.getLogger(__name__)
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
 
-DRAWING_INSTRUCTIONS = {
-    "Electrical": "Focus on panel schedules, circuit info, equipment schedules with electrical characteristics, and installation notes.",
-    "Mechanical": "Capture equipment schedules, HVAC details (CFM, capacities), and installation instructions.",
-    "Plumbing": "Include fixture schedules, pump details, water heater specs, pipe sizing, and system instructions.",
-    "Architectural": """
-    Extract and structure the following information:
-    1. Room details: Create a 'rooms' array with objects for each room, including:
-       - 'number': Room number (as a string)
-       - 'name': Room name
-       - 'finish': Ceiling finish
-       - 'height': Ceiling height
-    2. Room finish schedules
-    3. Door/window details
-    4. Wall types
-    5. Architectural notes
-    Ensure all rooms are captured and properly structured in the JSON output.
-    """,
-    "General": "Organize all relevant data into logical categories based on content type."
-}
+logger = logging.getLogger(__name__)
 
 class DrawingProcessor(DocumentProcessor):
-    def __init__(self, endpoint: Optional[str] = None, key: Optional[str] = None):
+    def __init__(self, endpoint: Optional[str] = None, key: Optional[str] = None,
+                 prompts: Optional[PromptBuilder] = None):
         super().__init__(endpoint, key)
-        self.openai_client = AsyncOpenAI()
+        self._openai_client: Optional["AsyncOpenAI"] = None
+        self.prompts = prompts or PromptBuilder()
+
+    @property
+    def openai_client(self) -> "AsyncOpenAI":
+        """Standalone OpenAI client, created on first use (the pipeline passes its own client)."""
+        if self._openai_client is None:
+            from openai import AsyncOpenAI
+            self._openai_client = AsyncOpenAI()
+        return self._openai_client
 
-    async def process_drawing(self, file_path: str) -> Dict[str, Any]:
-        """Process a drawing using Azure Document Intelligence."""
+    async def process_drawing(self, file_path: str, handle: Optional[PdfDocumentHandle] = None,
+                              is_panel_schedule: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        Process a drawing using Azure Document Intelligence.
+        
+        When an open PdfDocumentHandle is passed, its shared buffer is uploaded
+        instead of reading the file again. is_panel_schedule overrides the
+        file name check, e.g. for a sheet the job's sheet index lists as a
+        panel schedule.
+        """
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"Drawing file not found: {file_path}")
             
@@ -51,99 +56,122 @@ class DrawingProcessor(DocumentProcessor):
         output_dir.mkdir(exist_ok=True)
         
         file_size = os.path.getsize(file_path)
-        if file_size > 50_000_000:  # 50MB limit
-            return await self.process_large_drawing(file_path)
 
         try:
             # First check if it's a panel schedule
-            if is_panel_schedule_file(str(file_path)):
+            if is_panel_schedule is None:
+                is_panel_schedule = is_panel_schedule_file(str(file_path))
+            if is_panel_schedule:
                 logger.info("Panel schedule detected, using Document Intelligence")
-                async with aiofiles.open(file_path, "rb") as f:
-                    file_content = await f.read()
-                    return await self._process_with_azure(file_content)
+                if file_size > MAX_FILE_SIZE:
+                    return await self.process_large_drawing(file_path)
+                if handle is not None:
+                    with tracer.span("read_file", shared=True) as span:
+                        file_content = await asyncio.to_thread(handle.data)
+                        span.set(bytes=len(file_content))
+                else:
+                    async with aiofiles.open(file_path, "rb") as f:
+                        with tracer.span("read_file") as span:
+                            file_content = await f.read()
+                            span.set(bytes=len(file_content))
+                return await self._process_with_azure(file_content)
             else:
                 # For non-panel schedule drawings, use PyMuPDF directly
                 logger.info("Non-panel schedule drawing, using PyMuPDF")
-                return await self._fallback_to_pymupdf(file_path)
+                return await self._fallback_to_pymupdf(file_path, handle)
         except Exception as e:
             logger.error(f"Processing failed: {e}")
             raise
 
-    async def _process_with_azure(self, file_obj) -> Dict[str, Any]:
+    async def process_large_drawing(self, file_path: str) -> Dict[str, Any]:
+        """
+        Process a drawing above the Document Intelligence size limit.
+        
+        The PDF is split into page ranges under the limit, read from disk one
+        range at a time. Ranges that are still too large are halved, and single
+        pages that don't fit (large plots) are rendered as image tiles. Parts are
+        analyzed concurrently and stitched back together in page order.
+        """
+        file_path = str(file_path)
+        max_bytes = int(MAX_FILE_SIZE * 0.9)  # Leave headroom for PDF overhead
+        semaphore = asyncio.Semaphore(LARGE_DRAWING_CONCURRENCY)
+        
+        async def analyze_range(start: int, end: int) -> List[Tuple[Tuple[int, int], Dict[str, Any], Dict[str, Any]]]:
+            async with semaphore:
+                with tracer.span("split_pages", pages=end - start + 1) as span:
+                    data = await run_pdf_task(extract_page_range, file_path, start, end, max_bytes)
+                    span.set(bytes=len(data) if data else 0)
+                if data is not None:
+                    result = await self._process_with_azure(data)
+                    return [((start, 0), {"pages": [start + 1, end + 1]}, result)]
+            if start < end:
+                middle = (start + end) // 2
+                halves = await asyncio.gather(analyze_range(start, middle), analyze_range(middle + 1, end))
+                return halves[0] + halves[1]
+            return await analyze_tiles(start)
+        
+        async def analyze_tiles(page_number: int) -> List[Tuple[Tuple[int, int], Dict[str, Any], Dict[str, Any]]]:
+            tiles = await run_pdf_task(plan_page_tiles, file_path, page_number, LARGE_PAGE_TILE_DPI)
+            logger.info(f"Page {page_number + 1} of {file_path} exceeds the size limit, analyzing {len(tiles)} tiles")
+            
+            async def analyze_tile(index: int, clip: Tuple[float, float, float, float]):
+                async with semaphore:
+                    with tracer.span("render_tile", page=page_number + 1):
+                        image = await run_pdf_task(render_page_tile, file_path, page_number, clip, LARGE_PAGE_TILE_DPI)
+                    result = await self._process_with_azure(image, content_type="image/png")
+                    return (page_number, index), {"pages": [page_number + 1, page_number + 1], "region": list(clip)}, result
+            
+            return list(await asyncio.gather(*(analyze_tile(i, clip) for i, clip in enumerate(tiles))))
+        
+        ranges = await run_pdf_task(plan_page_ranges, file_path, max_bytes)
+        logger.info(f"Large drawing {file_path}: analyzing {len(ranges)} page ranges")
+        parts = await asyncio.gather(*(analyze_range(start, end) for start, end in ranges))
+        return self._stitch_results([part for range_parts in parts for part in range_parts])
+
+    def _stitch_results(self, parts: List[Tuple[Tuple[int, int], Dict[str, Any], Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Merge per-part results from process_large_drawing in page order.
+        
+        Page numbers reported by Document Intelligence are relative to each part
+        and are shifted back to the original document.
+        """
+        stitched = {
+            "content": {"pages": []},
+            "tables": [],
+            "text_blocks": [],
+            "metadata": {"languages": [], "styles": [], "parts": []}
+        }
+        for _, part_info, result in sorted(parts, key=lambda part: part[0]):
+            first_page = part_info["pages"][0]
+            for page in result.get("content", {}).get("pages", []):
+                page.number = first_page + max(page.number, 1) - 1
+                if "region" in part_info:
+                    page.region = part_info["region"]
+                stitched["content"]["pages"].append(page)
+            stitched["tables"].extend(result.get("tables", []))
+            stitched["text_blocks"].extend(result.get("text_blocks", []))
+            stitched["metadata"]["languages"].extend(result.get("metadata", {}).get("languages", []) or [])
+            stitched["metadata"]["styles"].extend(result.get("metadata", {}).get("styles", []) or [])
+            stitched["metadata"]["parts"].append(part_info)
+        return stitched
+
+    async def _process_with_azure(self, file_obj, content_type: str = "application/octet-stream") -> Dict[str, Any]:
         """Process document with Azure Document Intelligence."""
         try:
             # Create the analyze request with the correct parameters
-            poller = await self.client.begin_analyze_document(
-                "prebuilt-layout",
-                body={"analyze_request": file_obj},  # Add body parameter
-                content_type="application/octet-stream"
-            )
+            with tracer.span("di_submit"):
+                poller = await self.client.begin_analyze_document(
+                    "prebuilt-layout",
+                    file_obj,  # Raw PDF (or image tile) bytes as the request body
+                    content_type=content_type
+                )
             
-            result = await poller.result()
+            with tracer.span("di_poll"):
+                result = await poller.result()
 
             # Parse according to documented schema
-            parsed_data = {
-                "content": {},
-                "tables": [],
-                "text_blocks": [],
-                "metadata": {}
-            }
-
-            # Extract pages content
-            if hasattr(result, 'pages'):
-                parsed_data["content"]["pages"] = []
-                for page in result.pages:
-                    page_content = {
-                        "number": page.page_number if hasattr(page, 'page_number') else 0,
-                        "lines": [],
-                        "tables": []
-                    }
-                    if hasattr(page, 'lines'):
-                        for line in page.lines:
-                            page_content["lines"].append({
-                                "text": line.content if hasattr(line, 'content') else "",
-                                "spans": line.spans if hasattr(line, 'spans') else []
-                            })
-                    parsed_data["content"]["pages"].append(page_content)
-
-            # Extract paragraphs
-            if hasattr(result, 'paragraphs'):
-                parsed_data["text_blocks"] = [
-                    {
-                        "text": p.content if hasattr(p, 'content') else "",
-                        "role": p.role if hasattr(p, 'role') else None,
-                        "spans": p.spans if hasattr(p, 'spans') else []
-                    }
-                    for p in result.paragraphs
-                ]
-
-            # Extract tables
-            if hasattr(result, 'tables'):
-                for table in result.tables:
-                    table_data = {
-                        "row_count": table.row_count if hasattr(table, 'row_count') else 0,
-                        "column_count": table.column_count if hasattr(table, 'column_count') else 0,
-                        "cells": []
-                    }
-                    
-                    if hasattr(table, 'cells'):
-                        for cell in table.cells:
-                            cell_data = {
-                                "text": cell.content if hasattr(cell, 'content') else "",
-                                "row_index": cell.row_index if hasattr(cell, 'row_index') else 0,
-                                "column_index": cell.column_index if hasattr(cell, 'column_index') else 0,
-                                "row_span": cell.row_span if hasattr(cell, 'row_span') else 1,
-                                "column_span": cell.column_span if hasattr(cell, 'column_span') else 1
-                            }
-                            table_data["cells"].append(cell_data)
-                    
-                    parsed_data["tables"].append(table_data)
-
-            # Extract metadata
-            parsed_data["metadata"] = {
-                "languages": result.languages if hasattr(result, 'languages') else [],
-                "styles": result.styles if hasattr(result, 'styles') else []
-            }
+            with tracer.span("di_parse"):
+                parsed_data = parse_analyze_result(result)
 
             return parsed_data
 
@@ -168,7 +196,7 @@ class DrawingProcessor(DocumentProcessor):
         for table in result.tables:
             processed_table = self._process_table(table)
             if self._is_panel_schedule(processed_table):
-                processed_table["type"] = "panel_schedule"
+                processed_table.table_type = "panel_schedule"
             parsed_data["tables"].append(processed_table)
             
         for paragraph in result.paragraphs:
@@ -180,43 +208,25 @@ class DrawingProcessor(DocumentProcessor):
             
         return parsed_data
 
-    def _process_table(self, table: Any) -> Dict[str, Any]:
+    def _process_table(self, table: Any) -> ColumnarTable:
         """
         Process a table from Azure Document Intelligence result.
         """
-        processed_table = {
-            "rows": len(table.rows),
-            "columns": len(table.columns),
-            "cells": []
-        }
-        
-        for cell in table.cells:
-            processed_table["cells"].append({
-                "text": cell.content,
-                "row_index": cell.row_index,
-                "column_index": cell.column_index,
-                "row_span": cell.row_span,
-                "column_span": cell.column_span
-            })
-        
-        return processed_table
+        return ColumnarTable.from_azure(table)
 
-    def _is_panel_schedule(self, table: Dict[str, Any]) -> bool:
+    def _is_panel_schedule(self, table: ColumnarTable) -> bool:
         """
         Determine if a table is an electrical panel schedule.
         """
         panel_keywords = ["circuit", "breaker", "load", "amps", "poles", "phase"]
-        first_row_text = " ".join(
-            cell["text"].lower() 
-            for cell in table["cells"] 
-            if cell["row_index"] == 0
-        )
+        first_row_text = " ".join(table.row(0)).lower() if table.row_count else ""
         return any(keyword in first_row_text for keyword in panel_keywords)
 
     async def process_batch(self, file_paths: List[str]) -> Dict[str, Dict[str, Any]]:
         """
         Process multiple drawings in batch.
         """
+        from tqdm.asyncio import tqdm_asyncio
         tasks = [self.process_drawing(path) for path in file_paths]
         results = {}
         
@@ -233,40 +243,40 @@ class DrawingProcessor(DocumentProcessor):
                 
         return results
 
-    async def analyze_document(self, raw_content: str, drawing_type: str, client: AsyncOpenAI) -> str:
-        """Analyze document content using GPT."""
-        system_message = f"""
-        Parse this {drawing_type} drawing/schedule into a structured JSON format. Guidelines:
-        1. For text: Extract key information, categorize elements.
-        2. For tables: Preserve structure, use nested arrays/objects.
-        3. Create a hierarchical structure, use consistent key names.
-        4. Include metadata (drawing number, scale, date) if available.
-        5. {DRAWING_INSTRUCTIONS.get(drawing_type, DRAWING_INSTRUCTIONS["General"])}
-        6. For all drawing types, if room information is present, always include a 'rooms' array in the JSON output, with each room having at least 'number' and 'name' fields.
-        Ensure the entire response is a valid JSON object.
+    def chat_request(self, raw_content: Any, drawing_type: str) -> Dict[str, Any]:
         """
-        
-        try:
-            # Ensure raw_content is a simple string
-            if not isinstance(raw_content, str):
-                raw_content = str(raw_content)
+        Chat completion arguments for structuring one drawing.
 
-            # Use the correct message format for OpenAI API 1.55.0
-            response = await client.chat.completions.create(
-                model="gpt-4o-mini",  # Keeping your specified model
-                messages=[
-                    {
-                        "role": "system",
-                        "content": system_message
-                    },
-                    {
-                        "role": "user",
-                        "content": raw_content
-                    }
-                ],
-                temperature=0.2,
-                max_tokens=16000
-            )
+        Shared by analyze_document and the batch mode, which writes the same
+        arguments as the body of each Batch API request line. The system
+        message comes from the PromptBuilder and is identical for every sheet
+        of a type, so only the sheet content misses the prompt cache.
+        """
+        # Ensure raw_content is a simple string
+        if not isinstance(raw_content, str):
+            raw_content = json.dumps(raw_content, default=json_default)
+
+        # Use the correct message format for OpenAI API 1.55.0
+        return {
+            "model": "gpt-4o-mini",  # Keeping your specified model
+            "messages": self.prompts.messages(raw_content, drawing_type),
+            "temperature": 0.2,
+            "max_tokens": 16000
+        }
+
+    async def analyze_document(self, raw_content: str, drawing_type: str, client: "AsyncOpenAI") -> str:
+        """Analyze document content using GPT."""
+        try:
+            request = self.chat_request(raw_content, drawing_type)
+            input_chars = len(request["messages"][-1]["content"])
+            with tracer.span("gpt_request", drawing_type=drawing_type, input_chars=input_chars) as span:
+                response = await client.chat.completions.create(**request)
+                if response.usage:
+                    span.set(
+                        input_tokens=response.usage.prompt_tokens,
+                        cached_tokens=cached_tokens(response.usage),
+                        output_tokens=response.usage.completion_tokens
+                    )
             return response.choices[0].message.content
         except Exception as e:
             logger.error(f"Error processing {drawing_type} drawing with GPT: {str(e)}")
@@ -288,15 +298,14 @@ class DrawingProcessor(DocumentProcessor):
             logger.error(f"Document Intelligence analysis from URL failed: {str(e)}")
             raise
 
-    async def _fallback_to_pymupdf(self, file_path: str) -> Dict[str, Any]:
+    async def _fallback_to_pymupdf(self, file_path: str, handle: Optional[PdfDocumentHandle] = None) -> Dict[str, Any]:
         """
         Fallback method when Azure Document Intelligence fails.
         Uses PyMuPDF for basic text and table extraction.
         """
-        from .pdf_processor import extract_text_and_tables_from_pdf
         try:
             logger.info(f"Starting PyMuPDF extraction for: {file_path}")
-            raw_content = await extract_text_and_tables_from_pdf(file_path)
+            raw_content = await extract_text_and_tables_from_pdf(file_path, handle)
             logger.info(f"PyMuPDF extraction completed. Content length: {len(str(raw_content))}")
             
             result = {
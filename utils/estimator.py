@@ -0,0 +1,303 @@
+import os
+import json
+import math
+import time
+import heapq
+import logging
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import pymupdf
+
+from config.settings import MAX_FILE_SIZE, ESTIMATE_CALIBRATION_FILE
+from utils.file_utils import discover_pdf_files
+from utils.pdf_thread import run_pdf_task
+from utils.prompts import PromptBuilder
+from utils.scheduler import ScheduledFile, estimate_cost, order_files
+
+logger = logging.getLogger(__name__)
+
+ESTIMATE_FILENAME = "estimate.json"
+CHARS_PER_TOKEN = 4
+MAX_OUTPUT_TOKENS = 16000  # max_tokens of DrawingProcessor.chat_request
+
+# Prompt characters per character of plain page text: PyMuPDF output adds the
+# table markdown; Document Intelligence output is JSON with cell structure.
+PROMPT_EXPANSION = {"pymupdf": 1.3, "document_intelligence": 3.0}
+OUTPUT_RATIO = 0.3  # completion tokens per prompt token
+GPT_LATENCY = 2.0  # seconds before the first token
+GPT_TOKENS_PER_SECOND = 60.0
+PYMUPDF_SECONDS_PER_PAGE = 0.5
+DI_LATENCY = 5.0
+DI_SECONDS_PER_PAGE = 2.0
+# Calibration factors move towards each finished job's actual/predicted ratio by at least this much
+CALIBRATION_WEIGHT = 0.3
+CALIBRATION_HISTORY = 20
+
+
+@dataclass
+class FileEstimate:
+    """Cheap local measurements of one PDF and what processing it should cost."""
+    scheduled: ScheduledFile
+    text_chars: int
+    method: str  # "pymupdf" or "document_intelligence"
+    has_output: bool  # structured output newer than the PDF already exists
+    input_tokens: int = 0
+    output_tokens: int = 0
+    di_pages: int = 0
+    di_requests: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class Calibration:
+    """
+    Correction factors learned from finished jobs, applied to the raw model.
+
+    After a job that was estimated first, each factor moves towards that
+    job's actual/predicted ratio, so the estimate tracks this team's
+    drawings, model and network over time.
+    """
+    input_tokens: float = 1.0
+    output_tokens: float = 1.0
+    wall_seconds: float = 1.0
+    jobs: int = 0
+    history: List[Dict[str, Any]] = field(default_factory=list)
+
+    @classmethod
+    def load(cls, path: Optional[Path] = None) -> "Calibration":
+        try:
+            data = json.loads(Path(path or ESTIMATE_CALIBRATION_FILE).read_text())
+        except (OSError, json.JSONDecodeError):
+            return cls()
+        return cls(**{key: data[key] for key in asdict(cls()) if key in data})
+
+    def save(self, path: Optional[Path] = None) -> None:
+        path = Path(path or ESTIMATE_CALIBRATION_FILE)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        tmp_path.write_text(json.dumps(asdict(self), indent=2))
+        os.replace(tmp_path, path)
+
+    def update(self, raw: Dict[str, float], actual: Dict[str, float], job: str = "") -> None:
+        """Fold one job's actual totals into the factors, given the uncalibrated prediction."""
+        weight = max(1.0 / (self.jobs + 1), CALIBRATION_WEIGHT)
+        ratios = {}
+        for key in ("input_tokens", "output_tokens", "wall_seconds"):
+            if raw.get(key, 0) > 0 and actual.get(key, 0) > 0:
+                ratios[key] = actual[key] / raw[key]
+                setattr(self, key, (1 - weight) * getattr(self, key) + weight * ratios[key])
+        if not ratios:
+            return
+        self.jobs += 1
+        entry = {"job": job, "time": time.strftime("%Y-%m-%d %H:%M:%S"), **ratios}
+        self.history = (self.history + [entry])[-CALIBRATION_HISTORY:]
+
+
+def scan_file(pdf_path: Path, drawing_type: str, is_panel_schedule: bool,
+              output_folder: Optional[Path] = None) -> FileEstimate:
+    """
+    The local stages of the pipeline for one PDF: page count, cost estimate,
+    plain text length and whether its structured output is already current.
+    Runs on the PDF thread.
+    """
+    scheduled = estimate_cost(pdf_path, drawing_type, is_panel_schedule)
+    text_chars = 0
+    try:
+        with pymupdf.open(pdf_path) as doc:
+            for page in doc:
+                text_chars += len(page.get_text("text"))
+    except Exception as e:
+        logger.warning(f"Could not read text of {pdf_path}: {str(e)}")
+
+    has_output = False
+    if output_folder is not None:
+        output_path = Path(output_folder) / drawing_type / f"{pdf_path.stem}_structured.json"
+        try:
+            has_output = output_path.stat().st_mtime >= pdf_path.stat().st_mtime
+        except OSError:
+            pass
+    return FileEstimate(
+        scheduled=scheduled,
+        text_chars=text_chars,
+        method="document_intelligence" if is_panel_schedule else "pymupdf",
+        has_output=has_output
+    )
+
+
+def predict_file(item: FileEstimate, system_chars: int) -> FileEstimate:
+    """Fill in the uncalibrated token, page and time prediction for one file."""
+    pages = item.scheduled.page_count
+    prompt_chars = system_chars + item.text_chars * PROMPT_EXPANSION[item.method]
+    item.input_tokens = max(1, int(prompt_chars / CHARS_PER_TOKEN))
+    item.output_tokens = min(int(item.input_tokens * OUTPUT_RATIO), MAX_OUTPUT_TOKENS)
+    if item.method == "document_intelligence":
+        item.di_pages = pages
+        # Files above the size limit are sent as page ranges under 90% of it
+        item.di_requests = max(1, math.ceil(item.scheduled.size_bytes / (MAX_FILE_SIZE * 0.9)))
+        extract_seconds = DI_LATENCY + pages * DI_SECONDS_PER_PAGE
+    else:
+        extract_seconds = pages * PYMUPDF_SECONDS_PER_PAGE
+    item.seconds = extract_seconds + GPT_LATENCY + item.output_tokens / GPT_TOKENS_PER_SECOND
+    return item
+
+
+def simulate_wall_time(durations: List[float], concurrency: int, rate_limit: int, time_window: float) -> float:
+    """
+    Makespan of files taken in queue order by a fixed pool of workers, no
+    shorter than the pause the worker rate limit forces every rate_limit files.
+    """
+    if not durations:
+        return 0.0
+    workers = [0.0] * max(1, concurrency)
+    for duration in durations:
+        heapq.heappush(workers, heapq.heappop(workers) + duration)
+    rate_floor = ((len(durations) - 1) // rate_limit) * time_window if rate_limit else 0.0
+    return max(max(workers), rate_floor)
+
+
+@dataclass
+class JobEstimate:
+    files: List[FileEstimate]
+    raw: Dict[str, float]  # uncalibrated totals, kept for calibration
+    input_tokens: int
+    output_tokens: int
+    di_pages: int
+    api_calls: int
+    wall_seconds: float
+    scan_seconds: float
+    calibrated_jobs: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        by_type: Dict[str, int] = {}
+        for item in self.files:
+            by_type[item.scheduled.drawing_type] = by_type.get(item.scheduled.drawing_type, 0) + 1
+        return {
+            "files": len(self.files),
+            "pages": sum(item.scheduled.page_count for item in self.files),
+            "files_by_type": by_type,
+            "files_with_current_output": sum(item.has_output for item in self.files),
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "di_pages": self.di_pages,
+            "api_calls": self.api_calls,
+            "wall_seconds": round(self.wall_seconds, 1),
+            "scan_seconds": round(self.scan_seconds, 2),
+            "calibrated_jobs": self.calibrated_jobs,
+            "raw": self.raw,
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+
+async def estimate_job(job_folder: Path, get_drawing_type: Callable[[Path], str],
+                       is_panel_schedule: Callable[[str], bool], concurrency: int, rate_limit: int,
+                       time_window: float, output_folder: Optional[Path] = None,
+                       calibration: Optional[Calibration] = None, policy: str = "longest_first",
+                       prioritize_panel_schedules: bool = False) -> JobEstimate:
+    """
+    Predict what processing a job folder will take without calling any API.
+
+    Runs discovery, classification, page counts and plain text extraction
+    locally, models each file's tokens and duration, and schedules the files
+    over the worker pool the way the job queue would.
+
+    Args:
+        job_folder: Folder of drawings to estimate
+        get_drawing_type: Drawing type classifier, as for the real run
+        is_panel_schedule: Panel schedule classifier, as for the real run
+        concurrency: Files processed at once (MAX_CONCURRENT_FILES)
+        rate_limit: Files per time_window allowed by the worker rate limit
+        time_window: Seconds of the rate limit window
+        output_folder: Output folder checked for already current results
+        calibration: Correction factors from past jobs (loaded when omitted)
+    """
+    start = time.perf_counter()
+    calibration = calibration or Calibration.load()
+    prompts = PromptBuilder({"job": Path(job_folder).name})
+    files: List[FileEstimate] = []
+    async for pdf_path, drawing_type, is_panel in discover_pdf_files(job_folder, get_drawing_type, is_panel_schedule):
+        item = await run_pdf_task(scan_file, pdf_path, drawing_type, is_panel, output_folder)
+        files.append(predict_file(item, len(prompts.system_prompt(drawing_type))))
+
+    by_path = {item.scheduled.path: item for item in files}
+    ordered = order_files([item.scheduled for item in files], policy, prioritize_panel_schedules)
+    raw = {
+        "input_tokens": float(sum(item.input_tokens for item in files)),
+        "output_tokens": float(sum(item.output_tokens for item in files)),
+        "wall_seconds": simulate_wall_time(
+            [by_path[scheduled.path].seconds for scheduled in ordered], concurrency, rate_limit, time_window
+        ),
+    }
+    di_requests = sum(item.di_requests for item in files)
+    return JobEstimate(
+        files=files,
+        raw=raw,
+        input_tokens=int(raw["input_tokens"] * calibration.input_tokens),
+        output_tokens=int(raw["output_tokens"] * calibration.output_tokens),
+        di_pages=sum(item.di_pages for item in files),
+        api_calls=len(files) + di_requests,
+        wall_seconds=raw["wall_seconds"] * calibration.wall_seconds,
+        scan_seconds=time.perf_counter() - start,
+        calibrated_jobs=calibration.jobs
+    )
+
+
+def save_estimate(estimate: JobEstimate, output_folder: Path) -> Path:
+    """Keep the estimate in the output folder so the real run can calibrate against it."""
+    path = Path(output_folder) / "logs" / ESTIMATE_FILENAME
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(estimate.to_dict(), indent=2))
+    return path
+
+
+def job_totals(spans: List[Any], wall_seconds: float) -> Dict[str, float]:
+    """Actual totals of a finished job from its trace spans, in the shape of JobEstimate.raw."""
+    requests = [span for span in spans if span.name == "gpt_request"]
+    return {
+        "input_tokens": float(sum(span.attrs.get("input_tokens", 0) for span in requests)),
+        "output_tokens": float(sum(span.attrs.get("output_tokens", 0) for span in requests)),
+        "wall_seconds": wall_seconds,
+    }
+
+
+def calibrate_from_job(output_folder: Path, actual: Dict[str, float],
+                       calibration_path: Optional[Path] = None) -> Optional[Calibration]:
+    """
+    Update the calibration with a finished job's actual totals if the job was
+    estimated first. The estimate is consumed so it is only counted once.
+    """
+    estimate_path = Path(output_folder) / "logs" / ESTIMATE_FILENAME
+    try:
+        estimate = json.loads(estimate_path.read_text())
+    except (OSError, json.JSONDecodeError):
+        return None
+    calibration = Calibration.load(calibration_path)
+    calibration.update(estimate.get("raw", {}), actual, job=str(output_folder))
+    calibration.save(calibration_path)
+    estimate_path.unlink(missing_ok=True)
+    return calibration
+
+
+def _duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes:02d}m" if hours else f"{minutes}m {seconds:02d}s"
+
+
+def format_estimate(estimate: JobEstimate) -> str:
+    """Human readable estimate for the command line."""
+    report = estimate.to_dict()
+    types = ", ".join(f"{count} {dtype}" for dtype, count in sorted(report["files_by_type"].items()))
+    calibration = (f"calibrated from {estimate.calibrated_jobs} past jobs" if estimate.calibrated_jobs
+                   else "not calibrated yet; run a job after --estimate to calibrate")
+    return "\n".join([
+        f"Files: {report['files']} ({types}), {report['pages']} pages",
+        f"Already processed (output newer than PDF): {report['files_with_current_output']}",
+        f"Input tokens: ~{estimate.input_tokens:,}",
+        f"Output tokens: ~{estimate.output_tokens:,}",
+        f"Document Intelligence pages: {estimate.di_pages}",
+        f"API calls: ~{estimate.api_calls} ({len(estimate.files)} chat, {estimate.api_calls - len(estimate.files)} Document Intelligence)",
+        f"Wall time: ~{_duration(estimate.wall_seconds)}",
+        f"Model: {calibration}; scan took {estimate.scan_seconds:.1f}s",
+    ])
@@ -1,12 +1,15 @@
 import os
+import re
+import asyncio
 import logging
-from typing import List, Optional
+from typing import AsyncIterator, Callable, Iterator, List, Optional, Tuple
 from pathlib import Path
-from config.settings import PANEL_SCHEDULE_PATTERNS
-from .common_utils import is_panel_schedule_file
+from .classifier import is_panel_schedule_file  # re-exported; the classifier decides routing
 
 logger = logging.getLogger(__name__)
 
+SHEET_NUMBER = re.compile(r"^[A-Z]{1,3}-?\d+(?:\.\d+)?[A-Z]?")
+
 def get_drawing_type(file_path: str, job_folder: str) -> Optional[str]:
     """
     Determine the drawing type based on the file path and job folder.
@@ -42,6 +45,51 @@ def get_drawing_type(file_path: str, job_folder: str) -> Optional[str]:
     logger.warning(f"Could not determine drawing type for {file_path}")
     return None
 
+def _scan_directory(directory: str) -> Tuple[List[str], List[str]]:
+    """
+    List one directory with os.scandir.
+
+    Args:
+    directory (str): The directory to scan.
+
+    Returns:
+    Tuple[List[str], List[str]]: Subdirectory paths and PDF file paths, sorted by name.
+    """
+    subdirs = []
+    pdf_files = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.is_file() and entry.name.lower().endswith('.pdf'):
+                        pdf_files.append(entry.path)
+                except OSError as e:
+                    logger.warning(f"Skipping unreadable entry {entry.path}: {str(e)}")
+    except OSError as e:
+        logger.error(f"Error scanning directory {directory}: {str(e)}")
+    return sorted(subdirs), sorted(pdf_files)
+
+def iter_pdf_files(job_folder: str, max_depth: Optional[int] = None) -> Iterator[str]:
+    """
+    Walk the job folder depth-first and yield PDF paths as each directory is listed.
+
+    Args:
+    job_folder (str): The root job folder path to traverse.
+    max_depth (Optional[int]): Folder levels below the root to list (0 lists the root only); None walks the whole tree.
+
+    Yields:
+    str: Full path of each PDF file found.
+    """
+    pending = [(str(job_folder), 0)]
+    while pending:
+        directory, depth = pending.pop()
+        subdirs, pdf_files = _scan_directory(directory)
+        yield from pdf_files
+        if max_depth is None or depth < max_depth:
+            pending.extend((subdir, depth + 1) for subdir in reversed(subdirs))
+
 def traverse_job_folder(job_folder: str) -> List[str]:
     """
     Traverse the job folder and collect all PDF files.
@@ -52,17 +100,51 @@ def traverse_job_folder(job_folder: str) -> List[str]:
     Returns:
     List[str]: A list of full file paths to all PDF files found.
     """
-    pdf_files = []
-    try:
-        for root, _, files in os.walk(job_folder):
-            for file in files:
-                if file.lower().endswith('.pdf'):
-                    pdf_files.append(os.path.join(root, file))
-        logger.info(f"Found {len(pdf_files)} PDF files in {job_folder}")
-    except Exception as e:
-        logger.error(f"Error traversing job folder {job_folder}: {str(e)}")
+    pdf_files = list(iter_pdf_files(job_folder))
+    logger.info(f"Found {len(pdf_files)} PDF files in {job_folder}")
     return pdf_files
 
+async def discover_pdf_files(
+    job_folder: Path,
+    get_drawing_type: Callable[[Path], str],
+    is_panel_schedule: Callable[[str], bool]
+) -> AsyncIterator[Tuple[Path, str, bool]]:
+    """
+    Discover PDF files without blocking the event loop and classify them as they are found.
+
+    Each directory is listed in a worker thread, so the first file can be
+    processed while the rest of the tree (e.g. on a network share) is still
+    being walked.
+
+    Args:
+    job_folder (Path): The root job folder path to traverse.
+    get_drawing_type (Callable): Drawing type classifier for a PDF path.
+    is_panel_schedule (Callable): Panel schedule classifier for a PDF path.
+
+    Yields:
+    Tuple[Path, str, bool]: The PDF path, its drawing type and whether it is a panel schedule.
+    """
+    pending = [str(job_folder)]
+    while pending:
+        subdirs, pdf_files = await asyncio.to_thread(_scan_directory, pending.pop())
+        for pdf_file in pdf_files:
+            path = Path(pdf_file)
+            yield path, get_drawing_type(path), is_panel_schedule(pdf_file)
+        pending.extend(reversed(subdirs))
+
+def sheet_number_from_filename(file_path) -> str:
+    """
+    Read the sheet number from the leading token of a drawing file name.
+
+    Args:
+    file_path (str | Path): Path to the PDF file, e.g. E5.00-PANEL-SCHEDULES-Rev.3.pdf.
+
+    Returns:
+    str: The sheet number (E5.00), or an empty string when the name has none.
+    """
+    match = SHEET_NUMBER.match(Path(file_path).stem.upper())
+    return match.group() if match else ""
+
 def cleanup_temporary_files(output_folder: str) -> None:
     """
     Clean up any temporary files created during processing.
@@ -84,8 +166,3 @@ def get_project_name(job_folder: str) -> str:
     str: The project name.
     """
     return os.path.basename(job_folder)
-
-def is_panel_schedule_file(file_path: str) -> bool:
-    filename = Path(file_path).stem.upper()
-    return (filename.startswith('E') and 
-            any(pattern in filename for pattern in PANEL_SCHEDULE_PATTERNS))
\ No newline at end of file
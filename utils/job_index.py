@@ -0,0 +1,405 @@
+import re
+import json
+import time
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from .file_utils import sheet_number_from_filename
+from .title_block import sheet_key
+from .panel_analytics import (
+    PANEL_NAME_KEYS, FED_FROM_KEYS, CIRCUIT_LIST_KEYS, VOLTAGE_KEYS, CIRCUIT_NUMBER_KEYS, DESCRIPTION_KEYS,
+    POLE_KEYS, BREAKER_KEYS, circuit_list, first_field, iter_panels, load_va, normalize_panel_name,
+    parse_quantity
+)
+
+logger = logging.getLogger(__name__)
+
+JOB_INDEX_FILENAME = "job_index.sqlite"
+
+# Sheet metadata, room and equipment fields as GPT tends to name them
+SHEET_NUMBER_KEYS = ("drawing_number", "sheet_number", "sheet", "drawing_no", "sheet_no", "number")
+TITLE_KEYS = ("title", "drawing_title", "sheet_title", "name")
+PROJECT_KEYS = ("project", "project_name", "job_name")
+REVISION_KEYS = ("revision", "rev", "revision_number")
+DATE_KEYS = ("date", "issue_date", "revision_date")
+ROOM_NUMBER_KEYS = ("number", "room_number", "room_no", "room_id", "room")
+ROOM_NAME_KEYS = ("name", "room_name", "description")
+EQUIPMENT_TAG_KEYS = ("tag", "equipment_tag", "mark", "unit_tag", "equipment_id")
+EQUIPMENT_TYPE_KEYS = ("type", "equipment_type", "unit_type", "category")
+EQUIPMENT_PANEL_KEYS = ("panel", "fed_from", "panel_name", "source")
+EQUIPMENT_ROOM_KEYS = ("room", "room_number", "location", "area")
+
+# Lists whose items are rooms or pieces of equipment
+ROOM_LIST = re.compile(r"^rooms?$|_rooms$", re.IGNORECASE)
+EQUIPMENT_LIST = re.compile(r"equipment|fixtures?|units|devices|schedule", re.IGNORECASE)
+# Equipment and panel tags inside circuit descriptions: RTU-3, EF 2, LP-1A
+LOAD_TAG = re.compile(r"\b([A-Z]{1,4})[- ]?(\d{1,4}[A-Z]?)\b")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sheets (
+    id INTEGER PRIMARY KEY,
+    file TEXT NOT NULL UNIQUE,
+    output_path TEXT,
+    drawing_type TEXT,
+    sheet_number TEXT,
+    sheet_key TEXT,
+    title TEXT,
+    project TEXT,
+    revision TEXT,
+    date TEXT,
+    indexed_at REAL
+);
+CREATE TABLE IF NOT EXISTS rooms (
+    sheet_id INTEGER NOT NULL REFERENCES sheets(id) ON DELETE CASCADE,
+    number TEXT,
+    room_key TEXT,
+    name TEXT,
+    data TEXT
+);
+CREATE TABLE IF NOT EXISTS panels (
+    sheet_id INTEGER NOT NULL REFERENCES sheets(id) ON DELETE CASCADE,
+    name TEXT,
+    panel_key TEXT,
+    fed_from TEXT,
+    fed_from_key TEXT,
+    voltage TEXT
+);
+CREATE TABLE IF NOT EXISTS circuits (
+    sheet_id INTEGER NOT NULL REFERENCES sheets(id) ON DELETE CASCADE,
+    panel_key TEXT,
+    circuit TEXT,
+    description TEXT,
+    load_va REAL,
+    poles REAL,
+    breaker TEXT
+);
+CREATE TABLE IF NOT EXISTS circuit_loads (
+    sheet_id INTEGER NOT NULL REFERENCES sheets(id) ON DELETE CASCADE,
+    tag_key TEXT,
+    panel_key TEXT,
+    circuit TEXT,
+    description TEXT
+);
+CREATE TABLE IF NOT EXISTS equipment (
+    sheet_id INTEGER NOT NULL REFERENCES sheets(id) ON DELETE CASCADE,
+    tag TEXT,
+    tag_key TEXT,
+    type TEXT,
+    description TEXT,
+    panel_key TEXT,
+    circuit TEXT,
+    room_key TEXT,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_sheets_number ON sheets(sheet_number);
+CREATE INDEX IF NOT EXISTS idx_rooms_key ON rooms(room_key);
+CREATE INDEX IF NOT EXISTS idx_rooms_sheet ON rooms(sheet_id);
+CREATE INDEX IF NOT EXISTS idx_panels_key ON panels(panel_key);
+CREATE INDEX IF NOT EXISTS idx_panels_fed_from ON panels(fed_from_key);
+CREATE INDEX IF NOT EXISTS idx_panels_sheet ON panels(sheet_id);
+CREATE INDEX IF NOT EXISTS idx_circuits_panel ON circuits(panel_key);
+CREATE INDEX IF NOT EXISTS idx_circuits_sheet ON circuits(sheet_id);
+CREATE INDEX IF NOT EXISTS idx_circuit_loads_tag ON circuit_loads(tag_key);
+CREATE INDEX IF NOT EXISTS idx_circuit_loads_sheet ON circuit_loads(sheet_id);
+CREATE INDEX IF NOT EXISTS idx_equipment_tag ON equipment(tag_key);
+CREATE INDEX IF NOT EXISTS idx_equipment_room ON equipment(room_key);
+CREATE INDEX IF NOT EXISTS idx_equipment_sheet ON equipment(sheet_id);
+"""
+# One row per issue of a sheet (E5.00@3); created after older indexes gain the column
+SHEET_KEY_INDEX = "CREATE UNIQUE INDEX IF NOT EXISTS idx_sheets_key ON sheets(sheet_key)"
+
+SHEET_COLUMNS = "s.file, s.sheet_number, s.drawing_type, s.title, s.output_path"
+
+
+def normalize_tag(value: Any) -> str:
+    """Canonical key for equipment tags and room numbers (RTU-3 == rtu 3 == RTU3)."""
+    return re.sub(r"[^A-Z0-9]", "", str(value or "").upper())
+
+
+def normalize_room_number(value: Any) -> str:
+    """Canonical key for room numbers (Room 214 == 214, 1.02A == 102A)."""
+    return normalize_tag(re.sub(r"^\s*(ROOM|RM)\b\.?", "", str(value or "").upper()))
+
+
+def _text(value: Any) -> Optional[str]:
+    if value in (None, ""):
+        return None
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+def _load_tags(description: str) -> List[str]:
+    return sorted({letters + digits for letters, digits in LOAD_TAG.findall(description.upper())})
+
+
+def iter_lists(data: Any, key: str = "") -> Iterator[Tuple[str, List[Any]]]:
+    """Yield (parent key, list) for every list in a structured drawing."""
+    if isinstance(data, dict):
+        for child_key, value in data.items():
+            yield from iter_lists(value, str(child_key))
+    elif isinstance(data, list):
+        yield key, data
+        for item in data:
+            yield from iter_lists(item, key)
+
+
+def _metadata(data: Any) -> Dict[str, Any]:
+    if isinstance(data, dict):
+        metadata = data.get("metadata") or data.get("drawing_metadata") or data.get("title_block")
+        if isinstance(metadata, dict):
+            return metadata
+    return {}
+
+
+class JobIndex:
+    """
+    Indexed SQLite database of a job's structured output.
+
+    Each completed file is written in one transaction: the sheet row plus
+    its rooms, panels, circuits, the equipment tags named in circuit
+    descriptions, and equipment schedule entries. Re-indexing a file
+    replaces its rows. Lookups go through indexed normalized keys, so
+    cross-sheet questions do not need to reload any JSON.
+
+    Usage:
+        index = JobIndex(output_folder / JOB_INDEX_FILENAME)
+        index.index_sheet(pdf_path, "Electrical", parsed_json, output_path)
+        index.sheets_for_room("214")
+        index.panels_feeding("RTU-3")
+        index.close()
+    """
+
+    def __init__(self, db_path: Union[str, Path]):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Writes come from worker threads (asyncio.to_thread); the lock serializes them
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            self._conn.executescript(SCHEMA)
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(sheets)")}
+            if "sheet_key" not in columns:
+                self._conn.execute("ALTER TABLE sheets ADD COLUMN sheet_key TEXT")
+            self._conn.execute(SHEET_KEY_INDEX)
+
+    def __enter__(self) -> "JobIndex":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def index_sheet(self, pdf_path: Union[str, Path], drawing_type: str, data: Any,
+                    output_path: Optional[Union[str, Path]] = None) -> int:
+        """
+        Insert (or replace) one file's structured output.
+
+        The sheet is keyed by its number and revision (E5.00@3): a file
+        holding the same issue of a sheet as another replaces it, while
+        each revision keeps its own row for sheet_revisions().
+
+        Returns the sheet id.
+        """
+        metadata = _metadata(data)
+        sheet_number = first_field(metadata, SHEET_NUMBER_KEYS) or sheet_number_from_filename(pdf_path)
+        revision = _text(first_field(metadata, REVISION_KEYS))
+        key = sheet_key({"drawing_number": str(sheet_number), "revision": revision}) if sheet_number else None
+        sheet = (
+            str(pdf_path),
+            str(output_path) if output_path else None,
+            drawing_type,
+            _text(sheet_number),
+            key,
+            _text(first_field(metadata, TITLE_KEYS)),
+            _text(first_field(metadata, PROJECT_KEYS)),
+            revision,
+            _text(first_field(metadata, DATE_KEYS)),
+            time.time(),
+        )
+        rooms, equipment = self._rooms_and_equipment(data)
+        panels, circuits, loads = self._panels_and_circuits(data)
+
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM sheets WHERE file = ? OR sheet_key = ?", (sheet[0], key))
+            sheet_id = self._conn.execute(
+                "INSERT INTO sheets (file, output_path, drawing_type, sheet_number, sheet_key, title, project, "
+                "revision, date, indexed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", sheet
+            ).lastrowid
+            self._conn.executemany("INSERT INTO rooms VALUES (?, ?, ?, ?, ?)",
+                                   [(sheet_id,) + row for row in rooms])
+            self._conn.executemany("INSERT INTO panels VALUES (?, ?, ?, ?, ?, ?)",
+                                   [(sheet_id,) + row for row in panels])
+            self._conn.executemany("INSERT INTO circuits VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                   [(sheet_id,) + row for row in circuits])
+            self._conn.executemany("INSERT INTO circuit_loads VALUES (?, ?, ?, ?, ?)",
+                                   [(sheet_id,) + row for row in loads])
+            self._conn.executemany("INSERT INTO equipment VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                   [(sheet_id,) + row for row in equipment])
+        return sheet_id
+
+    def index_structured_file(self, path: Union[str, Path], drawing_type: Optional[str] = None) -> Optional[int]:
+        """Index a *_structured.json already on disk, keyed by the JSON path."""
+        path = Path(path)
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Skipping {path} in job index: {e}")
+            return None
+        stem = path.stem[:-len("_structured")] if path.stem.endswith("_structured") else path.stem
+        return self.index_sheet(path.with_name(stem + ".pdf"), drawing_type or path.parent.name, data, path)
+
+    @staticmethod
+    def _rooms_and_equipment(data: Any) -> Tuple[List[tuple], List[tuple]]:
+        rooms, equipment = [], []
+        for key, items in iter_lists(data):
+            if key.lower() in CIRCUIT_LIST_KEYS:
+                continue
+            is_rooms = bool(ROOM_LIST.search(key))
+            is_equipment = not is_rooms and bool(EQUIPMENT_LIST.search(key))
+            if not (is_rooms or is_equipment):
+                continue
+            for item in items:
+                # Panels are indexed with their circuits
+                if not isinstance(item, dict) or circuit_list(item) is not None:
+                    continue
+                if is_rooms:
+                    number = first_field(item, ROOM_NUMBER_KEYS)
+                    if number is None:
+                        continue
+                    rooms.append((
+                        str(number), normalize_room_number(number), _text(first_field(item, ROOM_NAME_KEYS)),
+                        json.dumps(item)
+                    ))
+                else:
+                    tag = first_field(item, EQUIPMENT_TAG_KEYS)
+                    if tag is None or isinstance(tag, (dict, list)):
+                        continue
+                    equipment.append((
+                        str(tag), normalize_tag(tag),
+                        _text(first_field(item, EQUIPMENT_TYPE_KEYS)),
+                        _text(first_field(item, DESCRIPTION_KEYS)),
+                        normalize_panel_name(first_field(item, EQUIPMENT_PANEL_KEYS)) or None,
+                        _text(first_field(item, CIRCUIT_NUMBER_KEYS)),
+                        normalize_room_number(first_field(item, EQUIPMENT_ROOM_KEYS)) or None,
+                        json.dumps(item)
+                    ))
+        return rooms, equipment
+
+    @staticmethod
+    def _panels_and_circuits(data: Any) -> Tuple[List[tuple], List[tuple], List[tuple]]:
+        panels, circuits, loads = [], [], []
+        for panel in iter_panels(data):
+            name = first_field(panel, PANEL_NAME_KEYS)
+            panel_key = normalize_panel_name(name)
+            fed_from = first_field(panel, FED_FROM_KEYS)
+            panels.append((
+                _text(name), panel_key, _text(fed_from), normalize_panel_name(fed_from) or None,
+                _text(first_field(panel, VOLTAGE_KEYS))
+            ))
+            for circuit in circuit_list(panel) or []:
+                number = _text(first_field(circuit, CIRCUIT_NUMBER_KEYS))
+                description = str(first_field(circuit, DESCRIPTION_KEYS) or "")
+                poles = parse_quantity(first_field(circuit, POLE_KEYS), scale_units=False)
+                circuits.append((
+                    panel_key, number, description, load_va(circuit),
+                    poles if poles == poles else None, _text(first_field(circuit, BREAKER_KEYS))
+                ))
+                loads.extend((tag, panel_key, number, description) for tag in _load_tags(description))
+        return panels, circuits, loads
+
+    def _query(self, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params).fetchall()]
+
+    def sheet_count(self) -> int:
+        return self._query("SELECT COUNT(*) AS n FROM sheets")[0]["n"]
+
+    def sheets(self, drawing_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """All indexed sheets, optionally of one drawing type, by sheet number."""
+        if drawing_type:
+            return self._query(f"SELECT {SHEET_COLUMNS} FROM sheets s WHERE s.drawing_type = ? "
+                               "ORDER BY s.sheet_number", (drawing_type,))
+        return self._query(f"SELECT {SHEET_COLUMNS} FROM sheets s ORDER BY s.sheet_number")
+
+    def sheet_revisions(self, sheet_number: Any) -> List[Dict[str, Any]]:
+        """Every indexed issue of a sheet, oldest first, for diffing revisions."""
+        return self._query(
+            f"SELECT s.sheet_key, s.revision, s.date, {SHEET_COLUMNS} FROM sheets s WHERE s.sheet_number = ? "
+            "ORDER BY s.indexed_at, s.id",
+            (str(sheet_number),)
+        )
+
+    def sheets_for_room(self, room_number: Any) -> List[Dict[str, Any]]:
+        """Sheets that list the room or place equipment in it."""
+        key = normalize_room_number(room_number)
+        return self._query(
+            f"SELECT DISTINCT {SHEET_COLUMNS} FROM sheets s WHERE s.id IN ("
+            "SELECT sheet_id FROM rooms WHERE room_key = ? "
+            "UNION SELECT sheet_id FROM equipment WHERE room_key = ?) "
+            "ORDER BY s.sheet_number",
+            (key, key)
+        )
+
+    def rooms(self, room_number: Any) -> List[Dict[str, Any]]:
+        """Every entry for the room across sheets, with the sheet it came from."""
+        return self._query(
+            f"SELECT r.number, r.name, r.data, {SHEET_COLUMNS} FROM rooms r "
+            "JOIN sheets s ON s.id = r.sheet_id WHERE r.room_key = ? ORDER BY s.sheet_number",
+            (normalize_room_number(room_number),)
+        )
+
+    def panels_feeding(self, tag: Any) -> List[Dict[str, Any]]:
+        """
+        Panels and circuits that serve a load (RTU-3), from circuit
+        descriptions in panel schedules and panel/circuit columns in
+        equipment schedules.
+        """
+        key = normalize_tag(tag)
+        return self._query(
+            f"SELECT l.panel_key AS panel, l.circuit, l.description, {SHEET_COLUMNS} FROM circuit_loads l "
+            "JOIN sheets s ON s.id = l.sheet_id WHERE l.tag_key = ? "
+            f"UNION SELECT e.panel_key, e.circuit, e.description, {SHEET_COLUMNS} FROM equipment e "
+            "JOIN sheets s ON s.id = e.sheet_id WHERE e.tag_key = ? AND e.panel_key IS NOT NULL "
+            "ORDER BY panel, circuit",
+            (key, key)
+        )
+
+    def panel(self, name: Any) -> List[Dict[str, Any]]:
+        """The panel's header rows (fed from, voltage) on every sheet that schedules it."""
+        return self._query(
+            f"SELECT p.name, p.fed_from, p.voltage, {SHEET_COLUMNS} FROM panels p "
+            "JOIN sheets s ON s.id = p.sheet_id WHERE p.panel_key = ? ORDER BY s.sheet_number",
+            (normalize_panel_name(name),)
+        )
+
+    def panels_fed_from(self, name: Any) -> List[str]:
+        """Names of panels fed from the given panel."""
+        rows = self._query("SELECT DISTINCT panel_key FROM panels WHERE fed_from_key = ? ORDER BY panel_key",
+                           (normalize_panel_name(name),))
+        return [row["panel_key"] for row in rows]
+
+    def circuits(self, panel: Any) -> List[Dict[str, Any]]:
+        return self._query(
+            f"SELECT c.circuit, c.description, c.load_va, c.poles, c.breaker, {SHEET_COLUMNS} FROM circuits c "
+            "JOIN sheets s ON s.id = c.sheet_id WHERE c.panel_key = ? ORDER BY s.sheet_number, c.rowid",
+            (normalize_panel_name(panel),)
+        )
+
+    def find_equipment(self, tag: Any) -> List[Dict[str, Any]]:
+        """Equipment schedule entries for a tag on every sheet."""
+        return self._query(
+            f"SELECT e.tag, e.type, e.description, e.panel_key AS panel, e.circuit, e.room_key AS room, e.data, "
+            f"{SHEET_COLUMNS} FROM equipment e JOIN sheets s ON s.id = e.sheet_id WHERE e.tag_key = ? "
+            "ORDER BY s.sheet_number",
+            (normalize_tag(tag),)
+        )
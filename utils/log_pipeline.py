@@ -0,0 +1,183 @@
+import copy
+import json
+import queue
+import atexit
+import logging
+import itertools
+import threading
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from pathlib import Path
+from typing import Dict, Optional
+
+from utils.tracing import Span, current_file, current_stage
+from config.settings import LOG_LEVEL, LOG_SAMPLE_RATES, LOG_PAYLOAD_MAX_CHARS, LOG_MESSAGE_MAX_CHARS
+
+# Structured fields copied from a record into its JSON line
+RECORD_FIELDS = ("file", "stage", "duration", "attrs")
+
+span_logger = logging.getLogger("ohmni.spans")
+
+_listener: Optional[QueueListener] = None
+_handler: Optional[QueueHandler] = None
+_lock = threading.Lock()
+
+
+def parse_sample_rates(value: str) -> Dict[str, float]:
+    """Parse "get_text=0.1,ocr=0.25" into per-stage sample rates."""
+    rates = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        stage, _, rate = item.partition("=")
+        rates[stage.strip()] = min(max(float(rate), 0.0), 1.0)
+    return rates
+
+
+def cap_payload(text: str, limit: int = LOG_PAYLOAD_MAX_CHARS) -> str:
+    """Cut a payload (raw API response, extracted text) to limit characters for logging."""
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}... [{len(text) - limit} more chars]"
+
+
+class ContextFilter(logging.Filter):
+    """
+    Attribute records to the file and stage they were logged from.
+
+    Runs in the logging thread, before the record is queued, because the
+    file and stage live in context variables of the emitting task.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "file", None) is None:
+            record.file = current_file()
+        if getattr(record, "stage", None) is None:
+            record.stage = current_stage()
+        return True
+
+
+class StageSampler(logging.Filter):
+    """
+    Keep a fixed share of the INFO and DEBUG records of hot stages.
+
+    Per-page stages log once per page; at a rate of 0.1 one record in ten
+    is kept. Warnings and errors are never dropped.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._counters: Dict[str, itertools.count] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        stage = getattr(record, "stage", None)
+        rate = self.rates.get(stage) if stage else None
+        if rate is None or record.levelno >= logging.WARNING:
+            return True
+        if rate <= 0:
+            return False
+        counter = self._counters.setdefault(stage, itertools.count())
+        return next(counter) % round(1 / rate) == 0
+
+
+class JsonLineFormatter(logging.Formatter):
+    """One JSON object per record, with its file, stage and duration when known."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": cap_payload(record.getMessage(), LOG_MESSAGE_MAX_CHARS),
+        }
+        for key in RECORD_FIELDS:
+            value = getattr(record, key, None)
+            if value is not None:
+                entry[key] = value
+        exception = getattr(record, "exception", None)
+        if record.exc_info:
+            exception = self.formatException(record.exc_info)
+        if exception:
+            entry["exception"] = exception
+        return json.dumps(entry, default=str)
+
+
+class JsonQueueHandler(QueueHandler):
+    """
+    QueueHandler that keeps a record's traceback as its own field.
+
+    The stock prepare() folds the traceback into the message and clears
+    exc_info, so the formatter on the listener thread never sees it. Here
+    the traceback is formatted into record.exception and the message is
+    left as logged.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        if record.exc_info:
+            record.exception = (self.formatter or logging.Formatter()).formatException(record.exc_info)
+        elif record.exc_text:
+            record.exception = record.exc_text
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        record.exc_text = None
+        return record
+
+
+def log_span(span: Span) -> None:
+    """Tracer listener writing one record per finished span (sampled per stage)."""
+    if span_logger.isEnabledFor(logging.INFO):
+        span_logger.info(span.name, extra={
+            "file": span.file, "stage": span.name, "duration": round(span.duration, 4), "attrs": span.attrs or None
+        })
+
+
+def start_logging(log_folder: Path, name: str = "process_log", level: str = LOG_LEVEL,
+                  sample_rates: Optional[Dict[str, float]] = None) -> Path:
+    """
+    Send all logging through a queue to a JSON-lines file written by a background thread.
+
+    Logging calls on the event loop only format the message and enqueue
+    it; the file I/O happens on the listener thread. Replaces an earlier
+    pipeline started in the same process.
+
+    Returns:
+        Path of the log file, <log_folder>/<name>_<timestamp>.jsonl
+    """
+    global _listener, _handler
+    stop_logging()
+    log_folder.mkdir(parents=True, exist_ok=True)
+    log_path = log_folder / f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+    file_handler = logging.FileHandler(log_path, encoding="utf-8")
+    file_handler.setFormatter(JsonLineFormatter())
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    handler = JsonQueueHandler(records)
+    handler.addFilter(ContextFilter())
+    handler.addFilter(StageSampler(parse_sample_rates(LOG_SAMPLE_RATES) if sample_rates is None else sample_rates))
+    listener = QueueListener(records, file_handler)
+
+    with _lock:
+        root = logging.getLogger()
+        root.setLevel(level)
+        root.addHandler(handler)
+        listener.start()
+        _listener, _handler = listener, handler
+    return log_path
+
+
+def stop_logging() -> None:
+    """Flush queued records to the file and detach the pipeline."""
+    global _listener, _handler
+    with _lock:
+        if _handler is not None:
+            logging.getLogger().removeHandler(_handler)
+        if _listener is not None:
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+        _listener = _handler = None
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,233 @@
+import os
+import asyncio
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+from .tracing import Span
+
+logger = logging.getLogger(__name__)
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing value, e.g. files processed or tokens sent."""
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = ()):
+        super().__init__(name, description, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def total(self) -> float:
+        return sum(self._values.values())
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {value:g}")
+        return lines
+
+
+class Gauge(Counter):
+    """Value that can go up and down, e.g. in-flight files or queue depth."""
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets."""
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def count(self, **labels: str) -> int:
+        return sum(self._counts.get(self._key(labels), []))
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for key, counts in sorted(self._counts.items()):
+            cumulative = 0
+            bounds = [f"{bound:g}" for bound in self.buckets] + ["+Inf"]
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                bucket_labels = _format_labels(self.label_names, key, 'le="' + bound + '"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {self._sums[key]:g}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """In-process registry rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, description: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, description, labels))
+
+    def gauge(self, name: str, description: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, description, labels))
+
+    def histogram(self, name: str, description: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, description, labels, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: Path) -> None:
+        """Atomically write the current values to a .prom file (node_exporter textfile format)."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, "w") as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+
+# Process-wide registry and the pipeline's metrics
+metrics = MetricsRegistry()
+
+FILES_PROCESSED = metrics.counter("ohmni_files_processed_total", "Files finished, by status", ["status"])
+PAGES_PROCESSED = metrics.counter("ohmni_pages_processed_total", "Pages in successfully processed files")
+INPUT_TOKENS = metrics.counter("ohmni_input_tokens_total", "Prompt tokens sent to the LLM")
+CACHED_INPUT_TOKENS = metrics.counter("ohmni_cached_input_tokens_total", "Prompt tokens served from the LLM prompt cache")
+OUTPUT_TOKENS = metrics.counter("ohmni_output_tokens_total", "Completion tokens received from the LLM")
+API_RESPONSES = metrics.counter("ohmni_api_responses_total", "HTTP responses from the LLM API, by status code", ["status"])
+DI_FALLBACKS = metrics.counter("ohmni_di_fallbacks_total", "Panel schedules that fell back from Document Intelligence to PyMuPDF")
+OCR_PAGES = metrics.counter("ohmni_ocr_pages_total", "Scanned pages read with local OCR, by source (cache or tesseract)", ["source"])
+CLASSIFIER_LOOKUPS = metrics.counter(
+    "ohmni_classifier_lookups_total", "Drawing classifier cache lookups, by cache (name or content) and result", ["cache", "result"]
+)
+FILES_IN_FLIGHT = metrics.gauge("ohmni_files_in_flight", "Files currently being processed")
+QUEUE_DEPTH = metrics.gauge("ohmni_queue_depth", "Files discovered and waiting in the job queue")
+STAGE_SECONDS = metrics.histogram("ohmni_stage_seconds", "Pipeline stage duration", ["stage"])
+
+
+def record_span(span: Span) -> None:
+    """Tracer listener feeding stage durations and token usage into the registry."""
+    STAGE_SECONDS.observe(span.duration, stage=span.name)
+    if span.name == "gpt_request":
+        INPUT_TOKENS.inc(span.attrs.get("input_tokens", 0))
+        CACHED_INPUT_TOKENS.inc(span.attrs.get("cached_tokens", 0))
+        OUTPUT_TOKENS.inc(span.attrs.get("output_tokens", 0))
+
+
+def prompt_cache_hit_rate() -> float:
+    """Share of prompt tokens served from the prompt cache so far."""
+    total = INPUT_TOKENS.total()
+    return CACHED_INPUT_TOKENS.total() / total if total else 0.0
+
+
+async def record_http_response(response) -> None:
+    """httpx response hook counting API status codes, including the SDK's own 429 retries."""
+    API_RESPONSES.inc(status=str(response.status_code))
+
+
+async def _handle_metrics_request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        request_line = await reader.readline()
+        # Drain the request headers
+        while (await reader.readline()).strip():
+            pass
+        parts = request_line.decode("latin-1").split()
+        if len(parts) >= 2 and parts[1] in ("/", "/metrics"):
+            status, body = "200 OK", metrics.render().encode()
+        else:
+            status, body = "404 Not Found", b"not found\n"
+        writer.write(
+            f"HTTP/1.1 {status}\r\n"
+            "Content-Type: text/plain; version=0.0.4\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+    except Exception as e:
+        logger.warning(f"Metrics request failed: {str(e)}")
+    finally:
+        writer.close()
+
+
+async def start_metrics_server(host: str = "127.0.0.1", port: int = 9464) -> asyncio.AbstractServer:
+    """Serve the registry on http://host:port/metrics from the running event loop."""
+    server = await asyncio.start_server(_handle_metrics_request, host, port)
+    logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+    return server
+
+
+async def dump_metrics_periodically(path: Path, interval: float = 15.0) -> None:
+    """Rewrite the metrics file every interval seconds until cancelled."""
+    while True:
+        try:
+            metrics.write(path)
+        except OSError as e:
+            logger.warning(f"Failed to write metrics to {path}: {str(e)}")
+        await asyncio.sleep(interval)
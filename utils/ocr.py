@@ -0,0 +1,161 @@
+import os
+import json
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import pymupdf
+
+from utils.text_index import TextLine, page_text_lines
+from utils.tracing import tracer
+from utils.metrics import OCR_PAGES
+from config.settings import OCR_ENABLED, OCR_DPI, OCR_LANGUAGE, OCR_WORKERS, OCR_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+# A page is treated as a scan when images cover at least this share of it
+# while its text layer covers almost nothing (a digital stamp or title block
+# added to a scan still counts as a scan).
+SCANNED_MIN_IMAGE_COVERAGE = 0.5
+SCANNED_MAX_TEXT_COVERAGE = 0.02
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def page_coverage(page: pymupdf.Page, textpage: Optional[pymupdf.TextPage] = None) -> Tuple[float, float]:
+    """Share of the page area covered by text blocks and by images."""
+    rect = page.rect
+    area = abs(rect) or 1.0
+    text_area = sum(
+        abs(pymupdf.Rect(block[:4]) & rect)
+        for block in page.get_text("blocks", textpage=textpage)
+        if block[6] == 0 and block[4].strip()
+    )
+    image_area = sum(abs(pymupdf.Rect(info["bbox"]) & rect) for info in page.get_image_info())
+    return min(text_area / area, 1.0), min(image_area / area, 1.0)
+
+
+def is_scanned_page(page: pymupdf.Page, textpage: Optional[pymupdf.TextPage] = None) -> bool:
+    """Whether a page is an image with (next to) no text layer, so get_text() can't read it."""
+    text_coverage, image_coverage = page_coverage(page, textpage)
+    return image_coverage >= SCANNED_MIN_IMAGE_COVERAGE and text_coverage <= SCANNED_MAX_TEXT_COVERAGE
+
+
+def ocr_page_key(doc: pymupdf.Document, page: pymupdf.Page, dpi: int = OCR_DPI, language: str = OCR_LANGUAGE) -> str:
+    """
+    Cache key of a page's OCR result: a hash of its content stream and the
+    raw image data it draws, so the same scan is recognized again even in a
+    renamed or re-exported file.
+    """
+    digest = hashlib.sha256(f"{dpi}:{language}:".encode())
+    digest.update(page.read_contents())
+    for image in page.get_images(full=True):
+        digest.update(doc.xref_stream_raw(image[0]) or b"")
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def ocr_available() -> bool:
+    """Whether Tesseract language data is installed for PyMuPDF's OCR."""
+    if not OCR_ENABLED:
+        return False
+    try:
+        available = bool(os.getenv("TESSDATA_PREFIX") or pymupdf.get_tessdata())
+    except Exception:
+        available = False
+    if not available:
+        logger.warning("Tesseract is not installed; scanned pages will be sent without OCR text")
+    return available
+
+
+def ocr_page(pdf_path: str, page_number: int, dpi: int = OCR_DPI, language: str = OCR_LANGUAGE) -> List[Tuple]:
+    """
+    Run Tesseract on one page (1-based) and return its text lines.
+
+    Runs in a worker process; lines are returned as plain tuples so they
+    pickle cheaply.
+    """
+    with pymupdf.open(pdf_path) as doc:
+        page = doc.load_page(page_number - 1)
+        textpage = page.get_textpage_ocr(flags=pymupdf.TEXTFLAGS_TEXT, language=language, dpi=dpi, full=True)
+        return [tuple(line) for line in page_text_lines(page, page_number, textpage)]
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # Spawned, not forked: the parent runs the PDF thread and the event loop
+        _executor = ProcessPoolExecutor(max_workers=OCR_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+
+def shutdown_ocr_pool() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+class OcrCache:
+    """
+    OCR results on disk, one JSON file per page key.
+
+    Usage:
+        cache = OcrCache()
+        lines = cache.get(key)
+        cache.put(key, lines)
+    """
+
+    def __init__(self, folder: Optional[Path] = None):
+        self.folder = Path(folder or OCR_CACHE_DIR)
+
+    def _path(self, key: str) -> Path:
+        return self.folder / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[List[TextLine]]:
+        try:
+            data = json.loads(self._path(key).read_text())
+        except (OSError, json.JSONDecodeError):
+            return None
+        return [TextLine(page, text, tuple(bbox)) for page, text, bbox in data]
+
+    def put(self, key: str, lines: List[TextLine]) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps([list(line) for line in lines]))
+        os.replace(tmp_path, path)
+
+
+async def ocr_scanned_page(pdf_path: str, page_number: int, key: str,
+                           cache: Optional[OcrCache] = None) -> Optional[List[TextLine]]:
+    """
+    Text lines of a scanned page from the OCR cache, or from Tesseract in the
+    OCR process pool. Returns None when OCR is not available or fails.
+    """
+    cache = cache or OcrCache()
+    with tracer.span("ocr", page=page_number) as span:
+        lines = await asyncio.to_thread(cache.get, key)
+        if lines is not None:
+            span.set(cached=True, lines=len(lines))
+            OCR_PAGES.inc(source="cache")
+            # The key is page content only; the same scan may sit at another page of another file
+            return [TextLine(page_number, line.text, line.bbox) for line in lines]
+        if not ocr_available():
+            return None
+        loop = asyncio.get_running_loop()
+        try:
+            rows = await loop.run_in_executor(_get_executor(), ocr_page, str(pdf_path), page_number)
+        except Exception as e:
+            logger.error(f"OCR failed for page {page_number} of {pdf_path}: {str(e)}")
+            return None
+        lines = [TextLine(page, text, tuple(bbox)) for page, text, bbox in rows]
+        await asyncio.to_thread(cache.put, key, lines)
+        span.set(cached=False, lines=len(lines))
+        OCR_PAGES.inc(source="tesseract")
+        return lines
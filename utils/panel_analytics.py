@@ -0,0 +1,445 @@
+import re
+import json
+import logging
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Structured output comes from GPT, so the same field appears under several names
+PANEL_NAME_KEYS = ("panel_name", "panel", "name", "designation", "panel_designation")
+FED_FROM_KEYS = ("fed_from", "feeder", "fed_by", "source", "supply_from")
+VOLTAGE_KEYS = ("voltage", "volts", "system_voltage")
+CIRCUIT_LIST_KEYS = ("circuits", "circuit_schedule", "branch_circuits", "circuit_details")
+CIRCUIT_NUMBER_KEYS = ("circuit", "circuit_number", "circuit_no", "ckt", "number", "no")
+DESCRIPTION_KEYS = ("description", "load_description", "load_name", "name", "load")
+LOAD_KEYS = ("load_va", "va", "connected_load", "load", "volt_amps", "kva", "load_kva", "watts", "kw")
+KILO_LOAD_KEYS = ("kva", "load_kva", "kw")
+POLE_KEYS = ("poles", "pole", "p")
+BREAKER_KEYS = ("breaker", "breaker_size", "trip", "amps", "breaker_amps", "ocpd")
+PHASE_KEYS = ("phase", "phases")
+
+NUMBER = re.compile(r"-?\d[\d,]*(?:\.\d+)?")
+# Leading circuit numbers of a multi-pole circuit: "1,3,5", "2-4-6", "13/15"; no thousands separators
+CIRCUIT_NUMBERS = re.compile(r"^\s*(\d+(?:\s*[,/&-]\s*\d+)*)")
+# Phase letters, alone or run together ("B", "A,B", "ABC") once the word PHASE/PH is removed
+PHASE_WORD = re.compile(r"\bPH(?:ASES?)?\b\.?")
+PHASE_LETTERS = re.compile(r"\b[ABC]+\b")
+
+# Load categories, in the order of the per-panel category matrix
+CATEGORIES = ("other", "lighting", "receptacle", "motor", "spare")
+CATEGORY_PATTERNS = (
+    ("spare", re.compile(r"\b(SPARE|SPACE)\b")),
+    ("receptacle", re.compile(r"\b(RECEP|RECEPT|RECEPTACLES?|RCPT|OUTLETS?|GFCI|DUPLEX)\b")),
+    ("lighting", re.compile(r"\b(LIGHTING|LIGHTS?|LTG|LTS)\b")),
+    ("motor", re.compile(r"\b(RTU|AHU|EF|SF|RF|FCU|VAV|CU|HP|MOTOR|PUMP|FAN|COMPRESSOR|CONDENSER|CHILLER|BOILER|ELEVATOR)\b")),
+)
+# NEC 220.44: receptacle load above 10 kVA at 50 percent
+RECEPTACLE_FULL_DEMAND_VA = 10_000.0
+RECEPTACLE_EXCESS_FACTOR = 0.5
+# NEC 430.24: 125 percent of the largest motor
+LARGEST_MOTOR_FACTOR = 0.25
+
+
+@dataclass
+class PanelLoadSummary:
+    """Load totals for one panel, own circuits plus everything fed from it."""
+    panel: str
+    fed_from: Optional[str]
+    source_file: str
+    phase_count: int
+    circuit_count: int
+    connected_va: float
+    phase_va: List[float]
+    imbalance_pct: float
+    demand_va: float
+    largest_breaker_amps: Optional[float]
+    downstream_connected_va: float
+    downstream_demand_va: float
+    downstream_phase_va: List[float]
+
+
+def parse_quantity(value: Any, scale_units: bool = True) -> float:
+    """
+    Read a number out of a schedule value: 1,200 VA -> 1200, 20A -> 20, 2P -> 2.
+
+    With scale_units, kVA and kW values are converted to VA/W.
+    Returns NaN when the value holds no number.
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if not isinstance(value, str):
+        return float("nan")
+    match = NUMBER.search(value)
+    if not match:
+        return float("nan")
+    number = float(match.group().replace(",", ""))
+    if scale_units and re.search(r"\bK(VA|W)\b|\dK(VA|W)\b", value.upper()):
+        number *= 1000
+    return number
+
+
+def parse_circuit_number(value: Any) -> int:
+    """The lowest circuit number of a schedule value: "1,3,5" -> 1, 7 -> 7; -1 when it has none."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return int(value)
+    match = CIRCUIT_NUMBERS.match(str(value or ""))
+    if not match:
+        return -1
+    return min(int(number) for number in re.findall(r"\d+", match.group(1)))
+
+
+def normalize_panel_name(name: Any) -> str:
+    """Canonical key for matching panel names and fed-from references (Panel LP-1 == LP1)."""
+    text = re.sub(r"^\s*PANEL(BOARD)?\b[\s:'\"-]*", "", str(name or "").upper())
+    return re.sub(r"[^A-Z0-9]", "", text)
+
+
+def first_item(data: Dict[str, Any], keys: Iterable[str]) -> Tuple[Optional[str], Any]:
+    """The first of keys (case-insensitive) present in data with a non-empty value, as (key, value)."""
+    lowered = {str(key).lower(): value for key, value in data.items()}
+    for key in keys:
+        if key in lowered and lowered[key] not in (None, ""):
+            return key, lowered[key]
+    return None, None
+
+
+def first_field(data: Dict[str, Any], keys: Iterable[str]) -> Any:
+    """The value of the first of keys present in data, or None."""
+    return first_item(data, keys)[1]
+
+
+def load_va(circuit: Dict[str, Any]) -> float:
+    """A circuit's load in VA, 0 when it has none (spares, spaces)."""
+    key, value = first_item(circuit, LOAD_KEYS)
+    load = parse_quantity(value)
+    # A bare number under a kVA/kW key is still in thousands
+    if key in KILO_LOAD_KEYS and not re.search(r"K(VA|W)", str(value).upper()):
+        load *= 1000
+    return load if load == load else 0.0
+
+
+def circuit_list(data: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+    """The circuit dicts of a panel, or None when data is not a panel."""
+    circuits = first_field(data, CIRCUIT_LIST_KEYS)
+    if isinstance(circuits, list) and any(isinstance(circuit, dict) for circuit in circuits):
+        return [circuit for circuit in circuits if isinstance(circuit, dict)]
+    return None
+
+
+def iter_panels(data: Any) -> Iterator[Dict[str, Any]]:
+    """Yield every dict in a structured drawing that carries a list of circuits."""
+    if isinstance(data, dict):
+        if circuit_list(data) is not None:
+            yield data
+            return
+        for value in data.values():
+            yield from iter_panels(value)
+    elif isinstance(data, list):
+        for item in data:
+            yield from iter_panels(item)
+
+
+def _phase_count(panel: Dict[str, Any]) -> int:
+    voltage = str(first_field(panel, VOLTAGE_KEYS) or "").upper()
+    phases = str(first_field(panel, ("phases", "phase")) or "").upper()
+    if re.search(r"\b1\s*(PH|PHASE|Ø)", voltage + " " + phases) or phases.strip() == "1" or "120/240" in voltage:
+        return 2
+    return 3
+
+
+def _explicit_phases(circuit: Dict[str, Any]) -> Optional[Tuple[int, ...]]:
+    value = first_field(circuit, PHASE_KEYS)
+    if not isinstance(value, str):
+        return None
+    tokens = PHASE_LETTERS.findall(PHASE_WORD.sub(" ", value.upper()))
+    letters = tuple(sorted({"ABC".index(letter) for token in tokens for letter in token}))
+    return letters or None
+
+
+def _category(description: str) -> int:
+    upper = description.upper()
+    for name, pattern in CATEGORY_PATTERNS:
+        if pattern.search(upper):
+            return CATEGORIES.index(name)
+    return CATEGORIES.index("other")
+
+
+class PanelAnalytics:
+    """
+    Connected load, phase balance and demand for every panel in a job.
+
+    Circuits from all panels are held in flat arrays indexed by circuit,
+    with panel_index mapping each circuit to its panel, so every total is a
+    single bincount/add.at over the whole job rather than a loop per panel.
+
+    Usage:
+        analytics = PanelAnalytics.from_output_folder(output_folder)
+        for summary in analytics.summaries():
+            print(summary.panel, summary.connected_va, summary.imbalance_pct)
+    """
+
+    def __init__(self):
+        self.panels: List[str] = []
+        self.fed_from: List[Optional[str]] = []
+        self.source_files: List[str] = []
+        self.phase_counts = np.zeros(0, dtype=np.int8)
+        # Per-circuit columns
+        self.panel_index = np.zeros(0, dtype=np.int32)
+        self.circuit_number = np.zeros(0, dtype=np.int32)
+        self.poles = np.zeros(0, dtype=np.int8)
+        self.breaker_amps = np.zeros(0, dtype=np.float32)
+        self.load_va = np.zeros(0, dtype=np.float64)
+        self.category = np.zeros(0, dtype=np.int8)
+        self.explicit_phase_mask = np.zeros((0, 3), dtype=bool)
+
+    @classmethod
+    def from_output_folder(cls, output_folder: Path) -> "PanelAnalytics":
+        """Load panels from every *_structured.json under the job's output folder."""
+        return cls.from_structured_files(sorted(Path(output_folder).rglob("*_structured.json")))
+
+    @classmethod
+    def from_structured_files(cls, paths: Iterable[Path]) -> "PanelAnalytics":
+        panels: List[Tuple[Dict[str, Any], str]] = []
+        for path in paths:
+            try:
+                with open(path, "r") as f:
+                    data = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"Skipping {path} in panel analytics: {e}")
+                continue
+            panels.extend((panel, str(path)) for panel in iter_panels(data))
+        return cls.from_panels(panels)
+
+    @classmethod
+    def from_panels(cls, panels: Iterable[Tuple[Dict[str, Any], str]]) -> "PanelAnalytics":
+        """
+        Build from (panel dict, source file) pairs.
+
+        A panel that appears in several files (e.g. revisions) keeps the copy
+        with the most circuits.
+        """
+        chosen: Dict[str, Tuple[Dict[str, Any], str, List[Dict[str, Any]]]] = {}
+        for panel, source in panels:
+            name = normalize_panel_name(first_field(panel, PANEL_NAME_KEYS))
+            circuits = circuit_list(panel) or []
+            if not name:
+                name = f"UNNAMED{len(chosen) + 1}"
+            if name not in chosen or len(circuits) > len(chosen[name][2]):
+                chosen[name] = (panel, source, circuits)
+
+        analytics = cls()
+        columns: Dict[str, list] = {key: [] for key in
+                                    ("panel", "number", "poles", "breaker", "va", "category", "phases")}
+        phase_counts = []
+        for index, (name, (panel, source, circuits)) in enumerate(chosen.items()):
+            analytics.panels.append(name)
+            fed_from = normalize_panel_name(first_field(panel, FED_FROM_KEYS))
+            analytics.fed_from.append(fed_from or None)
+            analytics.source_files.append(source)
+            phase_counts.append(_phase_count(panel))
+            for circuit in circuits:
+                description = str(first_field(circuit, DESCRIPTION_KEYS) or "")
+                poles = parse_quantity(first_field(circuit, POLE_KEYS))
+                columns["panel"].append(index)
+                columns["number"].append(parse_circuit_number(first_field(circuit, CIRCUIT_NUMBER_KEYS)))
+                columns["poles"].append(int(min(max(poles, 1), 3)) if poles == poles else 1)
+                columns["breaker"].append(parse_quantity(first_field(circuit, BREAKER_KEYS), scale_units=False))
+                columns["va"].append(load_va(circuit))
+                columns["category"].append(_category(description))
+                columns["phases"].append(_explicit_phases(circuit))
+
+        analytics.phase_counts = np.array(phase_counts, dtype=np.int8)
+        analytics.panel_index = np.array(columns["panel"], dtype=np.int32)
+        analytics.circuit_number = np.array(columns["number"], dtype=np.int32)
+        analytics.poles = np.array(columns["poles"], dtype=np.int8)
+        analytics.breaker_amps = np.array(columns["breaker"], dtype=np.float32)
+        analytics.load_va = np.array(columns["va"], dtype=np.float64)
+        analytics.category = np.array(columns["category"], dtype=np.int8)
+        mask = np.zeros((len(columns["phases"]), 3), dtype=bool)
+        for row, phases in enumerate(columns["phases"]):
+            if phases:
+                mask[row, list(phases)] = True
+        analytics.explicit_phase_mask = mask
+        return analytics
+
+    @property
+    def panel_count(self) -> int:
+        return len(self.panels)
+
+    @property
+    def circuit_count(self) -> int:
+        return len(self.load_va)
+
+    def connected_va(self) -> np.ndarray:
+        """Connected load of each panel's own circuits."""
+        return np.bincount(self.panel_index, weights=self.load_va, minlength=self.panel_count)
+
+    def phase_va(self) -> np.ndarray:
+        """
+        (panels x 3) load per phase.
+
+        Circuits with an explicit phase column are split evenly across the
+        listed phases. Otherwise phases follow standard panel numbering
+        (circuits 1-2 on A, 3-4 on B, 5-6 on C, ...), with multi-pole breakers
+        spanning consecutive phases; unnumbered circuits are spread evenly.
+        """
+        result = np.zeros((self.panel_count, 3))
+        if not self.circuit_count:
+            return result
+        explicit = self.explicit_phase_mask.any(axis=1)
+        phase_count = self.phase_counts[self.panel_index].astype(np.int32)
+
+        explicit_share = self.load_va / np.maximum(self.explicit_phase_mask.sum(axis=1), 1)
+        np.add.at(result, self.panel_index[explicit],
+                  self.explicit_phase_mask[explicit] * explicit_share[explicit, None])
+
+        numbered = ~explicit & (self.circuit_number > 0)
+        start = (self.circuit_number - 1) // 2 % phase_count
+        share = self.load_va / self.poles
+        for pole in range(3):
+            rows = numbered & (self.poles > pole)
+            np.add.at(result, (self.panel_index[rows], (start[rows] + pole) % phase_count[rows]), share[rows])
+
+        unnumbered = ~explicit & ~numbered
+        for phase in range(3):
+            rows = unnumbered & (phase < phase_count)
+            np.add.at(result, (self.panel_index[rows], phase), self.load_va[rows] / phase_count[rows])
+        return result
+
+    def category_va(self) -> np.ndarray:
+        """(panels x categories) connected load by load category."""
+        flat = self.panel_index.astype(np.int64) * len(CATEGORIES) + self.category
+        totals = np.bincount(flat, weights=self.load_va, minlength=self.panel_count * len(CATEGORIES))
+        return totals.reshape(self.panel_count, len(CATEGORIES))
+
+    def demand_va(self) -> np.ndarray:
+        """
+        Demand load of each panel's own circuits.
+
+        Receptacles above 10 kVA count at 50 percent (NEC 220.44) and the
+        largest motor is taken at 125 percent (NEC 430.24); other loads count
+        in full and spares not at all.
+        """
+        by_category = self.category_va()
+        receptacle = by_category[:, CATEGORIES.index("receptacle")]
+        receptacle_demand = (np.minimum(receptacle, RECEPTACLE_FULL_DEMAND_VA)
+                             + RECEPTACLE_EXCESS_FACTOR * np.maximum(receptacle - RECEPTACLE_FULL_DEMAND_VA, 0))
+        largest_motor = np.zeros(self.panel_count)
+        motors = self.category == CATEGORIES.index("motor")
+        np.maximum.at(largest_motor, self.panel_index[motors], self.load_va[motors])
+        full = by_category[:, [CATEGORIES.index(name) for name in ("other", "lighting", "motor")]].sum(axis=1)
+        return full + receptacle_demand + LARGEST_MOTOR_FACTOR * largest_motor
+
+    @staticmethod
+    def imbalance_pct(phase_va: np.ndarray, phase_counts: np.ndarray) -> np.ndarray:
+        """Largest deviation from the average phase load, as a percentage of the average."""
+        active = np.arange(3)[None, :] < phase_counts[:, None]
+        average = np.where(active, phase_va, 0).sum(axis=1) / phase_counts
+        deviation = np.where(active, np.abs(phase_va - average[:, None]), 0).max(axis=1)
+        return np.divide(deviation * 100, average, out=np.zeros_like(average), where=average > 0)
+
+    def parent_index(self) -> np.ndarray:
+        """Index of the panel each panel is fed from, or -1 for roots and unknown sources."""
+        lookup = {name: index for index, name in enumerate(self.panels)}
+        parents = np.array([lookup.get(source, -1) if source else -1 for source in self.fed_from], dtype=np.int32)
+        # A panel listed as fed from itself (or a cycle) is treated as a root
+        for index in range(self.panel_count):
+            seen = {index}
+            node = parents[index]
+            while node >= 0:
+                if node in seen:
+                    parents[index] = -1
+                    break
+                seen.add(node)
+                node = parents[node]
+        return parents
+
+    def _depths(self, parents: np.ndarray) -> np.ndarray:
+        depths = np.zeros(self.panel_count, dtype=np.int32)
+        for index in range(self.panel_count):
+            node = parents[index]
+            while node >= 0:
+                depths[index] += 1
+                node = parents[node]
+        return depths
+
+    def rollup(self, values: np.ndarray) -> np.ndarray:
+        """Add each panel's values into every panel upstream of it, deepest level first."""
+        parents = self.parent_index()
+        depths = self._depths(parents)
+        totals = np.array(values, dtype=np.float64, copy=True)
+        for depth in range(int(depths.max(initial=0)), 0, -1):
+            level = np.nonzero(depths == depth)[0]
+            np.add.at(totals, parents[level], totals[level])
+        return totals
+
+    def feeder_tree(self) -> Dict[str, Any]:
+        """Nested {panel: {fed panel: {...}}} tree starting from the root panels."""
+        parents = self.parent_index()
+        children: Dict[int, List[int]] = {}
+        for index, parent in enumerate(parents):
+            children.setdefault(int(parent), []).append(index)
+
+        def subtree(index: int) -> Dict[str, Any]:
+            return {self.panels[child]: subtree(child) for child in children.get(index, [])}
+
+        return subtree(-1)
+
+    def summaries(self) -> List[PanelLoadSummary]:
+        connected = self.connected_va()
+        phases = self.phase_va()
+        demand = self.demand_va()
+        imbalance = self.imbalance_pct(phases, self.phase_counts)
+        downstream_connected = self.rollup(connected)
+        downstream_demand = self.rollup(demand)
+        downstream_phases = self.rollup(phases)
+        circuits = np.bincount(self.panel_index, minlength=self.panel_count)
+        largest_breaker = np.full(self.panel_count, np.nan, dtype=np.float32)
+        np.fmax.at(largest_breaker, self.panel_index, self.breaker_amps)
+        return [
+            PanelLoadSummary(
+                panel=self.panels[i],
+                fed_from=self.fed_from[i],
+                source_file=self.source_files[i],
+                phase_count=int(self.phase_counts[i]),
+                circuit_count=int(circuits[i]),
+                connected_va=round(float(connected[i]), 1),
+                phase_va=[round(float(v), 1) for v in phases[i, :self.phase_counts[i]]],
+                imbalance_pct=round(float(imbalance[i]), 1),
+                demand_va=round(float(demand[i]), 1),
+                largest_breaker_amps=None if np.isnan(largest_breaker[i]) else float(largest_breaker[i]),
+                downstream_connected_va=round(float(downstream_connected[i]), 1),
+                downstream_demand_va=round(float(downstream_demand[i]), 1),
+                downstream_phase_va=[round(float(v), 1) for v in downstream_phases[i, :self.phase_counts[i]]],
+            )
+            for i in range(self.panel_count)
+        ]
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "panel_count": self.panel_count,
+            "circuit_count": self.circuit_count,
+            "panels": [asdict(summary) for summary in self.summaries()],
+            "feeder_tree": self.feeder_tree(),
+        }
+
+
+def write_panel_report(output_folder: Path) -> Optional[Path]:
+    """
+    Aggregate every panel in the job's structured output into panel_loads.json.
+
+    Returns:
+        Path of the report, or None if the job has no panel schedules
+    """
+    analytics = PanelAnalytics.from_output_folder(output_folder)
+    if not analytics.panel_count:
+        return None
+    report_path = Path(output_folder) / "panel_loads.json"
+    with open(report_path, "w") as f:
+        json.dump(analytics.to_json(), f, indent=2)
+    logger.info(f"Panel loads for {analytics.panel_count} panels ({analytics.circuit_count} circuits) written to {report_path}")
+    return report_path
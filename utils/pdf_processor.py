@@ -1,31 +1,197 @@
 import pymupdf
 import json
 import os
-from openai import AsyncOpenAI
-from typing import Dict, Any, Tuple
+import asyncio
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Any, Iterator, List, Optional, Tuple, Union
 import logging
-from .drawing_processor import DrawingProcessor
-from utils.file_utils import is_panel_schedule_file
+from utils.classifier import is_panel_schedule_file
+from utils.tracing import tracer
+from utils.pdf_thread import run_pdf_task
+from utils.document_handle import PdfDocumentHandle
+from utils.table_regions import find_tables_selectively
+from utils.tables import ColumnarTable
+from utils.di_models import DiParagraph
+from utils.text_index import TextIndex, TextLine, page_text_lines, read_text_lines
+from utils.ocr import is_scanned_page, ocr_page_key, ocr_scanned_page
+from config.settings import MAX_EXTRACTED_CHARS_PER_FILE, SELECTIVE_TABLE_DETECTION
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
 
 logger = logging.getLogger(__name__)
 
-async def extract_text_and_tables_from_pdf(pdf_path: str) -> str:
-    """Legacy method using PyMuPDF for basic text and table extraction"""
-    doc = pymupdf.open(pdf_path)
-    all_content = ""
-    for page in doc:
-        text = page.get_text()
-        all_content += "TEXT:\n" + text + "\n"
-        
-        tables = page.find_tables()
-        for table in tables:
-            all_content += "TABLE:\n"
-            markdown = table.to_markdown()
-            all_content += markdown + "\n"
+@dataclass
+class PageContent:
+    """Text and tables extracted from one PDF page."""
+    page_number: int
+    text: str
+    tables: List[ColumnarTable] = field(default_factory=list)
+    truncated: bool = False
+    # Positioned lines for the full-text index, when requested
+    lines: List[TextLine] = field(default_factory=list)
+    # Image-only page whose text has to come from OCR, and its OCR cache key
+    scanned: bool = False
+    ocr_key: str = ""
+
+    def render(self) -> str:
+        """Render the page in the TEXT:/TABLE: format sent to GPT."""
+        parts = ["TEXT:\n", self.text, "\n"]
+        for table in self.tables:
+            parts.extend(["TABLE:\n", table.to_markdown(), "\n"])
+        return "".join(parts)
+
+    def size(self) -> int:
+        return len(self.text) + sum(table.char_count() for table in self.tables)
+
+
+def iter_pdf_pages(pdf_path: Union[str, PdfDocumentHandle],
+                   max_chars: int = MAX_EXTRACTED_CHARS_PER_FILE,
+                   with_lines: bool = False) -> Iterator[PageContent]:
+    """
+    Extract a PDF page by page with PyMuPDF.
+    
+    pdf_path may be an open PdfDocumentHandle, in which case its shared buffer
+    is used instead of reading the file again.
+
+    Each page object is released before the next one is loaded and the
+    document is closed when the generator finishes or is closed early.
+    Extraction stops once max_chars of content have been produced; the last
+    page yielded is then flagged as truncated.
+
+    With with_lines, each page also carries its text lines and their
+    bounding boxes, read from the same textpage.
+    
+    Pages that are images without a text layer (scans) are flagged as
+    scanned, with their OCR cache key, and skip table detection.
+    """
+    with tracer.span("pdf_open"):
+        if isinstance(pdf_path, PdfDocumentHandle):
+            doc = pdf_path.open_pymupdf()
+            pdf_path = pdf_path.path
+        else:
+            doc = pymupdf.open(pdf_path)
+    try:
+        extracted = 0
+        for page_number in range(doc.page_count):
+            page = doc.load_page(page_number)
+            with tracer.span("get_text", page=page_number + 1) as span:
+                # Shared with the table pre-pass so the page text is only parsed once
+                textpage = page.get_textpage(flags=pymupdf.TEXTFLAGS_TEXT)
+                text = page.get_text(textpage=textpage)
+                lines = page_text_lines(page, page_number + 1, textpage) if with_lines else []
+                span.set(chars=len(text))
+            
+            # Listing image resources is cheap; coverage is only measured on pages that have any
+            scanned = bool(page.get_images()) and is_scanned_page(page, textpage)
+            if scanned:
+                tables = []
+                ocr_key = ocr_page_key(doc, page)
+            else:
+                ocr_key = ""
+                with tracer.span("find_tables", page=page_number + 1) as span:
+                    if SELECTIVE_TABLE_DETECTION:
+                        found, searches = find_tables_selectively(page, textpage)
+                    else:
+                        found, searches = page.find_tables().tables, 1
+                    tables = [ColumnarTable.from_pymupdf(table) for table in found]
+                    span.set(tables=len(tables), searches=searches)
+            del textpage, page
+            
+            content = PageContent(page_number=page_number + 1, text=text, tables=tables, lines=lines,
+                                  scanned=scanned, ocr_key=ocr_key)
+            extracted += content.size()
+            if extracted > max_chars:
+                logger.warning(
+                    f"Extraction of {pdf_path} stopped at page {page_number + 1}: "
+                    f"{extracted} chars exceeds the per-file limit of {max_chars}"
+                )
+                content.truncated = True
+                yield content
+                return
+            yield content
+    finally:
+        doc.close()
+        # Release fonts and images MuPDF cached for this document
+        pymupdf.TOOLS.store_shrink(100)
+
+
+async def aiter_pdf_pages(pdf_path: Union[str, PdfDocumentHandle],
+                          max_chars: int = MAX_EXTRACTED_CHARS_PER_FILE,
+                          with_lines: bool = False) -> AsyncIterator[PageContent]:
+    """
+    Stream iter_pdf_pages without blocking the event loop.
+
+    Every page is extracted on the dedicated PyMuPDF thread.
+    """
+    if not isinstance(pdf_path, PdfDocumentHandle):
+        pdf_path = str(pdf_path)
+    pages = iter_pdf_pages(pdf_path, max_chars, with_lines)
+    try:
+        while True:
+            page = await run_pdf_task(next, pages, None)
+            if page is None:
+                break
+            yield page
+    finally:
+        await run_pdf_task(pages.close)
+
+
+async def extract_text_and_tables_from_pdf(pdf_path: str, handle: Optional[PdfDocumentHandle] = None,
+                                           text_index: Optional[TextIndex] = None) -> str:
+    """
+    Legacy method using PyMuPDF for basic text and table extraction
+
+    Each page is rendered as it arrives and its tables are released, so only
+    the rendered text is held. Scanned pages are read with local OCR in the
+    OCR process pool while the remaining pages are extracted. When the file
+    exceeds MAX_EXTRACTED_CHARS_PER_FILE, the content ends with a note
+    saying where it was cut. With a text_index, the text lines of every page
+    (including those past the cut) are added to it once extraction finishes.
+    """
+    parts: List[str] = []
+    lines: List[TextLine] = []
+    # Scanned pages are kept until their OCR text arrives; they hold no tables
+    ocr_pages: Dict[int, Tuple[asyncio.Task, PageContent]] = {}
+    last_page: Optional[PageContent] = None
+    async for page in aiter_pdf_pages(handle or pdf_path, MAX_EXTRACTED_CHARS_PER_FILE, text_index is not None):
+        if page.scanned:
+            task = asyncio.create_task(
+                ocr_scanned_page(str(handle.path if handle else pdf_path), page.page_number, page.ocr_key)
+            )
+            ocr_pages[len(parts)] = (task, page)
+            parts.append("")
+        else:
+            parts.append(page.render())
+            lines.extend(page.lines)
+        last_page = page
+    for index, (task, page) in ocr_pages.items():
+        ocr_lines = await task
+        if ocr_lines:
+            page.text = "\n".join(line.text for line in ocr_lines) + "\n"
+            page.lines = ocr_lines if text_index is not None else []
+        parts[index] = page.render()
+        lines.extend(page.lines)
     
-    return all_content
+    if last_page is not None and last_page.truncated:
+        parts.append(
+            f"NOTE: Content truncated after page {last_page.page_number}: the file exceeds the extraction "
+            f"limit of {MAX_EXTRACTED_CHARS_PER_FILE} characters and later pages are not included.\n"
+        )
+        if text_index is not None:
+            lines.extend(await run_pdf_task(read_text_lines, handle or str(pdf_path), last_page.page_number))
+    if text_index is not None:
+        with tracer.span("text_index", lines=len(lines)):
+            await asyncio.to_thread(text_index.index_file, pdf_path, lines)
+    return "".join(parts)
+
+async def index_pdf_text(pdf_path: str, text_index: TextIndex, handle: Optional[PdfDocumentHandle] = None) -> int:
+    """Add a file's text lines to the full-text index without extracting tables (e.g. after Document Intelligence)."""
+    lines = await run_pdf_task(read_text_lines, handle or str(pdf_path))
+    with tracer.span("text_index", lines=len(lines)):
+        return await asyncio.to_thread(text_index.index_file, pdf_path, lines)
 
-async def structure_panel_data(client: AsyncOpenAI, raw_content: str) -> dict:
+async def structure_panel_data(client: "AsyncOpenAI", raw_content: str) -> dict:
     prompt = f"""
     You are an expert in electrical engineering and panel schedules. 
     Please structure the following content from an electrical panel schedule into a valid JSON format. 
@@ -47,8 +213,10 @@ async def structure_panel_data(client: AsyncOpenAI, raw_content: str) -> dict:
     )
     return json.loads(response.choices[0].message.content)
 
-async def process_pdf(pdf_path: str, output_folder: str, client: AsyncOpenAI):
+async def process_pdf(pdf_path: str, output_folder: str, client: "AsyncOpenAI"):
     """Process PDF using Azure Document Intelligence with PyMuPDF fallback"""
+    # drawing_processor imports this module for its PyMuPDF fallback
+    from .drawing_processor import DrawingProcessor
     print(f"Processing PDF: {pdf_path}")
     
     if is_panel_schedule_file(str(pdf_path)):
@@ -80,14 +248,13 @@ def _convert_azure_to_raw_content(azure_result: Dict[str, Any]) -> str:
     
     # Add text blocks
     for block in azure_result.get('text_blocks', []):
-        content += "TEXT:\n" + block.get('content', '') + "\n"
+        text = block.text if isinstance(block, DiParagraph) else block.get('content', '')
+        content += "TEXT:\n" + text + "\n"
     
     # Add tables
     for table in azure_result.get('tables', []):
         content += "TABLE:\n"
-        if isinstance(table, dict):  # Ensure table is in correct format
-            rows = table.get('cells', [])
-            if rows:
-                content += "\n".join([" | ".join(row) for row in rows]) + "\n"
+        if isinstance(table, ColumnarTable):
+            content += table.to_markdown()
     
     return content
\ No newline at end of file
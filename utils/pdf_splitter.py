@@ -0,0 +1,74 @@
+import os
+import math
+import logging
+from typing import List, Optional, Tuple
+
+import pymupdf
+
+logger = logging.getLogger(__name__)
+
+# Document Intelligence rejects images larger than 10,000 px on a side
+MAX_TILE_PIXELS = 8000
+
+
+def plan_page_ranges(pdf_path: str, max_bytes: int) -> List[Tuple[int, int]]:
+    """
+    Split a PDF into 0-based inclusive page ranges of roughly max_bytes each.
+
+    Ranges are sized from the average bytes per page; extract_page_range
+    reports a range that still turns out too large so it can be split further.
+    """
+    with pymupdf.open(pdf_path) as doc:
+        page_count = doc.page_count
+    if page_count == 0:
+        return []
+    file_size = max(os.path.getsize(pdf_path), 1)
+    pages_per_range = max(1, int(page_count * max_bytes / file_size))
+    return [
+        (start, min(start + pages_per_range, page_count) - 1)
+        for start in range(0, page_count, pages_per_range)
+    ]
+
+
+def extract_page_range(pdf_path: str, start: int, end: int, max_bytes: int) -> Optional[bytes]:
+    """
+    Write pages start..end (0-based, inclusive) of a PDF to a new in-memory PDF.
+
+    The source is read from disk page by page rather than loaded whole.
+
+    Returns:
+        The sub-document bytes, or None if they exceed max_bytes
+    """
+    with pymupdf.open(pdf_path) as doc, pymupdf.open() as part:
+        part.insert_pdf(doc, from_page=start, to_page=end)
+        data = part.tobytes(garbage=3, deflate=True)
+    if len(data) > max_bytes:
+        logger.info(f"Pages {start + 1}-{end + 1} of {pdf_path} are {len(data)} bytes, above {max_bytes}")
+        return None
+    return data
+
+
+def plan_page_tiles(pdf_path: str, page_number: int, dpi: int) -> List[Tuple[float, float, float, float]]:
+    """
+    Split one oversized page (0-based) into clip rectangles that render under MAX_TILE_PIXELS per side.
+    """
+    with pymupdf.open(pdf_path) as doc:
+        rect = doc.load_page(page_number).rect
+    scale = dpi / 72
+    columns = max(1, math.ceil(rect.width * scale / MAX_TILE_PIXELS))
+    rows = max(1, math.ceil(rect.height * scale / MAX_TILE_PIXELS))
+    # Large plots are usually a single drawing; split at least 2x2 so the tiles stay small
+    columns, rows = max(columns, 2), max(rows, 2)
+    width, height = rect.width / columns, rect.height / rows
+    return [
+        (rect.x0 + c * width, rect.y0 + r * height, rect.x0 + (c + 1) * width, rect.y0 + (r + 1) * height)
+        for r in range(rows)
+        for c in range(columns)
+    ]
+
+
+def render_page_tile(pdf_path: str, page_number: int, clip: Tuple[float, float, float, float], dpi: int) -> bytes:
+    """Render a clip region of one page (0-based) to PNG bytes."""
+    with pymupdf.open(pdf_path) as doc:
+        pixmap = doc.load_page(page_number).get_pixmap(clip=pymupdf.Rect(clip), dpi=dpi)
+        return pixmap.tobytes("png")
@@ -0,0 +1,24 @@
+import asyncio
+import functools
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+T = TypeVar("T")
+
+# PyMuPDF is not thread-safe, so every PyMuPDF call made by the async pipeline
+# runs on this single thread. It keeps the event loop responsive without ever
+# touching MuPDF from two threads at once.
+_pdf_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pymupdf")
+
+
+async def run_pdf_task(func: Callable[..., T], *args: Any) -> T:
+    """
+    Run a PyMuPDF-bound callable on the dedicated PDF thread.
+
+    The caller's context (e.g. the file tracing spans are attributed to) is
+    carried over to the thread.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(_pdf_executor, functools.partial(context.run, func, *args))
@@ -0,0 +1,153 @@
+import sys
+import time
+import asyncio
+import shutil
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Optional, Set, TextIO
+
+from utils.tracing import Span
+from config.settings import PROGRESS_REFRESH_INTERVAL, PROGRESS_SUMMARY_INTERVAL
+
+# Stages shown with their completion counts, in pipeline order
+DISPLAY_STAGES = ("title_block", "extract", "ocr", "di_poll", "gpt_request", "write_json")
+STAGE_LABELS = {"title_block": "title", "di_poll": "di", "gpt_request": "gpt", "write_json": "saved"}
+
+
+def _format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    return f"{seconds // 60}m{seconds % 60:02d}s"
+
+
+class JobProgress:
+    """
+    One progress line for the whole job, fed by pipeline events.
+
+    Workers report files starting and finishing, discovery reports the
+    total, and the tracer listener counts finished stages, tokens and
+    stage errors. Rendering happens on its own timer, never per event: on
+    a terminal the line is redrawn in place at most every
+    PROGRESS_REFRESH_INTERVAL seconds, and when output is not a terminal
+    (CI, nohup, redirected) a plain summary line is printed every
+    PROGRESS_SUMMARY_INTERVAL seconds.
+
+    Usage:
+        progress = JobProgress()
+        tracer.add_listener(progress.on_span)
+        async with progress:
+            ...  # progress.set_total(n), file_started(path), file_finished(path, ok)
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None, interactive: Optional[bool] = None):
+        self.stream = stream or sys.stderr
+        self.interactive = self.stream.isatty() if interactive is None else interactive
+        self.total = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.in_flight: Set[str] = set()
+        self.stages: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.tokens = 0
+        self.start = time.monotonic()
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._last_line = ""
+
+    # Events
+
+    def set_total(self, total: int) -> None:
+        with self._lock:
+            self.total = total
+
+    def file_started(self, pdf_path: Path) -> None:
+        with self._lock:
+            self.in_flight.add(Path(pdf_path).name)
+
+    def file_finished(self, pdf_path: Path, success: bool) -> None:
+        with self._lock:
+            self.in_flight.discard(Path(pdf_path).name)
+            if success:
+                self.succeeded += 1
+            else:
+                self.failed += 1
+
+    def on_span(self, span: Span) -> None:
+        """Tracer listener: stage counts, token totals and errors by stage."""
+        with self._lock:
+            if "error" in span.attrs:
+                self.errors[span.name] += 1
+            else:
+                self.stages[span.name] += 1
+            self.tokens += span.attrs.get("input_tokens", 0) + span.attrs.get("output_tokens", 0)
+
+    # Rendering
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            done = self.succeeded + self.failed
+            elapsed = max(time.monotonic() - self.start, 1e-6)
+            remaining = max(self.total - done, 0)
+            return {
+                "done": done,
+                "total": self.total,
+                "failed": self.failed,
+                "in_flight": len(self.in_flight),
+                "tokens_per_second": self.tokens / elapsed,
+                "elapsed": elapsed,
+                # Completed files so far set the pace for the rest
+                "eta": elapsed / done * remaining if done else None,
+            }
+
+    def render(self) -> str:
+        """The progress line, e.g. "Files 12/40 (1 failed) | 5 in flight | extract 14 gpt 12 | 850 tok/s | ETA 3m10s"."""
+        state = self.snapshot()
+        parts = [f"Files {state['done']}/{state['total']}" + (f" ({state['failed']} failed)" if state["failed"] else "")]
+        parts.append(f"{state['in_flight']} in flight")
+        with self._lock:
+            stages = " ".join(
+                f"{STAGE_LABELS.get(stage, stage)} {self.stages[stage]}" for stage in DISPLAY_STAGES if self.stages[stage]
+            )
+            errors = " ".join(f"{stage} {count}" for stage, count in self.errors.most_common())
+        if stages:
+            parts.append(stages)
+        parts.append(f"{state['tokens_per_second']:.0f} tok/s")
+        parts.append(f"ETA {_format_duration(state['eta'])}" if state["eta"] is not None else "ETA --")
+        if errors:
+            parts.append(f"errors: {errors}")
+        return " | ".join(parts)
+
+    def draw(self, final: bool = False) -> None:
+        line = self.render()
+        if self.interactive:
+            width = shutil.get_terminal_size((120, 20)).columns - 1
+            if line != self._last_line or final:
+                self.stream.write("\r\x1b[2K" + line[:width] + ("\n" if final else ""))
+                self.stream.flush()
+        else:
+            self.stream.write(f"[{_format_duration(time.monotonic() - self.start)}] {line}\n")
+            self.stream.flush()
+        self._last_line = line
+
+    async def _refresh(self) -> None:
+        interval = PROGRESS_REFRESH_INTERVAL if self.interactive else PROGRESS_SUMMARY_INTERVAL
+        while True:
+            await asyncio.sleep(interval)
+            self.draw()
+
+    async def __aenter__(self) -> "JobProgress":
+        self.start = time.monotonic()
+        self._task = asyncio.create_task(self._refresh())
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.draw(final=True)
@@ -0,0 +1,90 @@
+import json
+from typing import Any, Dict, List, Optional
+
+DRAWING_INSTRUCTIONS = {
+    "Electrical": "Focus on panel schedules, circuit info, equipment schedules with electrical characteristics, and installation notes.",
+    "Mechanical": "Capture equipment schedules, HVAC details (CFM, capacities), and installation instructions.",
+    "Plumbing": "Include fixture schedules, pump details, water heater specs, pipe sizing, and system instructions.",
+    "Architectural": """
+    Extract and structure the following information:
+    1. Room details: Create a 'rooms' array with objects for each room, including:
+       - 'number': Room number (as a string)
+       - 'name': Room name
+       - 'finish': Ceiling finish
+       - 'height': Ceiling height
+    2. Room finish schedules
+    3. Door/window details
+    4. Wall types
+    5. Architectural notes
+    Ensure all rooms are captured and properly structured in the JSON output.
+    """,
+    "General": "Organize all relevant data into logical categories based on content type."
+}
+
+# Guidelines for every drawing type; the type's own instructions come last in the system message
+GLOBAL_RULES = """Parse this drawing/schedule into a structured JSON format. Guidelines:
+1. For text: Extract key information, categorize elements.
+2. For tables: Preserve structure, use nested arrays/objects.
+3. Create a hierarchical structure, use consistent key names.
+4. Include metadata (drawing number, scale, date) if available.
+5. For all drawing types, if room information is present, always include a 'rooms' array in the JSON output, with each room having at least 'number' and 'name' fields.
+Ensure the entire response is a valid JSON object.
+"""
+
+
+class PromptBuilder:
+    """
+    Build chat messages with a stable, byte-identical prefix.
+
+    Provider-side prompt caching reuses the longest prefix already seen
+    (in 128-token steps, from 1,024 tokens). The system message is laid out
+    from most to least widely shared: global guidelines (same for every
+    request), job context (same for the whole job), then the drawing type's
+    instructions. Everything specific to one sheet goes in the user
+    message, so the system message is byte-identical for every sheet of a
+    type and is the start of any prefix the provider caches. It is not
+    padded to reach the caching threshold.
+
+    Usage:
+        prompts = PromptBuilder({"job": "Electric Shuffle"})
+        messages = prompts.messages(raw_content, "Electrical")
+    """
+
+    def __init__(self, job_context: Optional[Dict[str, Any]] = None):
+        # Sorted keys so the same context always serializes to the same bytes
+        self.job_context = dict(sorted((job_context or {}).items()))
+        self._system: Dict[str, str] = {}
+        self._prefix = GLOBAL_RULES
+        if self.job_context:
+            self._prefix += "\nJob context shared by every sheet:\n" + json.dumps(self.job_context, sort_keys=True) + "\n"
+
+    @property
+    def shared_prefix(self) -> str:
+        """The part of the system message that is the same for every drawing type."""
+        return self._prefix
+
+    def system_prompt(self, drawing_type: str) -> str:
+        if drawing_type not in self._system:
+            instructions = DRAWING_INSTRUCTIONS.get(drawing_type, DRAWING_INSTRUCTIONS["General"])
+            self._system[drawing_type] = (
+                self._prefix + f"\nDrawing type: {drawing_type}\nInstructions for this type:\n"
+                + instructions.strip() + "\n"
+            )
+        return self._system[drawing_type]
+
+    def messages(self, raw_content: str, drawing_type: str) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": self.system_prompt(drawing_type)},
+            {"role": "user", "content": raw_content}
+        ]
+
+
+def cached_tokens(usage: Any) -> int:
+    """Prompt tokens served from the provider's cache, from a usage object or dict."""
+    if usage is None:
+        return 0
+    details = usage.get("prompt_tokens_details") if isinstance(usage, dict) else getattr(usage, "prompt_tokens_details", None)
+    if details is None:
+        return 0
+    value = details.get("cached_tokens") if isinstance(details, dict) else getattr(details, "cached_tokens", None)
+    return value or 0
@@ -0,0 +1,175 @@
+import os
+import time
+import asyncio
+import itertools
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import pymupdf
+
+logger = logging.getLogger(__name__)
+
+POLICY_LONGEST_FIRST = "longest_first"
+POLICY_FIFO = "fifo"
+SCHEDULING_POLICIES = (POLICY_LONGEST_FIRST, POLICY_FIFO)
+
+# Relative cost of one page per drawing type. Architectural sheets carry room
+# data and produce the longest GPT responses; panel schedules go through
+# Document Intelligence before GPT, so they get their own multiplier.
+DRAWING_TYPE_WEIGHTS = {
+    "Architectural": 1.5,
+    "Electrical": 1.2,
+    "Mechanical": 1.1,
+    "Plumbing": 1.0,
+    "General": 1.0,
+}
+PANEL_SCHEDULE_WEIGHT = 2.0
+PAGE_COST = 1.0
+MB_COST = 0.05
+
+
+@dataclass
+class ScheduledFile:
+    """A PDF queued for processing together with its estimated cost."""
+    path: Path
+    drawing_type: str
+    is_panel_schedule: bool
+    size_bytes: int
+    page_count: int
+    estimated_cost: float
+    queued_at: float = 0.0  # time.perf_counter() when added to a JobQueue
+
+
+def count_pages(pdf_path: Path) -> int:
+    """
+    Count the pages of a PDF without extracting any content.
+
+    Returns 1 if the file can't be opened so that it still gets scheduled.
+    """
+    try:
+        with pymupdf.open(pdf_path) as doc:
+            return doc.page_count
+    except Exception as e:
+        logger.warning(f"Could not count pages for {pdf_path}: {str(e)}")
+        return 1
+
+
+def estimate_cost(pdf_path: Path, drawing_type: str, is_panel_schedule: bool) -> ScheduledFile:
+    """
+    Estimate the relative processing cost of a PDF from its size, page count and type.
+
+    Args:
+        pdf_path: Path to the PDF file
+        drawing_type: Drawing type as returned by get_drawing_type
+        is_panel_schedule: Whether the file is routed to Document Intelligence
+
+    Returns:
+        ScheduledFile with the estimate filled in
+    """
+    try:
+        size_bytes = os.path.getsize(pdf_path)
+    except OSError:
+        size_bytes = 0
+    page_count = count_pages(pdf_path)
+
+    weight = DRAWING_TYPE_WEIGHTS.get(drawing_type, DRAWING_TYPE_WEIGHTS["General"])
+    if is_panel_schedule:
+        weight *= PANEL_SCHEDULE_WEIGHT
+    estimated_cost = page_count * PAGE_COST * weight + (size_bytes / 1_000_000) * MB_COST
+
+    return ScheduledFile(
+        path=pdf_path,
+        drawing_type=drawing_type,
+        is_panel_schedule=is_panel_schedule,
+        size_bytes=size_bytes,
+        page_count=page_count,
+        estimated_cost=estimated_cost,
+    )
+
+
+def order_files(files: List[ScheduledFile], policy: str = POLICY_LONGEST_FIRST,
+                prioritize_panel_schedules: bool = False) -> List[ScheduledFile]:
+    """
+    Order scheduled files according to the given policy.
+
+    Longest-job-first starts the most expensive files first so a large set
+    never ends up alone at the tail of the job. When prioritize_panel_schedules
+    is set, panel schedules go ahead of everything else (ordered among
+    themselves by the same policy).
+    """
+    if policy not in SCHEDULING_POLICIES:
+        raise ValueError(f"Unknown scheduling policy: {policy}")
+
+    if policy == POLICY_LONGEST_FIRST:
+        ordered = sorted(files, key=lambda f: f.estimated_cost, reverse=True)
+    else:
+        ordered = list(files)
+
+    if prioritize_panel_schedules:
+        # sorted() is stable, so the policy order is kept within each group
+        ordered = sorted(ordered, key=lambda f: not f.is_panel_schedule)
+    return ordered
+
+
+def priority_key(item: ScheduledFile, policy: str = POLICY_LONGEST_FIRST,
+                 prioritize_panel_schedules: bool = False) -> Tuple[int, float]:
+    """
+    Sort key used by JobQueue; lower keys are processed first.
+
+    Matches the ordering produced by order_files.
+    """
+    group = 0 if (prioritize_panel_schedules and item.is_panel_schedule) else 1
+    cost = -item.estimated_cost if policy == POLICY_LONGEST_FIRST else 0.0
+    return group, cost
+
+
+class JobQueue:
+    """
+    Priority queue feeding scheduled files to the processing workers.
+
+    Files can be added while discovery is still running; workers always take
+    the best candidate among the files discovered so far. Call close() once
+    discovery is finished so that get() returns None to idle workers.
+    """
+
+    def __init__(self, policy: str = POLICY_LONGEST_FIRST, prioritize_panel_schedules: bool = False):
+        if policy not in SCHEDULING_POLICIES:
+            raise ValueError(f"Unknown scheduling policy: {policy}")
+        self.policy = policy
+        self.prioritize_panel_schedules = prioritize_panel_schedules
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._counter = itertools.count()
+        self._closed = False
+        self.total_queued = 0
+
+    def put(self, item: ScheduledFile) -> None:
+        """Add a file to the queue."""
+        if self._closed:
+            raise RuntimeError("Cannot add files to a closed JobQueue")
+        key = priority_key(item, self.policy, self.prioritize_panel_schedules)
+        item.queued_at = time.perf_counter()
+        # The counter keeps FIFO order between equal keys and avoids comparing items
+        self._queue.put_nowait((0, key, next(self._counter), item))
+        self.total_queued += 1
+
+    def close(self) -> None:
+        """Signal that no more files will be added."""
+        if not self._closed:
+            self._closed = True
+            # Sentinels sort after every real item
+            self._queue.put_nowait((1, (0, 0.0), next(self._counter), None))
+
+    async def get(self) -> Optional[ScheduledFile]:
+        """Return the next file to process, or None once the queue is closed and drained."""
+        entry = await self._queue.get()
+        item = entry[3]
+        if item is None:
+            # Leave the sentinel in place for the other workers
+            self._queue.put_nowait(entry)
+        return item
+
+    def qsize(self) -> int:
+        """Number of files waiting to be processed."""
+        return self._queue.qsize() - (1 if self._closed else 0)
@@ -0,0 +1,261 @@
+import re
+import asyncio
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pymupdf
+
+from utils.file_utils import iter_pdf_files, sheet_number_from_filename
+from utils.pdf_thread import run_pdf_task
+from utils.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+SHEET_NUMBER_WORD = re.compile(r"^[A-Z]{1,3}-?\d+(?:\.\d+)?[A-Z]?$")
+# Cover sheets sit in the job root or a discipline folder; deeper folders aren't searched
+COVER_SHEET_SEARCH_DEPTH = 1
+# Cover and index sheets: G0.0, G-000, T0.00, CS, or a file named for its index
+COVER_SHEET_NUMBER = re.compile(r"^(?:G|T|GI|CS)-?0+(?:\.0+)?$")
+COVER_SHEET_NAME = re.compile(r"COVER|TITLE[-_ ]SHEET|SHEET[-_ ]INDEX|DRAWING[-_ ]INDEX", re.IGNORECASE)
+INDEX_HEADING = re.compile(
+    r"(?:SHEET|DRAWING)\s+(?:INDEX|LIST)|INDEX\s+OF\s+(?:DRAWINGS|SHEETS)|LIST\s+OF\s+(?:DRAWINGS|SHEETS)",
+    re.IGNORECASE
+)
+
+# Discipline headings of the index table ("ELECTRICAL", "MECHANICAL DRAWINGS"), mapped to the pipeline's drawing types
+DISCIPLINE_HEADINGS = [
+    (re.compile(r"GENERAL|TITLE", re.IGNORECASE), "General"),
+    (re.compile(r"ARCHITECTURAL|INTERIORS?", re.IGNORECASE), "Architectural"),
+    (re.compile(r"ELECTRICAL", re.IGNORECASE), "Electrical"),
+    (re.compile(r"MECHANICAL|HVAC", re.IGNORECASE), "Mechanical"),
+    (re.compile(r"PLUMBING", re.IGNORECASE), "Plumbing"),
+    # S sheets are routed as Site by file name; keep structural sheets in the same drawing type
+    (re.compile(r"STRUCTURAL", re.IGNORECASE), "Site"),
+    (re.compile(r"CIVIL|LANDSCAPE", re.IGNORECASE), "Civil"),
+    (re.compile(r"SITE", re.IGNORECASE), "Site"),
+    (re.compile(r"FIRE\s+ALARM", re.IGNORECASE), "Fire Alarm"),
+    (re.compile(r"LOW\s+VOLTAGE|TECHNOLOGY|TELECOM(?:MUNICATIONS)?", re.IGNORECASE), "Low Voltage"),
+    (re.compile(r"KITCHEN|FOOD\s*SERVICE", re.IGNORECASE), "Kitchen"),
+]
+HEADING_SUFFIX = re.compile(r"\s+(?:DRAWINGS|SHEETS)$", re.IGNORECASE)
+
+# Sheet classes from the sheet title, first match wins
+SHEET_CLASSES = [
+    ("panel_schedule", re.compile(r"PANEL\s*(?:BOARD\s*)?SCHEDULES?|PANELBOARDS?", re.IGNORECASE)),
+    ("schedule", re.compile(r"SCHEDULES?\b", re.IGNORECASE)),
+    ("riser", re.compile(r"RISER|ONE[- ]LINE|SINGLE[- ]LINE|DIAGRAMS?\b", re.IGNORECASE)),
+    ("plan", re.compile(r"\bPLANS?\b", re.IGNORECASE)),
+    ("elevation", re.compile(r"ELEVATIONS?\b", re.IGNORECASE)),
+    ("section", re.compile(r"SECTIONS?\b", re.IGNORECASE)),
+    ("detail", re.compile(r"DETAILS?\b", re.IGNORECASE)),
+    ("specification", re.compile(r"SPECIFICATIONS?|\bSPECS\b", re.IGNORECASE)),
+    ("cover", re.compile(r"COVER|TITLE\s+SHEET|INDEX|GENERAL\s+NOTES|LEGEND|SYMBOLS|ABBREVIATIONS", re.IGNORECASE)),
+]
+
+# A gap between words wider than this many word heights separates table columns
+COLUMN_GAP = 1.5
+
+
+@dataclass
+class SheetEntry:
+    """One row of the sheet index."""
+    sheet_number: str
+    title: str
+    discipline: Optional[str]  # From the index's discipline heading, when it has one
+    sheet_class: str
+
+
+def normalize_sheet_number(sheet_number: str) -> str:
+    """E-5.00 and e5.00 are the same sheet."""
+    return re.sub(r"[\s-]", "", sheet_number.upper())
+
+
+def classify_sheet_title(title: str) -> str:
+    """Sheet class of a title: panel_schedule, schedule, riser, plan, ... or general."""
+    for sheet_class, pattern in SHEET_CLASSES:
+        if pattern.search(title):
+            return sheet_class
+    return "general"
+
+
+def _discipline_heading(text: str) -> Optional[str]:
+    text = HEADING_SUFFIX.sub("", text.strip())
+    for pattern, discipline in DISCIPLINE_HEADINGS:
+        if pattern.fullmatch(text):
+            return discipline
+    return None
+
+
+def _rows(words: List[Tuple]) -> List[List[Tuple]]:
+    """Group page words (x0, y0, x1, y1, text, ...) into rows, left to right."""
+    rows: List[List[Tuple]] = []
+    for word in sorted(words, key=lambda word: ((word[1] + word[3]) / 2, word[0])):
+        center = (word[1] + word[3]) / 2
+        if rows:
+            last = rows[-1][0]
+            if abs(center - (last[1] + last[3]) / 2) < (last[3] - last[1]) * 0.5:
+                rows[-1].append(word)
+                continue
+        rows.append([word])
+    return [sorted(row, key=lambda word: word[0]) for row in rows]
+
+
+def _runs(row: List[Tuple]) -> List[List[Tuple]]:
+    """Split a row into runs of words, cut at column-sized gaps."""
+    runs = [[row[0]]]
+    for previous, word in zip(row, row[1:]):
+        if word[0] - previous[2] > (previous[3] - previous[1]) * COLUMN_GAP:
+            runs.append([word])
+        else:
+            runs[-1].append(word)
+    return runs
+
+
+def parse_sheet_index(page: pymupdf.Page) -> Dict[str, SheetEntry]:
+    """
+    Parse the sheet index table of a cover sheet.
+
+    A row of the index is a sheet number followed by its title; further
+    columns (revision, issue marks) are separated by wider gaps and ignored.
+    Indexes laid out in several columns are read column by column, and a
+    discipline heading (ELECTRICAL, MECHANICAL, ...) applies to the rows
+    below it in its own column.
+
+    Returns:
+        Entries by normalized sheet number; empty when the page has no index.
+    """
+    if not INDEX_HEADING.search(page.get_text()):
+        return {}
+    entries: Dict[str, SheetEntry] = {}
+    headings: List[Tuple[float, str]] = []  # (x0, discipline) of the latest heading per column
+    for row in _rows(page.get_text("words")):
+        runs = _runs(row)
+        titles = set()
+        for i, run in enumerate(runs):
+            if i in titles:
+                continue
+            text = " ".join(word[4] for word in run)
+            discipline = _discipline_heading(text)
+            if discipline:
+                headings = [heading for heading in headings if abs(heading[0] - run[0][0]) > run[0][3] - run[0][1]]
+                headings.append((run[0][0], discipline))
+                continue
+            number = run[0][4].upper()
+            if not SHEET_NUMBER_WORD.match(number):
+                continue
+            # The title is the rest of the run, or the next run when the number has a column of its own
+            own_column = len(run) == 1
+            title_words = runs[i + 1] if own_column and i + 1 < len(runs) else run[1:]
+            title = " ".join(word[4] for word in title_words)
+            if len(re.findall(r"[A-Za-z]", title)) < 3 or SHEET_NUMBER_WORD.match(title_words[0][4].upper()):
+                continue
+            if own_column:
+                titles.add(i + 1)
+            x0 = run[0][0]
+            left = [heading for heading in headings if heading[0] <= x0 + (run[0][3] - run[0][1])]
+            discipline = max(left)[1] if left else None
+            entries[normalize_sheet_number(number)] = SheetEntry(number, title, discipline, classify_sheet_title(title))
+    return entries
+
+
+def find_cover_sheet(job_folder: Path) -> Optional[Path]:
+    """
+    The job's cover/index sheet, found by file name only (no PDF is opened).
+
+    Only the job root and its first-level folders are listed, so discovery
+    isn't held back by a walk of the whole tree.
+    """
+    for pdf_file in iter_pdf_files(str(job_folder), max_depth=COVER_SHEET_SEARCH_DEPTH):
+        sheet_number = sheet_number_from_filename(pdf_file)
+        if COVER_SHEET_NUMBER.match(sheet_number) or COVER_SHEET_NAME.search(Path(pdf_file).stem):
+            return Path(pdf_file)
+    return None
+
+
+def read_sheet_index(pdf_path: Path) -> Dict[str, SheetEntry]:
+    """
+    Sheet index entries from the first pages of a cover sheet.
+
+    Must run on the PyMuPDF thread.
+    """
+    entries: Dict[str, SheetEntry] = {}
+    with pymupdf.open(pdf_path) as doc:
+        for page in doc.pages(0, min(doc.page_count, 3)):
+            entries.update(parse_sheet_index(page))
+    return entries
+
+
+class SheetIndex:
+    """
+    Sheet number to discipline and sheet class, from the job's cover sheet.
+
+    Built once per job before discovery, then used to route every file:
+    its drawing type (output folder and prompt) and whether it goes to
+    Document Intelligence. Sheets the index doesn't list, and jobs without
+    an index, fall back to the file name classifiers. For Document
+    Intelligence the index only adds sheets it lists as panel schedules;
+    files the name rule sends there still go.
+
+    Usage:
+        sheet_index = await load_sheet_index(job_folder)
+        router = sheet_index.router(get_drawing_type, is_panel_schedule_file)
+        async for pdf_path, drawing_type, is_panel in discover_pdf_files(
+            job_folder, router.drawing_type, router.is_panel_schedule
+        ):
+    """
+
+    def __init__(self, entries: Optional[Dict[str, SheetEntry]] = None, source: Optional[Path] = None):
+        self.entries = entries or {}
+        self.source = source
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def lookup(self, pdf_path) -> Optional[SheetEntry]:
+        sheet_number = sheet_number_from_filename(pdf_path)
+        return self.entries.get(normalize_sheet_number(sheet_number)) if sheet_number else None
+
+    def router(self, get_drawing_type: Callable[[Path], str],
+               is_panel_schedule: Callable[[str], bool]) -> "SheetRouter":
+        return SheetRouter(self, get_drawing_type, is_panel_schedule)
+
+
+class SheetRouter:
+    """Drawing type and panel schedule classifiers that consult the sheet index first."""
+
+    def __init__(self, sheet_index: SheetIndex, get_drawing_type: Callable[[Path], str],
+                 is_panel_schedule: Callable[[str], bool]):
+        self.sheet_index = sheet_index
+        self._get_drawing_type = get_drawing_type
+        self._is_panel_schedule = is_panel_schedule
+
+    def drawing_type(self, pdf_path: Path) -> str:
+        entry = self.sheet_index.lookup(pdf_path)
+        if entry is not None and entry.discipline:
+            return entry.discipline
+        # Listed without a heading: the discipline follows from the listed sheet number
+        return self._get_drawing_type(Path(entry.sheet_number) if entry is not None else Path(pdf_path))
+
+    def is_panel_schedule(self, pdf_path: str) -> bool:
+        # The index only adds panel schedules; the configured name rule still applies to every sheet
+        entry = self.sheet_index.lookup(pdf_path)
+        return (entry is not None and entry.sheet_class == "panel_schedule") or self._is_panel_schedule(pdf_path)
+
+
+async def load_sheet_index(job_folder: Path) -> SheetIndex:
+    """Find the job's cover sheet and parse its sheet index; empty when there is none."""
+    with tracer.span("sheet_index") as span:
+        cover_sheet = await asyncio.to_thread(find_cover_sheet, job_folder)
+        if cover_sheet is None:
+            logger.info(f"No cover sheet found in {job_folder}; routing by file name")
+            return SheetIndex()
+        try:
+            entries = await run_pdf_task(read_sheet_index, cover_sheet)
+        except Exception as e:
+            logger.error(f"Failed to read the sheet index of {cover_sheet}: {str(e)}")
+            return SheetIndex()
+        span.set(sheets=len(entries))
+        logger.info(f"Sheet index of {cover_sheet.name}: {len(entries)} sheets")
+        return SheetIndex(entries, cover_sheet)
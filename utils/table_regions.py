@@ -0,0 +1,258 @@
+import logging
+from collections import defaultdict
+from statistics import median
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import pymupdf
+
+logger = logging.getLogger(__name__)
+
+# A segment counts as a ruling line if it is within this many points of
+# horizontal/vertical and at least MIN_RULE_LENGTH long
+RULE_TOLERANCE = 1.0
+MIN_RULE_LENGTH = 18.0
+# Rules whose endpoints fall in the same bin are treated as aligned
+EXTENT_BIN = 3.0
+# Parallel aligned rules needed to suggest a table and the limits on their
+# spacing (plan column grids are spaced much wider than table rows)
+MIN_TABLE_RULES = 3
+MIN_RULE_PITCH = 6.0
+MAX_RULE_PITCH = 144.0
+MAX_PITCH_RATIO = 4.0
+MIN_TABLE_TEXT_LINES = 3
+# Text lines sharing a baseline bin form a row; rows sharing column starts form a grid
+ROW_BIN = 3.0
+COLUMN_BIN = 6.0
+MIN_GRID_COLUMNS = 3
+MIN_GRID_ROWS = 3
+MAX_ROW_GAP = 36.0
+# Keyword titles this close above a region are pulled into it; a page titled
+# as a schedule is searched in full even without other evidence
+TABLE_KEYWORDS = ("SCHEDULE", "PANEL")
+SCHEDULE_KEYWORD = "SCHEDULE"
+KEYWORD_REACH = 36.0
+# Title rows and notes boxes are often ruled differently from the table body,
+# so regions are padded by an inch before searching
+REGION_MARGIN = 72.0
+# Regions covering more of the page than this are searched as one full page
+FULL_PAGE_FRACTION = 0.6
+# Every find_tables call re-reads all of the page's drawings, so past this
+# many regions a single search of their bounding box is cheaper
+MAX_CLIP_SEARCHES = 3
+
+Segment = Tuple[float, float, float]  # (position, start, end)
+
+
+def _add_segment(horizontal: List[Segment], vertical: List[Segment],
+                 x0: float, y0: float, x1: float, y1: float) -> None:
+    if abs(y1 - y0) <= RULE_TOLERANCE and abs(x1 - x0) >= MIN_RULE_LENGTH:
+        horizontal.append(((y0 + y1) / 2, min(x0, x1), max(x0, x1)))
+    elif abs(x1 - x0) <= RULE_TOLERANCE and abs(y1 - y0) >= MIN_RULE_LENGTH:
+        vertical.append(((x0 + x1) / 2, min(y0, y1), max(y0, y1)))
+
+
+def find_ruling_lines(page: pymupdf.Page) -> Tuple[List[Segment], List[Segment]]:
+    """
+    Collect horizontal and vertical ruling lines from a page's vector drawings.
+
+    Returns:
+        (horizontal, vertical) lists of (position, start, end) tuples
+    """
+    horizontal: List[Segment] = []
+    vertical: List[Segment] = []
+    for path in page.get_cdrawings():
+        for item in path["items"]:
+            if item[0] == "l":
+                (x0, y0), (x1, y1) = item[1], item[2]
+                _add_segment(horizontal, vertical, x0, y0, x1, y1)
+            elif item[0] == "re":
+                x0, y0, x1, y1 = item[1]
+                _add_segment(horizontal, vertical, x0, y0, x1, y0)
+                _add_segment(horizontal, vertical, x0, y1, x1, y1)
+                _add_segment(horizontal, vertical, x0, y0, x0, y1)
+                _add_segment(horizontal, vertical, x1, y0, x1, y1)
+    return horizontal, vertical
+
+
+class RuleGroup(NamedTuple):
+    """Parallel ruling lines sharing the same start and end."""
+    positions: List[float]
+    start: float
+    end: float
+
+
+def _aligned_rule_groups(rules: List[Segment]) -> List[RuleGroup]:
+    """Groups of MIN_TABLE_RULES or more evenly spaced rules with the same extent."""
+    groups: Dict[Tuple[int, int], List[Segment]] = defaultdict(list)
+    for rule in rules:
+        groups[(round(rule[1] / EXTENT_BIN), round(rule[2] / EXTENT_BIN))].append(rule)
+
+    aligned = []
+    for group in groups.values():
+        positions = sorted({round(position / EXTENT_BIN) * EXTENT_BIN for position, _, _ in group})
+        if len(positions) < MIN_TABLE_RULES:
+            continue
+        gaps = [b - a for a, b in zip(positions, positions[1:])]
+        pitch = median(gaps)
+        # Rows need room for text and are roughly evenly spaced
+        if pitch > MAX_RULE_PITCH or min(gaps) < MIN_RULE_PITCH or max(gaps) > MAX_PITCH_RATIO * pitch:
+            continue
+        aligned.append(RuleGroup(positions, min(rule[1] for rule in group), max(rule[2] for rule in group)))
+    return aligned
+
+
+def _bounded(group: RuleGroup, crossing: Dict[int, List[Tuple[float, float]]]) -> bool:
+    """Whether both ends of a rule group meet a crossing rule spanning its positions."""
+    low, high = group.positions[0], group.positions[-1]
+    for end in (group.start, group.end):
+        key = round(end / EXTENT_BIN)
+        if not any(start <= high and stop >= low
+                   for bin_key in (key - 1, key, key + 1)
+                   for start, stop in crossing.get(bin_key, ())):
+            return False
+    return True
+
+
+def _lattice_regions(horizontal: List[Segment], vertical: List[Segment],
+                     lines: List[Tuple[pymupdf.Rect, str]]) -> List[pymupdf.Rect]:
+    """
+    Regions where evenly spaced rules are closed off by crossing rules and hold text.
+
+    Stair treads, hatching and repeated walls also produce parallel rules, but
+    table rows end on column rules (and columns on row rules) and have text
+    between them.
+    """
+    crossing_vertical: Dict[int, List[Tuple[float, float]]] = defaultdict(list)
+    for x, y0, y1 in vertical:
+        crossing_vertical[round(x / EXTENT_BIN)].append((y0, y1))
+    crossing_horizontal: Dict[int, List[Tuple[float, float]]] = defaultdict(list)
+    for y, x0, x1 in horizontal:
+        crossing_horizontal[round(y / EXTENT_BIN)].append((x0, x1))
+
+    candidates = [
+        pymupdf.Rect(group.start, group.positions[0], group.end, group.positions[-1])
+        for group in _aligned_rule_groups(horizontal) if _bounded(group, crossing_vertical)
+    ] + [
+        pymupdf.Rect(group.positions[0], group.start, group.positions[-1], group.end)
+        for group in _aligned_rule_groups(vertical) if _bounded(group, crossing_horizontal)
+    ]
+    return [
+        region for region in candidates
+        if sum(1 for bbox, _ in lines if (bbox.tl + bbox.br) * 0.5 in region) >= MIN_TABLE_TEXT_LINES
+    ]
+
+
+def _text_lines(text_dict: dict) -> List[Tuple[pymupdf.Rect, str]]:
+    lines = []
+    for block in text_dict["blocks"]:
+        for line in block.get("lines", []):
+            text = "".join(span["text"] for span in line["spans"]).strip()
+            if text:
+                lines.append((pymupdf.Rect(line["bbox"]), text))
+    return lines
+
+
+def _text_grid_regions(lines: List[Tuple[pymupdf.Rect, str]]) -> List[pymupdf.Rect]:
+    """Regions where rows of three or more text lines repeat the same column starts."""
+    rows: Dict[int, List[pymupdf.Rect]] = defaultdict(list)
+    for bbox, _ in lines:
+        rows[round(bbox.y1 / ROW_BIN)].append(bbox)
+
+    regions = []
+    run: List[List[pymupdf.Rect]] = []
+    previous_columns: set = set()
+    for _, row in sorted(rows.items()):
+        if len(row) < MIN_GRID_COLUMNS:
+            continue
+        columns = {round(bbox.x0 / COLUMN_BIN) for bbox in row}
+        continues = (
+            run
+            and row[0].y0 - max(bbox.y1 for bbox in run[-1]) <= MAX_ROW_GAP
+            and len(columns & previous_columns) >= 2
+        )
+        if not continues:
+            if len(run) >= MIN_GRID_ROWS:
+                regions.append(_bounds(bbox for cells in run for bbox in cells))
+            run = []
+        run.append(row)
+        previous_columns = columns
+    if len(run) >= MIN_GRID_ROWS:
+        regions.append(_bounds(bbox for cells in run for bbox in cells))
+    return regions
+
+
+def _bounds(rects) -> pymupdf.Rect:
+    bounds = pymupdf.Rect(pymupdf.EMPTY_RECT())
+    for rect in rects:
+        bounds |= rect
+    return bounds
+
+
+def _merge_regions(regions: List[pymupdf.Rect]) -> List[pymupdf.Rect]:
+    """Union overlapping regions until none overlap."""
+    merged = [pymupdf.Rect(region) for region in regions]
+    changed = True
+    while changed:
+        changed = False
+        result: List[pymupdf.Rect] = []
+        for region in merged:
+            for existing in result:
+                if existing.intersects(region):
+                    existing.include_rect(region)
+                    changed = True
+                    break
+            else:
+                result.append(region)
+        merged = result
+    return merged
+
+
+def find_table_regions(page: pymupdf.Page, textpage: Optional[pymupdf.TextPage] = None) -> List[pymupdf.Rect]:
+    """
+    Cheap pre-pass that picks the parts of a page likely to hold tables.
+
+    Candidates come from lattices of evenly spaced ruling lines with text
+    inside and from text lines laid out on a repeating column grid. Titles
+    containing SCHEDULE or PANEL are pulled into the region just below them,
+    and a page with a SCHEDULE title but no other evidence is searched in full.
+
+    Returns:
+        Clip rectangles in reading order for page.find_tables(clip=...).
+        An empty list means the page has no likely tables; a single
+        rectangle equal to the page means search the whole page.
+    """
+    horizontal, vertical = find_ruling_lines(page)
+    lines = _text_lines(page.get_text("dict", textpage=textpage))
+    regions = _lattice_regions(horizontal, vertical, lines)
+    regions += _text_grid_regions(lines)
+
+    keywords = [(bbox, text.upper()) for bbox, text in lines
+                if any(keyword in text.upper() for keyword in TABLE_KEYWORDS)]
+    if not regions:
+        return [page.rect] if any(SCHEDULE_KEYWORD in text for _, text in keywords) else []
+
+    regions = _merge_regions([region + (-REGION_MARGIN, -REGION_MARGIN, REGION_MARGIN, REGION_MARGIN)
+                              for region in regions])
+    for keyword, _ in keywords:
+        for region in regions:
+            below = 0 <= region.y0 - keyword.y1 <= KEYWORD_REACH
+            if below and keyword.x1 >= region.x0 and keyword.x0 <= region.x1:
+                region.include_rect(keyword)
+
+    regions = [region & page.rect for region in _merge_regions(regions)]
+    if sum(region.get_area() for region in regions) > FULL_PAGE_FRACTION * page.rect.get_area():
+        return [page.rect]
+    return sorted(regions, key=lambda region: (region.y0, region.x0))
+
+
+def find_tables_selectively(page: pymupdf.Page, textpage: Optional[pymupdf.TextPage] = None) -> Tuple[list, int]:
+    """
+    Run page.find_tables only on the regions chosen by find_table_regions.
+
+    Returns:
+        (tables, number of find_tables searches made)
+    """
+    regions = find_table_regions(page, textpage)
+    if len(regions) > MAX_CLIP_SEARCHES:
+        regions = [_bounds(regions)]
+    return [table for clip in regions for table in page.find_tables(clip=clip).tables], len(regions)
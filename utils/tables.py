@@ -0,0 +1,269 @@
+import io
+import re
+import csv
+import sys
+from array import array
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Cell values that read as quantities (20A, 1,200, 3/4", 100%) rather than labels
+NUMERIC_CELL = re.compile(r"^[-+$]?\d[\d,./]*\s*(?:[A-Z%\"']{0,4})$", re.IGNORECASE)
+HEADER_KINDS = ("columnHeader",)
+
+Box = Tuple[float, float, float, float]
+
+
+class ColumnarTable:
+    """
+    A table stored as one dense row-major grid.
+
+    Cell text lives in a flat list of interned strings, so values repeated
+    down a schedule (20A, 1, SPARE) are stored once. Merged cells are kept
+    as a span mask: every grid position records the index of the cell that
+    owns its content, which is itself for ordinary cells.
+
+    Usage:
+        table = ColumnarTable.from_rows([["CKT", "LOAD"], ["1", "LIGHTING"]])
+        table.header          # ["CKT", "LOAD"]
+        table.column(1)       # ["LOAD", "LIGHTING"]
+        table.to_markdown()
+    """
+
+    __slots__ = ("row_count", "column_count", "header_rows", "table_type", "_cells", "_anchors")
+
+    def __init__(self, row_count: int, column_count: int, cells: List[str], anchors: array,
+                 header_rows: int = 0, table_type: Optional[str] = None):
+        self.row_count = row_count
+        self.column_count = column_count
+        self.header_rows = header_rows
+        self.table_type = table_type
+        self._cells = cells
+        self._anchors = anchors
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Sequence[Optional[str]]], header_rows: Optional[int] = None,
+                  cell_boxes: Optional[Sequence[Sequence[Optional[Box]]]] = None) -> "ColumnarTable":
+        """
+        Build a table from a list of rows, e.g. PyMuPDF's Table.extract().
+
+        None marks a position covered by a merged cell. With cell_boxes (one
+        bbox per position, None where covered) the covering cell is the one
+        whose box contains the position; without them, or when no box does,
+        it is the cell to the left (or, at the start of a row, above).
+        """
+        row_count = len(rows)
+        column_count = max((len(row) for row in rows), default=0)
+        cells = [""] * (row_count * column_count)
+        anchors = array("l", range(row_count * column_count))
+        for r, row in enumerate(rows):
+            for c in range(column_count):
+                index = r * column_count + c
+                value = row[c] if c < len(row) else ""
+                if value is None:
+                    anchor = _covering_cell(cell_boxes, r, c) if cell_boxes else None
+                    if anchor is not None:
+                        anchors[index] = anchors[anchor[0] * column_count + anchor[1]]
+                    elif c > 0:
+                        anchors[index] = anchors[index - 1]
+                    elif r > 0:
+                        anchors[index] = anchors[index - column_count]
+                    continue
+                cells[index] = sys.intern(_clean(value))
+        table = cls(row_count, column_count, cells, anchors)
+        table.header_rows = table._detect_header_rows() if header_rows is None else header_rows
+        return table
+
+    @classmethod
+    def from_pymupdf(cls, table: Any, header_rows: Optional[int] = None) -> "ColumnarTable":
+        """Build a table from a PyMuPDF Table, placing merged cells by their bboxes."""
+        return cls.from_rows(table.extract(), header_rows, [row.cells for row in table.rows])
+
+    @classmethod
+    def from_azure(cls, table: Any) -> "ColumnarTable":
+        """Build a table from a Document Intelligence DocumentTable (or its JSON dict)."""
+        row_count = _field(table, "row_count", "rowCount", 0)
+        column_count = _field(table, "column_count", "columnCount", 0)
+        cells = [""] * (row_count * column_count)
+        anchors = array("l", range(row_count * column_count))
+        header_rows = 0
+        for cell in _field(table, "cells", "cells", None) or []:
+            r = _field(cell, "row_index", "rowIndex", 0)
+            c = _field(cell, "column_index", "columnIndex", 0)
+            if r >= row_count or c >= column_count:
+                continue
+            index = r * column_count + c
+            cells[index] = sys.intern(_clean(_field(cell, "content", "content", "")))
+            row_span = _field(cell, "row_span", "rowSpan", None) or 1
+            column_span = _field(cell, "column_span", "columnSpan", None) or 1
+            for covered_r in range(r, min(r + row_span, row_count)):
+                for covered_c in range(c, min(c + column_span, column_count)):
+                    anchors[covered_r * column_count + covered_c] = index
+            if _field(cell, "kind", "kind", None) in HEADER_KINDS:
+                header_rows = max(header_rows, r + row_span)
+
+        result = cls(row_count, column_count, cells, anchors)
+        result.header_rows = header_rows or result._detect_header_rows()
+        return result
+
+    def _detect_header_rows(self) -> int:
+        """One header row if the first row is all labels and a later row holds quantities."""
+        if self.row_count < 2:
+            return 0
+        first = [value for value in self.row(0) if value]
+        if len(first) * 2 < self.column_count or any(NUMERIC_CELL.match(value) for value in first):
+            return 0
+        body = self._cells[self.column_count:]
+        return 1 if any(NUMERIC_CELL.match(value) for value in body if value) else 0
+
+    def __len__(self) -> int:
+        return self.row_count
+
+    def __repr__(self) -> str:
+        return f"ColumnarTable({self.row_count}x{self.column_count}, header_rows={self.header_rows})"
+
+    def cell(self, row: int, column: int, fill_spans: bool = False) -> str:
+        index = row * self.column_count + column
+        return self._cells[self._anchors[index] if fill_spans else index]
+
+    def row(self, index: int, fill_spans: bool = False) -> List[str]:
+        start = index * self.column_count
+        if fill_spans:
+            return [self._cells[anchor] for anchor in self._anchors[start:start + self.column_count]]
+        return self._cells[start:start + self.column_count]
+
+    def column(self, index: int, fill_spans: bool = False) -> List[str]:
+        if fill_spans:
+            return [self._cells[anchor] for anchor in self._anchors[index::self.column_count]]
+        return self._cells[index::self.column_count]
+
+    def is_spanned(self, row: int, column: int) -> bool:
+        """Whether the position is covered by a merged cell that starts elsewhere."""
+        index = row * self.column_count + column
+        return self._anchors[index] != index
+
+    def iter_rows(self, fill_spans: bool = False) -> Iterator[List[str]]:
+        for index in range(self.row_count):
+            yield self.row(index, fill_spans)
+
+    @property
+    def header(self) -> List[str]:
+        """Column labels, joining stacked header rows; Col1, Col2, ... when there are none."""
+        if not self.header_rows:
+            return [f"Col{c + 1}" for c in range(self.column_count)]
+        labels = []
+        for c in range(self.column_count):
+            parts = []
+            for r in range(self.header_rows):
+                value = self.cell(r, c, fill_spans=True)
+                if value and value not in parts:
+                    parts.append(value)
+            labels.append(" ".join(parts) or f"Col{c + 1}")
+        return labels
+
+    def body(self, fill_spans: bool = False) -> List[List[str]]:
+        return [self.row(r, fill_spans) for r in range(self.header_rows, self.row_count)]
+
+    def records(self) -> List[Dict[str, str]]:
+        """Body rows as dicts keyed by header label, with merged cells filled in."""
+        header = self.header
+        return [dict(zip(header, row)) for row in self.body(fill_spans=True)]
+
+    def spans(self) -> List[Tuple[int, int, int, int]]:
+        """(row, column, row_span, column_span) for every merged cell."""
+        # Positions are visited in row-major order, so the last one seen
+        # for an anchor is the bottom-right corner of its span
+        last_covered: Dict[int, int] = {}
+        for index, anchor in enumerate(self._anchors):
+            if anchor != index:
+                last_covered[anchor] = index
+        result = []
+        for anchor, last in sorted(last_covered.items()):
+            row, column = divmod(anchor, self.column_count)
+            last_row, last_column = divmod(last, self.column_count)
+            result.append((row, column, last_row - row + 1, last_column - column + 1))
+        return result
+
+    def char_count(self) -> int:
+        return sum(map(len, self._cells))
+
+    def to_markdown(self) -> str:
+        header = [_escape_markdown(label) for label in self.header]
+        lines = ["|" + "|".join(header) + "|", "|" + "---|" * self.column_count]
+        lines.extend("|" + "|".join(map(_escape_markdown, row)) + "|" for row in self.body())
+        return "\n".join(lines) + "\n"
+
+    def to_csv(self) -> str:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        if self.header_rows:
+            writer.writerow(self.header)
+        writer.writerows(self.body(fill_spans=True))
+        return buffer.getvalue()
+
+    def to_json(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {
+            "row_count": self.row_count,
+            "column_count": self.column_count,
+            "header": self.header if self.header_rows else None,
+            "rows": self.body(),
+        }
+        spans = self.spans()
+        if spans:
+            data["spans"] = [list(span) for span in spans]
+        if self.table_type:
+            data["type"] = self.table_type
+        return data
+
+
+def json_default(value: Any) -> Any:
+    """json.dumps default= hook for ColumnarTable (anything with to_json) and Azure SDK models."""
+    if hasattr(value, "to_json"):
+        return value.to_json()
+    if hasattr(value, "as_dict"):
+        return value.as_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _field(obj: Any, attribute: str, key: str, default: Any) -> Any:
+    # Azure SDK models are mappings over the service JSON; reading keys avoids
+    # building a model object per attribute access
+    if isinstance(obj, Mapping):
+        value = obj.get(key, default)
+    else:
+        value = getattr(obj, attribute, default)
+    return default if value is None and default is not None else value
+
+
+def _covering_cell(cell_boxes: Sequence[Sequence[Optional[Box]]], row: int, column: int) -> Optional[Tuple[int, int]]:
+    """(row, column) of the real cell above or left of a covered position whose box contains it."""
+    center = _position_center(cell_boxes, row, column)
+    if center is None:
+        return None
+    x, y = center
+    for r in range(row, -1, -1):
+        boxes = cell_boxes[r] if r < len(cell_boxes) else ()
+        for c in range(min(column, len(boxes) - 1), -1, -1):
+            box = boxes[c]
+            if box is not None and (r, c) != (row, column) and box[0] <= x <= box[2] and box[1] <= y <= box[3]:
+                return r, c
+    return None
+
+
+def _position_center(cell_boxes: Sequence[Sequence[Optional[Box]]], row: int, column: int) -> Optional[Tuple[float, float]]:
+    # A covered position has no box of its own: its x comes from the
+    # narrowest real cell in its column and its y from the shortest in its row
+    column_boxes = [boxes[column] for boxes in cell_boxes if column < len(boxes) and boxes[column] is not None]
+    row_boxes = [box for box in cell_boxes[row] if box is not None] if row < len(cell_boxes) else []
+    xs = min(column_boxes, key=lambda box: box[2] - box[0], default=None)
+    ys = min(row_boxes, key=lambda box: box[3] - box[1], default=None)
+    if xs is None or ys is None:
+        return None
+    return (xs[0] + xs[2]) / 2, (ys[1] + ys[3]) / 2
+
+
+def _clean(value: Any) -> str:
+    return str(value).replace("\r", "").strip()
+
+
+def _escape_markdown(value: str) -> str:
+    return value.replace("|", "\\|").replace("\n", "<br>")
@@ -0,0 +1,199 @@
+import re
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+import pymupdf
+
+from .file_utils import sheet_number_from_filename
+
+logger = logging.getLogger(__name__)
+
+TEXT_INDEX_FILENAME = "text_index.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sheets (
+    id INTEGER PRIMARY KEY,
+    file TEXT NOT NULL UNIQUE,
+    sheet_number TEXT,
+    page_count INTEGER
+);
+CREATE TABLE IF NOT EXISTS lines (
+    id INTEGER PRIMARY KEY,
+    sheet_id INTEGER NOT NULL REFERENCES sheets(id) ON DELETE CASCADE,
+    page INTEGER,
+    x0 REAL, y0 REAL, x1 REAL, y1 REAL,
+    text TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_lines_sheet ON lines(sheet_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS lines_fts USING fts5(text, content='lines', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS lines_ai AFTER INSERT ON lines BEGIN
+    INSERT INTO lines_fts(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS lines_ad AFTER DELETE ON lines BEGIN
+    INSERT INTO lines_fts(lines_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+
+class TextLine(NamedTuple):
+    """One line of drawing text and where it sits on the sheet (PDF points)."""
+    page: int
+    text: str
+    bbox: Tuple[float, float, float, float]
+
+
+def page_text_lines(page: pymupdf.Page, page_number: int,
+                    textpage: Optional[pymupdf.TextPage] = None) -> List[TextLine]:
+    """Lines of a page from get_text("dict"), reusing the caller's textpage when given."""
+    lines = []
+    for block in page.get_text("dict", textpage=textpage)["blocks"]:
+        for line in block.get("lines", ()):
+            text = "".join(span["text"] for span in line["spans"]).strip()
+            if text:
+                lines.append(TextLine(page_number, text, tuple(round(v, 1) for v in line["bbox"])))
+    return lines
+
+
+def read_text_lines(pdf_path: Any, first_page: int = 0) -> List[TextLine]:
+    """
+    Text lines of every page of a PDF (path or PdfDocumentHandle), from first_page (0-based) on.
+
+    Must run on the PyMuPDF thread.
+    """
+    doc = pdf_path.open_pymupdf() if hasattr(pdf_path, "open_pymupdf") else pymupdf.open(pdf_path)
+    try:
+        lines: List[TextLine] = []
+        for page_number in range(first_page, doc.page_count):
+            page = doc.load_page(page_number)
+            textpage = page.get_textpage(flags=pymupdf.TEXTFLAGS_TEXT)
+            lines.extend(page_text_lines(page, page_number + 1, textpage))
+            del textpage, page
+        return lines
+    finally:
+        doc.close()
+
+
+def to_fts_query(query: str, raw: bool = False) -> str:
+    """
+    Turn a plain search into an FTS5 query.
+
+    Each word must appear; words are quoted (embedded quotes doubled) so
+    tags, spec sections and drawing text (RTU-3, 3/4", DO NOT, PANEL (E))
+    are matched as phrases rather than parsed as operators. With raw, the
+    query is FTS5 syntax and is passed through unchanged.
+    """
+    if raw:
+        return query
+    return " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+
+class TextIndex:
+    """
+    Full-text index of the drawing text of a job, one row per text line.
+
+    Lines live in a plain table keyed by sheet, page and bounding box; an
+    external-content FTS5 table indexes their text and is kept in sync by
+    triggers, so re-indexing a sheet is a delete and a bulk insert.
+
+    Usage:
+        index = TextIndex(output_folder / TEXT_INDEX_FILENAME)
+        index.index_file(pdf_path, lines)
+        index.search("GFCI", sheet="E")
+    """
+
+    def __init__(self, db_path: Union[str, Path]):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Writes come from worker threads (asyncio.to_thread); the lock serializes them
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            self._conn.executescript(SCHEMA)
+
+    def __enter__(self) -> "TextIndex":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def index_file(self, pdf_path: Union[str, Path], lines: Iterable[TextLine],
+                   sheet_number: Optional[str] = None) -> int:
+        """Insert (or replace) the text lines of one file. Returns the number of lines."""
+        lines = list(lines)
+        rows = [(line.page, *line.bbox, line.text) for line in lines]
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM lines WHERE sheet_id IN (SELECT id FROM sheets WHERE file = ?)",
+                               (str(pdf_path),))
+            self._conn.execute("DELETE FROM sheets WHERE file = ?", (str(pdf_path),))
+            sheet_id = self._conn.execute(
+                "INSERT INTO sheets (file, sheet_number, page_count) VALUES (?, ?, ?)",
+                (str(pdf_path), sheet_number or sheet_number_from_filename(pdf_path),
+                 max((line.page for line in lines), default=0))
+            ).lastrowid
+            self._conn.executemany(
+                "INSERT INTO lines (sheet_id, page, x0, y0, x1, y1, text) "
+                f"VALUES ({sheet_id}, ?, ?, ?, ?, ?, ?)", rows
+            )
+        return len(rows)
+
+    def sheet_count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sheets").fetchone()[0]
+
+    def search(self, query: str, limit: int = 50, sheet: Optional[str] = None,
+               raw: bool = False) -> List[Dict[str, Any]]:
+        """
+        Best-matching lines for a query, ranked by BM25.
+
+        An empty or blank query matches nothing. sheet limits results to
+        sheet numbers starting with it (E, E5, E5.00). raw queries are FTS5 syntax and raise sqlite3.OperationalError when malformed.
+        Each result has file, sheet_number, page, bbox, text and a snippet
+        with the matched terms in [brackets].
+        """
+        if not query.strip():
+            return []
+        sql = (
+            "SELECT s.file, s.sheet_number, l.page, l.x0, l.y0, l.x1, l.y1, l.text, "
+            "snippet(lines_fts, 0, '[', ']', '...', 12) AS snippet "
+            "FROM lines_fts JOIN lines l ON l.id = lines_fts.rowid JOIN sheets s ON s.id = l.sheet_id "
+            "WHERE lines_fts MATCH ?"
+        )
+        params: List[Any] = [to_fts_query(query, raw)]
+        if sheet:
+            sql += " AND s.sheet_number LIKE ? ESCAPE '\\'"
+            params.append(re.sub(r"([\\%_])", r"\\\1", sheet.upper()) + "%")
+        sql += " ORDER BY bm25(lines_fts) LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [
+            {
+                "file": row["file"], "sheet_number": row["sheet_number"], "page": row["page"],
+                "bbox": (row["x0"], row["y0"], row["x1"], row["y1"]),
+                "text": row["text"], "snippet": row["snippet"],
+            }
+            for row in rows
+        ]
+
+
+def format_results(results: List[Dict[str, Any]]) -> str:
+    """One line per hit: sheet, page, bounding box and snippet."""
+    lines = []
+    for result in results:
+        x0, y0, x1, y1 = result["bbox"]
+        lines.append(
+            f"{result['sheet_number'] or Path(result['file']).stem:<10} p{result['page']:<3} "
+            f"({x0:.0f},{y0:.0f},{x1:.0f},{y1:.0f})  {result['snippet']}"
+        )
+    return "\n".join(lines)
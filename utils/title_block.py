@@ -0,0 +1,329 @@
+import re
+import json
+import logging
+import statistics
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import pymupdf
+
+from utils.file_utils import sheet_number_from_filename
+
+logger = logging.getLogger(__name__)
+
+TITLE_BLOCK_FIELDS = ("drawing_number", "title", "revision", "date", "project", "job_number", "scale")
+
+# Title block field names ("SHEET NO.:", "ISSUE DATE:", "PROJ. NO.:"), alone or before their value
+TITLE_BLOCK_LABEL = re.compile(
+    r"(?:SHEET|DRAWING|DWG|JOB|PROJ\.?|PROJECT|ISSUED?|DATE|(?:GRAPHIC\s+)?SCALE|REV\.?|REVISIONS?|DRAWN|CHECKED|TITLE)\b"
+    r"[^:]{0,14}",
+    re.IGNORECASE
+)
+FIELD_LABELS = {
+    "drawing_number": re.compile(r"^(?:SHEET|DRAWING|DWG)\.?\s*(?:NO\.?|NUMBER|#)", re.IGNORECASE),
+    "title": re.compile(r"^(?:SHEET\s+|DRAWING\s+)?TITLE\b", re.IGNORECASE),
+    "job_number": re.compile(r"^(?:JOB|PROJ\.?|PROJECT)\s*(?:NO\.?|NUMBER|#)", re.IGNORECASE),
+    "date": re.compile(r"^(?:ISSUE\s+)?DATE\b", re.IGNORECASE),
+    "scale": re.compile(r"^SCALE\b", re.IGNORECASE),
+    "project": re.compile(r"^PROJECT(?:\s+NAME)?(?::|$)", re.IGNORECASE),
+    "revision": re.compile(r"^REV(?:ISION)?\.?(?::|$)", re.IGNORECASE),
+}
+SHEET_NUMBER_TEXT = re.compile(r"^[A-Z]{1,3}-?\d+(?:\.\d+)?[A-Z]?$")
+DATE = re.compile(r"\b(\d{1,2})[/.-](\d{1,2})[/.-](\d{2}|\d{4})\b")
+REVISION_MARK = re.compile(r"^(\d{1,2}|[A-Z])(?:\s+\S.*)?$")
+REVISION_VALUE = re.compile(r"[A-Z0-9]{1,3}", re.IGNORECASE)
+
+# Title blocks sit along the right or bottom edge; labels past this share of the page count
+EDGE_FRACTION = 0.6
+MIN_LABELS = 2
+REGION_MARGIN = 0.015
+
+
+@dataclass
+class BlockLine:
+    """
+    A text line with its box in its own reading direction: for text rotated
+    on the page, "right of" and "below" still follow the writing, as in the
+    rotated title strips of many sheets. Only lines of the same direction
+    are compared.
+    """
+    text: str
+    x0: float
+    y0: float
+    x1: float
+    y1: float
+    size: float
+    direction: Tuple[int, int] = (1, 0)
+
+    @property
+    def height(self) -> float:
+        return max(self.y1 - self.y0, 1.0)
+
+    @property
+    def center_y(self) -> float:
+        return (self.y0 + self.y1) / 2
+
+
+def block_lines(page: pymupdf.Page, clip: Optional[pymupdf.Rect] = None) -> List[BlockLine]:
+    """Text lines of a page (or a clip of it) with their font size."""
+    lines = []
+    for block in page.get_text("dict", clip=clip)["blocks"]:
+        for line in block.get("lines", ()):
+            text = "".join(span["text"] for span in line["spans"]).strip()
+            if text:
+                size = max(span["size"] for span in line["spans"])
+                dx, dy = (round(value) for value in line["dir"])
+                x0, y0, x1, y1 = line["bbox"]
+                # Rotate the box into the line's reading frame
+                xs, ys = zip(*((x * dx + y * dy, y * dx - x * dy) for x in (x0, x1) for y in (y0, y1)))
+                lines.append(BlockLine(text, min(xs), min(ys), max(xs), max(ys), size, (dx, dy)))
+    return lines
+
+
+def _is_label(line: BlockLine) -> bool:
+    name = line.text.split(":", 1)[0].strip()
+    return len(name) <= 24 and bool(TITLE_BLOCK_LABEL.fullmatch(name))
+
+
+def learn_region(page: pymupdf.Page) -> Optional[Tuple[float, float, float, float]]:
+    """
+    Locate the title block from the field labels on a sheet.
+
+    Returns the region as fractions of the page (x0, y0, x1, y1), so it
+    applies to every sheet of the set whatever its size, or None when the
+    page has no recognizable title block.
+    """
+    width, height = page.rect.width, page.rect.height
+    labels = [line for line in block_lines(page) if _is_label(line) and line.direction == (1, 0)]
+    right = [line for line in labels if line.x0 > width * EDGE_FRACTION]
+    bottom = [line for line in labels if line.y0 > height * EDGE_FRACTION]
+    if max(len(right), len(bottom)) < MIN_LABELS:
+        return None
+    if len(right) >= len(bottom):
+        # Labels of a schedule column further left are outliers; the block starts at the main group
+        middle = statistics.median(line.x0 for line in right)
+        x0 = min(line.x0 for line in right if line.x0 >= middle - 0.05 * width) / width
+        return (max(x0 - REGION_MARGIN, 0.0), 0.0, 1.0, 1.0)
+    middle = statistics.median(line.y0 for line in bottom)
+    y0 = min(line.y0 for line in bottom if line.y0 >= middle - 0.05 * height) / height
+    x0 = min(line.x0 for line in bottom) / width
+    return (max(x0 - 0.05, 0.0), max(y0 - 0.03, 0.0), 1.0, 1.0)
+
+
+def _date_key(match: re.Match) -> Tuple[int, int, int]:
+    month, day, year = (int(value) for value in match.groups())
+    return (year + 2000 if year < 100 else year, month, day)
+
+
+def _labelled_value(lines: List[BlockLine], label: BlockLine) -> Optional[str]:
+    """The value written after a label: on the label line, to its right or just below it."""
+    if ":" in label.text:
+        after = label.text.split(":", 1)[1].strip()
+        if after:
+            return after
+    lines = [line for line in lines if line.direction == label.direction]
+    same_row = [
+        line for line in lines
+        if line is not label and not _is_label(line) and line.x0 >= label.x1 - 1
+        and abs(line.center_y - label.center_y) < label.height * 0.6
+    ]
+    if same_row:
+        return min(same_row, key=lambda line: line.x0).text
+    below = [
+        line for line in lines
+        if line is not label and not _is_label(line)
+        and 0 <= line.y0 - label.y1 < label.height * 2.5
+        and line.x0 < label.x1 and line.x1 > label.x0 - label.height
+    ]
+    if below:
+        return min(below, key=lambda line: line.y0).text
+    return None
+
+
+def _latest_revision(lines: List[BlockLine]) -> Tuple[Optional[str], Optional[str]]:
+    """Mark and date of the latest row of the revision table (rows pairing a mark with a date)."""
+    latest = None
+    for line in lines:
+        match = DATE.search(line.text)
+        if not match:
+            continue
+        row = sorted(
+            (other for other in lines
+             if other.direction == line.direction and abs(other.center_y - line.center_y) < line.height * 0.6),
+            key=lambda other: other.x0
+        )
+        mark = REVISION_MARK.match(row[0].text) if row[0] is not line else None
+        if not mark:
+            continue
+        candidate = (_date_key(match), line.center_y, mark.group(1), match.group())
+        if latest is None or candidate[:2] > latest[:2]:
+            latest = candidate
+    return (latest[2], latest[3]) if latest else (None, None)
+
+
+def read_fields(lines: List[BlockLine], page_height: float) -> Tuple[Dict[str, str], Set[str]]:
+    """
+    Title block fields from the lines inside the region, and which of them
+    were read next to their label (the rest are layout guesses).
+    """
+    fields: Dict[str, str] = {}
+    labelled: Set[str] = set()
+    labels = [line for line in lines if _is_label(line)]
+    for name, pattern in FIELD_LABELS.items():
+        for label in labels:
+            if pattern.match(label.text):
+                value = _labelled_value(lines, label)
+                if name == "revision" and value and not REVISION_VALUE.fullmatch(value):
+                    value = None
+                if value:
+                    fields[name] = value
+                    labelled.add(name)
+                    break
+
+    values = [line for line in lines if not _is_label(line)]
+    numbers = [line for line in values if SHEET_NUMBER_TEXT.match(line.text)]
+    number = max(numbers, key=lambda line: line.size) if numbers else None
+    if number is not None:
+        # The sheet number is printed the largest; a labelled value may be a neighbouring field
+        if fields.get("drawing_number") != number.text:
+            labelled.discard("drawing_number")
+        fields["drawing_number"] = number.text
+        if "title" not in fields:
+            titles = [
+                line for line in values
+                if line is not number and line.direction == number.direction
+                and len(re.findall(r"[A-Za-z]", line.text)) >= 3
+                and not DATE.search(line.text) and abs(line.center_y - number.center_y) < page_height * 0.08
+            ]
+            if titles:
+                fields["title"] = min(titles, key=lambda line: abs(line.center_y - number.center_y)).text
+
+    revision, revision_date = _latest_revision(lines)
+    if revision is not None:
+        if fields.get("revision") != revision:
+            labelled.discard("revision")
+        fields["revision"] = revision
+    if revision_date:
+        if fields.get("date") != revision_date:
+            labelled.discard("date")
+        fields["date"] = revision_date
+    elif "date" in fields and not DATE.search(fields["date"]):
+        del fields["date"]
+        labelled.discard("date")
+
+    if "project" not in fields:
+        # Otherwise the project name is the largest text that isn't the sheet number
+        names = [
+            line for line in values
+            if line is not number and len(re.findall(r"[A-Za-z]", line.text)) >= 3 and not DATE.search(line.text)
+        ]
+        if names:
+            fields["project"] = max(names, key=lambda line: line.size).text
+    return fields, labelled
+
+
+def _read_region(page: pymupdf.Page, region: Tuple[float, float, float, float]) -> Tuple[Dict[str, str], Set[str]]:
+    x0, y0, x1, y1 = region
+    width, height = page.rect.width, page.rect.height
+    clip = pymupdf.Rect(x0 * width, y0 * height, x1 * width, y1 * height)
+    return read_fields(block_lines(page, clip), height)
+
+
+class TitleBlockLocator:
+    """
+    Reads drawing metadata from the title block without the LLM.
+
+    The block's region is learned once per job from the field labels on
+    the first sheet where they can be read; every sheet after that only
+    needs a clipped get_text of that region. A sheet whose region yields
+    no labelled field (the region came from a cover or spec sheet laid out
+    differently) gets its region learned again, and the new one is kept
+    when it reads labelled fields. Results are kept per file, with the
+    fields that came from labels, so the metadata can be merged into the
+    structured output later.
+
+    Usage:
+        title_blocks = TitleBlockLocator()
+        fields = await run_pdf_task(title_blocks.read, handle)
+        ...
+        merge_title_block(parsed_json, title_blocks.fields(pdf_path), title_blocks.labelled(pdf_path))
+    """
+
+    def __init__(self):
+        self.region: Optional[Tuple[float, float, float, float]] = None
+        self._results: Dict[str, Dict[str, str]] = {}
+        self._labelled: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def read(self, pdf: Any) -> Dict[str, str]:
+        """
+        Title block fields of a PDF (path or PdfDocumentHandle) from its first page.
+
+        Must run on the PyMuPDF thread.
+        """
+        path = str(getattr(pdf, "path", pdf))
+        doc = pdf.open_pymupdf() if hasattr(pdf, "open_pymupdf") else pymupdf.open(path)
+        try:
+            page = doc.load_page(0)
+            fields, labelled = _read_region(page, self.region) if self.region is not None else ({}, set())
+            if not labelled:
+                region = learn_region(page)
+                if region is not None and region != self.region:
+                    candidate = _read_region(page, region)
+                    if candidate[1]:
+                        verb = "Learned" if self.region is None else "Re-learned"
+                        logger.info(f"{verb} title block region {region} from {path}")
+                        self.region = region
+                        fields, labelled = candidate
+        finally:
+            doc.close()
+        if "drawing_number" not in fields and sheet_number_from_filename(path):
+            fields["drawing_number"] = sheet_number_from_filename(path)
+        with self._lock:
+            self._results[path] = fields
+            self._labelled[path] = labelled
+        return fields
+
+    def fields(self, pdf_path: Any) -> Dict[str, str]:
+        with self._lock:
+            return dict(self._results.get(str(pdf_path), {}))
+
+    def labelled(self, pdf_path: Any) -> Set[str]:
+        """Fields of a file read next to their label in the title block."""
+        with self._lock:
+            return set(self._labelled.get(str(pdf_path), ()))
+
+
+def sheet_key(fields: Dict[str, str]) -> str:
+    """Identity of one issue of a sheet, e.g. E5.00@3, for caches and revision diffs."""
+    number = fields.get("drawing_number", "")
+    revision = fields.get("revision")
+    return f"{number}@{revision}" if revision is not None else number
+
+
+def format_title_block(fields: Dict[str, str]) -> str:
+    """The TITLE BLOCK: section sent ahead of the sheet content."""
+    return "TITLE BLOCK:\n" + json.dumps(fields) + "\n" if fields else ""
+
+
+def merge_title_block(data: Any, fields: Dict[str, str], labelled: Iterable[str] = ()) -> Any:
+    """
+    Merge title block fields into structured output metadata.
+
+    Fields read next to their label replace the model's value; layout
+    guesses (largest text as the project, the name's sheet number) only
+    fill in what the model left out.
+    """
+    if not fields or not isinstance(data, dict):
+        return data
+    metadata = data.get("metadata")
+    if not isinstance(metadata, dict):
+        metadata = data["metadata"] = {}
+    labelled = set(labelled)
+    for key, value in fields.items():
+        if key not in TITLE_BLOCK_FIELDS:
+            continue
+        if key in labelled or metadata.get(key) in (None, ""):
+            metadata[key] = value
+    return data
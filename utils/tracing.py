@@ -0,0 +1,208 @@
+import json
+import time
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# File currently being processed; copied into worker threads by asyncio.to_thread
+_current_file: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("trace_file", default=None)
+# Innermost open span, so log records can be attributed to their stage
+_current_stage: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("trace_stage", default=None)
+
+
+def current_file() -> Optional[str]:
+    """File of the enclosing file_context, if any."""
+    return _current_file.get()
+
+
+def current_stage() -> Optional[str]:
+    """Name of the innermost open span, if any."""
+    return _current_stage.get()
+
+
+@dataclass
+class Span:
+    """A timed pipeline stage."""
+    name: str
+    start: float
+    duration: float = 0.0
+    file: Optional[str] = None
+    attrs: Dict[str, Any] = field(default_factory=dict)
+
+    def set(self, **attrs: Any) -> None:
+        """Attach measurements (bytes, tokens, pages...) to the span."""
+        self.attrs.update(attrs)
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    """Linear-interpolated percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+class Tracer:
+    """
+    Collects stage timings for a job.
+
+    Spans are cheap (two perf_counter calls and a list append) and are kept in
+    memory until the job exports them as a Chrome/Perfetto trace.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self.spans: List[Span] = []
+        self._listeners: List[Callable[[Span], None]] = []
+
+    def add_listener(self, listener: Callable[[Span], None]) -> None:
+        """Call listener with every finished span (e.g. to feed metrics or progress)."""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[Span], None]) -> None:
+        """Stop calling a listener added with add_listener."""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def reset(self) -> None:
+        """Drop recorded spans and restart the trace clock."""
+        with self._lock:
+            self._origin = time.perf_counter()
+            self.spans = []
+
+    @contextmanager
+    def file_context(self, file: str) -> Iterator[None]:
+        """Attribute every span opened inside the block to the given file."""
+        token = _current_file.set(file)
+        try:
+            yield
+        finally:
+            _current_file.reset(token)
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[Span]:
+        """
+        Time a stage.
+
+        Usage:
+            with tracer.span("find_tables", page=3) as span:
+                ...
+                span.set(tables=len(tables))
+        """
+        span = Span(name=name, start=time.perf_counter(), file=_current_file.get(), attrs=dict(attrs))
+        token = _current_stage.set(name)
+        try:
+            yield span
+        except BaseException as e:
+            span.attrs["error"] = type(e).__name__
+            raise
+        finally:
+            span.duration = time.perf_counter() - span.start
+            _current_stage.reset(token)
+            self._add(span)
+
+    def record(self, name: str, start: float, duration: float, **attrs: Any) -> Span:
+        """Record a span measured elsewhere, e.g. time spent waiting in the job queue."""
+        span = Span(name=name, start=start, duration=duration, file=_current_file.get(), attrs=dict(attrs))
+        self._add(span)
+        return span
+
+    def _add(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+        for listener in self._listeners:
+            try:
+                listener(span)
+            except Exception as e:
+                logger.warning(f"Span listener failed for {span.name}: {str(e)}")
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """
+        Build a Chrome trace (chrome://tracing, ui.perfetto.dev) with one track per file.
+        """
+        with self._lock:
+            spans = list(self.spans)
+            origin = self._origin
+
+        tracks: Dict[Optional[str], int] = {}
+        events = []
+        for span in spans:
+            if span.file not in tracks:
+                tracks[span.file] = len(tracks) + 1
+                events.append({
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": 1,
+                    "tid": tracks[span.file],
+                    "args": {"name": Path(span.file).name if span.file else "job"}
+                })
+            events.append({
+                "name": span.name,
+                "ph": "X",
+                "pid": 1,
+                "tid": tracks[span.file],
+                "ts": round((span.start - origin) * 1_000_000, 1),
+                "dur": round(span.duration * 1_000_000, 1),
+                "args": span.attrs
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, path: Path) -> Path:
+        """Write the trace JSON to path and return it."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.to_chrome_trace(), f, default=str)
+        logger.info(f"Wrote trace with {len(self.spans)} spans to {path}")
+        return path
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Per-stage statistics in seconds.
+
+        Returns:
+            Dict mapping stage name to count, total, p50, p95 and max
+        """
+        with self._lock:
+            spans = list(self.spans)
+
+        durations: Dict[str, List[float]] = {}
+        for span in spans:
+            durations.setdefault(span.name, []).append(span.duration)
+
+        stats = {}
+        for name, values in durations.items():
+            values.sort()
+            stats[name] = {
+                "count": len(values),
+                "total": sum(values),
+                "p50": _percentile(values, 0.50),
+                "p95": _percentile(values, 0.95),
+                "max": values[-1],
+            }
+        return stats
+
+    def format_summary(self) -> str:
+        """Render summary() as a plain-text table sorted by total time."""
+        stats = self.summary()
+        header = f"{'stage':<24}{'count':>8}{'total s':>11}{'p50 ms':>11}{'p95 ms':>11}{'max ms':>11}"
+        lines = [header, "-" * len(header)]
+        for name, s in sorted(stats.items(), key=lambda item: item[1]["total"], reverse=True):
+            lines.append(
+                f"{name:<24}{s['count']:>8}{s['total']:>11.2f}"
+                f"{s['p50'] * 1000:>11.1f}{s['p95'] * 1000:>11.1f}{s['max'] * 1000:>11.1f}"
+            )
+        return "\n".join(lines)
+
+
+# Process-wide tracer used by the pipeline
+tracer = Tracer()